@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark: single-row insert cost as request_logs grows.
+
+Grows the table (and its rollups) through each target size and times
+insert_log(), rollup upserts included, at every step. With INSERT ...
+RETURNING and in-memory rollup deltas the cost should stay flat; the
+legacy "SELECT id ... ORDER BY id DESC LIMIT 1" lookup is timed alongside
+for comparison.
+
+The default sizes stop at 1M rows. The 10M-row point takes about ten minutes
+to build and close to 1 GB of disk, so ask for it with --sizes.
+
+Usage:
+    python benchmarks/insert_scaling.py
+    python benchmarks/insert_scaling.py --sizes 10000 100000 1000000 10000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from devtrack_sdk.database import init_db
+
+SAMPLE_LOG = {
+    "path": "/api/items/1",
+    "path_pattern": "/api/items/{item_id}",
+    "method": "GET",
+    "status_code": 200,
+    "timestamp": "2024-01-01T00:00:00+00:00",
+    "client_ip": "127.0.0.1",
+    "duration_ms": 12.5,
+    "user_agent": "benchmark",
+    "referer": "",
+    "query_params": {},
+    "path_params": {"item_id": "1"},
+    "request_body": {},
+    "response_size": 128,
+    "user_id": None,
+    "role": None,
+    "trace_id": "benchmark",
+    "client_identifier": "ip:127.0.0.1",
+}
+
+
+def grow_table(db, target_rows: int, chunk_rows: int = 50_000) -> None:
+    """
+    Fill request_logs up to target_rows through insert_logs(), so the rollup
+    tables grow with it just as they do in production.
+    """
+    missing = target_rows - db.get_logs_count()
+    start = datetime(2024, 1, 1)
+    while missing > 0:
+        rows = min(missing, chunk_rows)
+        offset = target_rows - missing
+        db.insert_logs(
+            {
+                "path": [f"/api/items/{offset + i}" for i in range(rows)],
+                # Spread rows over patterns and minutes, like real traffic
+                "path_pattern": [
+                    f"/api/v{(offset + i) % 20}/items/{{item_id}}" for i in range(rows)
+                ],
+                "method": ["GET"] * rows,
+                "status_code": [200] * rows,
+                "timestamp": [
+                    start + timedelta(milliseconds=100 * (offset + i))
+                    for i in range(rows)
+                ],
+                "duration_ms": [random.random() * 100 for _ in range(rows)],
+                "client_identifier": [f"ip:10.0.0.{i % 50}" for i in range(rows)],
+            }
+        )
+        missing -= rows
+
+
+def time_calls(func, iterations: int, average=statistics.median) -> float:
+    """Return the median (or other average) wall time of func() in microseconds."""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - start) / 1000)
+    return average(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10_000, 100_000, 1_000_000],
+        help="Table sizes to measure at (add 10000000 for the 10M-row point)",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=200, help="Inserts timed per size"
+    )
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.gettempdir(), f"bench_{uuid.uuid4().hex}.db")
+    db = init_db(db_path, read_only=False)
+
+    def legacy_lookup():
+        db.conn.execute(
+            "SELECT id FROM request_logs ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+
+    # The mean, not the median, so occasional slow inserts are counted
+    print(
+        f"{'rows':>12} | {'insert_log mean (us)':>21} | "
+        f"{'legacy id lookup (us)':>22}"
+    )
+    print("-" * 63)
+    try:
+        for size in sorted(args.sizes):
+            grow_table(db, size)
+            insert_us = time_calls(
+                lambda: db.insert_log(SAMPLE_LOG), args.iterations, statistics.mean
+            )
+            lookup_us = time_calls(legacy_lookup, args.iterations)
+            print(f"{size:>12,} | {insert_us:>21.1f} | {lookup_us:>22.1f}")
+    finally:
+        db.close()
+        for path in (db_path, f"{db_path}.wal"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+if __name__ == "__main__":
+    main()
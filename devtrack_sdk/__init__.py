@@ -1,10 +1,18 @@
 # DevTrack SDK - Request tracking middleware for FastAPI and Django
 
+from devtrack_sdk.body import BodyCapture
 from devtrack_sdk.controller import router as devtrack_router
 from devtrack_sdk.django_middleware import DevTrackDjangoMiddleware
 from devtrack_sdk.django_urls import devtrack_cbv_urlpatterns, devtrack_urlpatterns
 from devtrack_sdk.django_views import DevTrackView, stats_view, track_view
+from devtrack_sdk.identity import ClientResolver
 from devtrack_sdk.middleware import DevTrackMiddleware
+from devtrack_sdk.paths import PathNormalizer
+from devtrack_sdk.redaction import Redactor
+from devtrack_sdk.retention import RetentionScheduler
+from devtrack_sdk.sampling import Sampler
+from devtrack_sdk.sketch import DDSketch
+from devtrack_sdk.writer import LogWriter
 
 __all__ = [
     # FastAPI
@@ -17,4 +25,13 @@ __all__ = [
     "DevTrackView",
     "devtrack_urlpatterns",
     "devtrack_cbv_urlpatterns",
+    # Shared
+    "LogWriter",
+    "RetentionScheduler",
+    "Sampler",
+    "ClientResolver",
+    "BodyCapture",
+    "PathNormalizer",
+    "Redactor",
+    "DDSketch",
 ]
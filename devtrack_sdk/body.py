@@ -0,0 +1,183 @@
+import fnmatch
+import re
+from typing import Any, Iterable, List, Optional, Union
+from urllib.parse import parse_qs
+
+from devtrack_sdk.serialization import dumps, loads
+
+# Stands in for "not parsed yet", since a JSON body can be null
+_UNSET = object()
+
+JSON_TYPE = "application/json"
+FORM_TYPE = "application/x-www-form-urlencoded"
+
+
+def media_type(content_type: Optional[str]) -> str:
+    """The media type of a Content-Type header, without parameters like charset."""
+    return content_type.split(";", 1)[0].strip().lower() if content_type else ""
+
+
+class CapturedBody:
+    """
+    A request body as received, cut to the capture limit.
+
+    ``data`` holds the kept bytes (a memoryview slice when the body was
+    truncated, so nothing is copied). Nothing is decoded or parsed until
+    ``text`` or ``value`` is read, and ``to_json()`` hands complete JSON
+    bodies to the database as the text that arrived.
+    """
+
+    __slots__ = ("data", "size", "media_type", "_text", "_value")
+
+    def __init__(self, data: Union[bytes, memoryview], size: int, media_type: str):
+        self.data = data
+        self.size = size
+        self.media_type = media_type
+        self._text: Optional[str] = None
+        self._value: Any = _UNSET
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > len(self.data)
+
+    @property
+    def text(self) -> str:
+        """The kept bytes as UTF-8 text."""
+        if self._text is None:
+            self._text = str(self.data, "utf-8", "replace")
+        return self._text
+
+    @property
+    def value(self) -> Any:
+        """
+        The parsed body, parsed on first access.
+
+        JSON bodies give their JSON value and form bodies a dict of value
+        lists. Truncated, invalid or other bodies give their text.
+        """
+        if self._value is _UNSET:
+            self._value = self.text
+            if not self.truncated and self.media_type == JSON_TYPE:
+                try:
+                    self._value = loads(self._text)
+                except ValueError:
+                    pass
+            elif not self.truncated and self.media_type == FORM_TYPE:
+                self._value = parse_qs(self._text, keep_blank_values=True)
+        return self._value
+
+    def to_json(self) -> str:
+        """JSON text for the request_body column."""
+        if self._value is _UNSET and self.media_type == JSON_TYPE:
+            # The database parses it; text that isn't valid JSON (like a
+            # truncated body) is stored as a JSON string
+            return self.text
+        return dumps(self.value)
+
+    @classmethod
+    def from_json(cls, text: str) -> "CapturedBody":
+        """A body from to_json() text, such as one sent to a collector."""
+        data = text.encode("utf-8")
+        return cls(data, len(data), JSON_TYPE)
+
+    def detach(self) -> None:
+        """
+        Copy kept bytes that are a slice of a larger body, so the full body
+        can be freed while the log waits in a queue.
+        """
+        if isinstance(self.data, memoryview):
+            self.data = self.data.tobytes()
+
+    # Log records are serialized with default=str on their way to a collector
+    __str__ = to_json
+
+    def __repr__(self) -> str:
+        return (
+            f"CapturedBody(size={self.size}, kept={len(self.data)}, "
+            f"media_type={self.media_type!r})"
+        )
+
+
+class BodyBuffer:
+    """Keeps up to ``max_bytes`` of a body that arrives in chunks."""
+
+    __slots__ = ("max_bytes", "media_type", "chunks", "kept", "size")
+
+    def __init__(self, max_bytes: int, media_type: str):
+        self.max_bytes = max_bytes
+        self.media_type = media_type
+        self.chunks: List[Union[bytes, memoryview]] = []
+        self.kept = 0
+        self.size = 0
+
+    def add(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        room = self.max_bytes - self.kept
+        if chunk and room > 0:
+            # Slicing a memoryview references the chunk instead of copying it
+            piece = chunk if len(chunk) <= room else memoryview(chunk)[:room]
+            self.chunks.append(piece)
+            self.kept += len(piece)
+
+    def body(self) -> Optional[CapturedBody]:
+        """The captured body, or None if it was empty."""
+        if not self.size:
+            return None
+        chunks = self.chunks
+        data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+        return CapturedBody(data, self.size, self.media_type)
+
+
+class BodyCapture:
+    """
+    Decides which request bodies are logged, and how much of them.
+
+    A body is captured when its media type is one of ``content_types`` and,
+    if ``paths`` is given, the request path matches one of those shell-style
+    patterns (``/api/orders/*``). At most ``max_bytes`` of each body are
+    kept; an empty ``paths`` list turns capture off.
+    """
+
+    CONTENT_TYPES = (JSON_TYPE, FORM_TYPE)
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024,
+        content_types: Iterable[str] = CONTENT_TYPES,
+        paths: Optional[Iterable[str]] = None,
+    ):
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be >= 0")
+        self.max_bytes = max_bytes
+        self.content_types = frozenset(media_type(name) for name in content_types)
+        self.paths = None if paths is None else tuple(paths)
+        self._path_re = (
+            None
+            if self.paths is None
+            # With no patterns, (?!) matches nothing
+            else re.compile("|".join(map(fnmatch.translate, self.paths)) or "(?!)")
+        )
+
+    def wants(self, path: str, content_type: Optional[str]) -> Optional[str]:
+        """The body's media type if it should be captured, else None."""
+        if not self.max_bytes:
+            return None
+        media = media_type(content_type)
+        if media not in self.content_types:
+            return None
+        if self._path_re is not None and not self._path_re.match(path):
+            return None
+        return media
+
+    def buffer(self, media: str) -> BodyBuffer:
+        """A BodyBuffer for a body arriving in chunks."""
+        return BodyBuffer(self.max_bytes, media)
+
+    def capture(self, body: bytes, media: str) -> Optional[CapturedBody]:
+        """Capture a body that's already in memory, or None if it's empty."""
+        if not body:
+            return None
+        data = (
+            body if len(body) <= self.max_bytes else memoryview(body)[: self.max_bytes]
+        )
+        return CapturedBody(data, len(body), media)
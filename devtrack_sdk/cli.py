@@ -2,8 +2,10 @@
 import json
 import os
 import re
-from datetime import datetime, timedelta
-from typing import Optional
+import signal
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
 import duckdb
 import requests
@@ -15,7 +17,15 @@ from rich.prompt import Confirm, Prompt
 from rich.table import Table
 
 from devtrack_sdk.__version__ import __version__
-from devtrack_sdk.database import DevTrackDB, init_db
+from devtrack_sdk.collector import LogCollector
+from devtrack_sdk.database import (
+    EXPORT_COMPRESSIONS,
+    DevTrackDB,
+    encode_log_stream,
+    init_db,
+    parse_query_param_filters,
+)
+from devtrack_sdk.retention import RetentionScheduler
 
 app = typer.Typer(
     name="devtrack",
@@ -164,7 +174,7 @@ def version():
     info_table.add_row("Version", __version__)
     info_table.add_row("Framework Support", "FastAPI, Django")
     info_table.add_row("Database", "DuckDB")
-    info_table.add_row("CLI Features", "8 commands")
+    info_table.add_row("CLI Features", "12 commands")
 
     console.print(info_table)
 
@@ -529,18 +539,37 @@ def reset(
 def export(
     output_file: str = typer.Option("devtrack_export.json", help="Output file path"),
     db_path: str = typer.Option("devtrack_logs.db", help="Path to the database file"),
-    format: str = typer.Option("json", help="Export format: json, csv"),
+    format: str = typer.Option("json", help="Export format: json, csv, parquet, arrow"),
+    compression: Optional[str] = typer.Option(
+        None,
+        help="csv: gzip/zstd; parquet: zstd (default)/snappy/gzip; arrow: zstd/lz4",
+    ),
     limit: Optional[int] = typer.Option(None, help="Limit number of entries to export"),
     path_pattern: Optional[str] = typer.Option(None, help="Filter by path pattern"),
     status_code: Optional[int] = typer.Option(None, help="Filter by status code"),
+    start: Optional[datetime] = typer.Option(
+        None, help="Only export requests at or after this time (UTC)"
+    ),
+    end: Optional[datetime] = typer.Option(
+        None, help="Only export requests before this time (UTC)"
+    ),
 ):
-    """📤 Export DevTrack logs to JSON or CSV file with filtering options."""
+    """📤 Export DevTrack logs to JSON, CSV, Parquet or Arrow with filtering options."""
     console = Console()
 
+    if compression is not None and format.lower() not in EXPORT_COMPRESSIONS:
+        raise typer.BadParameter(
+            f"{format} exports are not compressed", param_hint="--compression"
+        )
+
     if not os.path.exists(db_path):
         console.print(f"[red]Database '{db_path}' does not exist.[/]")
         raise typer.Exit(1)
 
+    # Logs are stored in UTC, so the bounds are read as UTC too
+    start = start.replace(tzinfo=timezone.utc) if start else None
+    end = end.replace(tzinfo=timezone.utc) if end else None
+
     try:
         with Progress(
             SpinnerColumn(),
@@ -551,53 +580,58 @@ def export(
 
             db = DevTrackDB(db_path, read_only=True)
 
-            # Get logs based on filters
-            if path_pattern:
-                entries = db.get_logs_by_path(path_pattern, limit)
-            elif status_code:
-                entries = db.get_logs_by_status_code(status_code, limit)
-            else:
-                entries = db.get_all_logs(limit)
-
-            progress.update(task, description="Writing to file...")
-
             if format.lower() == "json":
-                # Convert datetime objects to ISO format strings for JSON serialization
-                def json_serializer(obj):
-                    """JSON serializer for objects not serializable by default."""
-                    if isinstance(obj, datetime):
-                        return obj.isoformat()
-                    raise TypeError(f"Type {type(obj)} not serializable")
-
+                # Rows are streamed to the file, so memory stays flat
+                entries = db.iter_logs(
+                    path_pattern=path_pattern,
+                    status_code=status_code,
+                    limit=limit,
+                    start=start,
+                    end=end,
+                    as_json=True,
+                )
+                exported = 0
+
+                def counted(rows):
+                    nonlocal exported
+                    for row in rows:
+                        exported += 1
+                        yield row
+
+                filters = {
+                    "limit": limit,
+                    "path_pattern": path_pattern,
+                    "status_code": status_code,
+                    "start": start.isoformat() if start else None,
+                    "end": end.isoformat() if end else None,
+                }
                 with open(output_file, "w") as f:
-                    json.dump(
-                        {
-                            "export_timestamp": datetime.now().isoformat(),
-                            "total_entries": len(entries),
-                            "filters": {
-                                "limit": limit,
-                                "path_pattern": path_pattern,
-                                "status_code": status_code,
-                            },
-                            "entries": entries,
-                        },
-                        f,
-                        indent=2,
-                        default=json_serializer,
+                    f.write(
+                        '{"export_timestamp": '
+                        f"{json.dumps(datetime.now().isoformat())}, "
+                        f'"filters": {json.dumps(filters)}, "entries": '
                     )
-            elif format.lower() == "csv":
-                import csv
-
-                if entries:
-                    with open(output_file, "w", newline="") as f:
-                        writer = csv.DictWriter(f, fieldnames=entries[0].keys())
-                        writer.writeheader()
-                        writer.writerows(entries)
+                    for chunk in encode_log_stream(counted(entries), "json"):
+                        f.write(chunk)
+                    f.write(f', "total_entries": {exported}}}')
+            else:
+                # Other formats are written by DuckDB without touching Python
+                exported = db.export_logs(
+                    output_file,
+                    format=format.lower(),
+                    compression=compression,
+                    path_pattern=path_pattern,
+                    status_code=status_code,
+                    start=start,
+                    end=end,
+                    limit=limit,
+                )
 
+            db.close()
             progress.update(task, description="✅ Export complete!")
 
         console.print(
-            f"[bold green]✅ Exported {len(entries)} entries to:[/] " f"{output_file}"
+            f"[bold green]✅ Exported {exported} entries to:[/] " f"{output_file}"
         )
 
     except Exception as e:
@@ -605,6 +639,280 @@ def export(
         raise typer.Exit(1)
 
 
+@app.command("import")
+def import_logs(
+    input_file: str = typer.Argument(..., help="JSON file produced by export"),
+    db_path: str = typer.Option("devtrack_logs.db", help="Path to the database file"),
+    batch_size: int = typer.Option(10000, help="Number of entries per insert"),
+):
+    """📥 Import DevTrack logs from a JSON export file."""
+    console = Console()
+
+    if not os.path.exists(input_file):
+        console.print(f"[red]File '{input_file}' does not exist.[/]")
+        raise typer.Exit(1)
+
+    try:
+        with open(input_file) as f:
+            data = json.load(f)
+        entries = data.get("entries", []) if isinstance(data, dict) else data
+
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("Importing logs...", total=None)
+
+            db = DevTrackDB(db_path, read_only=False)
+            for start in range(0, len(entries), batch_size):
+                end = start + batch_size
+                db.insert_logs(entries[start:end])
+            db.close()
+
+            progress.update(task, description="✅ Import complete!")
+
+        console.print(
+            f"[bold green]✅ Imported {len(entries)} entries into:[/] {db_path}"
+        )
+
+    except Exception as e:
+        console.print(f"[red]❌ Failed to import logs:[/] {e}")
+        raise typer.Exit(1)
+
+
+@app.command()
+def collector(
+    db_path: str = typer.Option("devtrack_logs.db", help="Path to the database file"),
+    socket_path: str = typer.Option(
+        "/tmp/devtrack.sock", "--socket", help="Unix socket workers connect to"
+    ),
+    socket_mode: str = typer.Option(
+        "600", help="Octal permissions of the socket (660 to share with a group)"
+    ),
+    batch_size: int = typer.Option(500, help="Number of logs per insert"),
+    flush_interval: float = typer.Option(1.0, help="Seconds between batch writes"),
+    max_age_days: Optional[int] = typer.Option(
+        None, help="Retention: delete raw logs older than N days"
+    ),
+    max_rows: Optional[int] = typer.Option(
+        None, help="Retention: keep only the newest N raw logs"
+    ),
+    max_file_size_mb: Optional[float] = typer.Option(
+        None, help="Retention: delete the oldest logs above this size"
+    ),
+):
+    """📡 Run the single-writer collector for multi-worker deployments."""
+    console = Console()
+
+    try:
+        mode = int(socket_mode, 8)
+    except ValueError:
+        mode = -1
+    if not 0 <= mode <= 0o777:
+        raise typer.BadParameter(
+            "must be an octal mode like 600", param_hint="--socket-mode"
+        )
+
+    retention = {
+        name: value
+        for name, value in (
+            ("max_age_days", max_age_days),
+            ("max_rows", max_rows),
+            ("max_file_size_mb", max_file_size_mb),
+        )
+        if value is not None
+    }
+    try:
+        log_collector = LogCollector(
+            db_path,
+            socket_path,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            retention=retention or None,
+            socket_mode=mode,
+        )
+    except duckdb.IOException as e:
+        lock_info = parse_lock_error(str(e))
+        console.print(f"[red]❌ Database '{db_path}' is locked by another process.[/]")
+        if lock_info["pid"]:
+            console.print(f"[dim]   PID: {lock_info['pid']}[/]")
+        raise typer.Exit(1)
+
+    # Exit cleanly (draining the queue) on SIGTERM from process managers
+    def handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    console.print(f"[bold green]📡 Collector writing to:[/] {db_path}")
+    console.print(f"[bold green]   Listening on:[/] {socket_path}")
+    console.print(
+        f"[dim]   Set DEVTRACK_COLLECTOR_SOCKET={socket_path} in your workers[/]"
+    )
+    try:
+        log_collector.serve_forever()
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopping collector...[/]")
+    finally:
+        log_collector.shutdown()
+
+
+@app.command()
+def archive(
+    archive_dir: str = typer.Argument(..., help="Directory holding the partitions"),
+    db_path: str = typer.Option("devtrack_logs.db", help="Path to the database file"),
+    older_than_days: int = typer.Option(
+        7, help="Move logs older than N days into Parquet partitions"
+    ),
+    drop_older_than_days: Optional[int] = typer.Option(
+        None, help="Delete archived partitions older than N days"
+    ),
+    partition_by: str = typer.Option("day", help="Partition size: day or hour"),
+):
+    """🗂️ Move old logs into time-partitioned Parquet files."""
+    console = Console()
+
+    if not os.path.exists(db_path):
+        console.print(f"[red]Database '{db_path}' does not exist.[/]")
+        raise typer.Exit(1)
+
+    try:
+        db = DevTrackDB(
+            db_path,
+            read_only=False,
+            archive_dir=archive_dir,
+            partition_by=partition_by,
+        )
+        now = datetime.now(timezone.utc)
+        archived = db.archive_logs(now - timedelta(days=older_than_days))
+        console.print(f"[bold green]✅ Archived {archived} logs to:[/] {archive_dir}")
+        if drop_older_than_days is not None:
+            dropped = db.drop_partitions(now - timedelta(days=drop_older_than_days))
+            console.print(f"[bold green]🗑️ Dropped {dropped} archived logs[/]")
+
+        partitions = db.list_partitions()
+        db.close()
+    except ValueError as e:
+        console.print(f"[red]❌ {e}[/]")
+        raise typer.Exit(1)
+    except Exception as e:
+        console.print(f"[red]❌ Failed to archive logs:[/] {e}")
+        raise typer.Exit(1)
+
+    if partitions:
+        table = Table(title="🗂️ Archived Partitions")
+        table.add_column("Partition", style="cyan")
+        table.add_column("Rows", justify="right")
+        table.add_column("Files", justify="right")
+        table.add_column("Size", justify="right")
+        for partition in partitions:
+            table.add_row(
+                partition["partition"],
+                str(partition["rows"]),
+                str(partition["files"]),
+                f"{partition['bytes'] / 1024:.1f} KB",
+            )
+        console.print(table)
+
+
+@app.command()
+def retention(
+    db_path: str = typer.Option("devtrack_logs.db", help="Path to the database file"),
+    max_age_days: Optional[int] = typer.Option(
+        None, help="Delete raw logs (and archived partitions) older than N days"
+    ),
+    max_rows: Optional[int] = typer.Option(
+        None, help="Keep only the newest N raw logs"
+    ),
+    max_file_size_mb: Optional[float] = typer.Option(
+        None, help="Delete the oldest raw logs while the data exceeds this size"
+    ),
+    archive_dir: Optional[str] = typer.Option(
+        None, help="Directory for Parquet partitions (see: devtrack archive)"
+    ),
+    archive_after_days: Optional[int] = typer.Option(
+        None, help="Move logs older than N days into archive_dir"
+    ),
+    rollup_max_age_days: Optional[int] = typer.Option(
+        None, help="Delete per-minute rollups older than N days"
+    ),
+    interval: float = typer.Option(3600.0, help="Seconds between runs"),
+    once: bool = typer.Option(False, "--once", help="Run a single pass and exit"),
+):
+    """♻️ Apply retention policies and compact the database on a schedule."""
+    console = Console()
+
+    if not os.path.exists(db_path):
+        console.print(f"[red]Database '{db_path}' does not exist.[/]")
+        raise typer.Exit(1)
+
+    try:
+        db = DevTrackDB(db_path, read_only=False, archive_dir=archive_dir)
+        scheduler = RetentionScheduler(
+            db,
+            max_age_days=max_age_days,
+            max_rows=max_rows,
+            max_file_size_mb=max_file_size_mb,
+            archive_after_days=archive_after_days,
+            rollup_max_age_days=rollup_max_age_days,
+            interval=interval,
+            start=False,
+        )
+    except duckdb.IOException as e:
+        lock_info = parse_lock_error(str(e))
+        console.print(f"[red]❌ Database '{db_path}' is locked by another process.[/]")
+        if lock_info["pid"]:
+            console.print(f"[dim]   PID: {lock_info['pid']}[/]")
+        console.print(
+            "[dim]💡 Pass retention options to the app or the collector instead.[/]"
+        )
+        raise typer.Exit(1)
+    except ValueError as e:
+        console.print(f"[red]❌ {e}[/]")
+        raise typer.Exit(1)
+
+    def report(result):
+        console.print(
+            f"[bold green]♻️ Archived {result['archived']}, "
+            f"pruned {result['pruned']} logs, "
+            f"{result['rollups_pruned']} rollup rows[/]"
+            + (" [bold green]and compacted[/]" if result["compacted"] else "")
+            + f" [dim]({result['file_bytes'] / 1024 / 1024:.1f} MB)[/]"
+        )
+
+    if once:
+        try:
+            report(scheduler.run_once())
+        except Exception as e:
+            console.print(f"[red]❌ Retention run failed:[/] {e}")
+            raise typer.Exit(1)
+        finally:
+            db.close()
+        return
+
+    def handle_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+
+    console.print(
+        f"[bold green]♻️ Applying retention to:[/] {db_path} "
+        f"[dim](every {interval:g}s)[/]"
+    )
+    try:
+        while True:
+            try:
+                report(scheduler.run_once())
+            except Exception as e:
+                console.print(f"[red]❌ Retention run failed:[/] {e}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        console.print("[yellow]Stopping retention...[/]")
+    finally:
+        db.close()
+
+
 @app.command()
 def query(
     db_path: str = typer.Option("devtrack_logs.db", help="Path to the database file"),
@@ -613,6 +921,12 @@ def query(
     method: Optional[str] = typer.Option(None, help="Filter by HTTP method"),
     limit: Optional[int] = typer.Option(50, help="Limit number of results"),
     days: Optional[int] = typer.Option(None, help="Show logs from last N days"),
+    cursor: Optional[str] = typer.Option(
+        None, help="Continue from the cursor printed by a previous query"
+    ),
+    param: Optional[List[str]] = typer.Option(
+        None, help="Filter by query-string value as key=value (repeatable)"
+    ),
     verbose: bool = typer.Option(
         False, "--verbose", "-v", help="Show detailed information"
     ),
@@ -624,7 +938,9 @@ def query(
         console.print(f"[red]Database '{db_path}' does not exist.[/]")
         raise typer.Exit(1)
 
+    since = datetime.now(timezone.utc) - timedelta(days=days) if days else None
     entries = None
+    next_cursor = None
     try:
         with Progress(
             SpinnerColumn(),
@@ -635,31 +951,21 @@ def query(
 
             db = DevTrackDB(db_path, read_only=True)
 
-            # Get logs based on filters
-            if path_pattern:
-                entries = db.get_logs_by_path(path_pattern, limit)
-            elif status_code:
-                entries = db.get_logs_by_status_code(status_code, limit)
-            else:
-                entries = db.get_all_logs(limit)
+            # Get one page of logs; every filter applies in SQL before the limit
+            page = db.get_logs_page(
+                limit=limit,
+                cursor=cursor,
+                path_pattern=path_pattern,
+                status_code=status_code,
+                query_params=parse_query_param_filters(param),
+                method=method,
+                start=since,
+            )
+            entries = page["entries"]
+            next_cursor = page["next_cursor"]
 
             db.close()
 
-            # Apply additional filters
-            if method:
-                entries = [
-                    e for e in entries if e.get("method", "").upper() == method.upper()
-                ]
-
-            if days:
-                cutoff_date = datetime.now() - timedelta(days=days)
-                entries = [
-                    e
-                    for e in entries
-                    if datetime.fromisoformat(e["timestamp"].replace("Z", "+00:00"))
-                    >= cutoff_date
-                ]
-
             progress.update(task, description="✅ Query complete!")
     except duckdb.IOException as e:
         # Database is locked - try HTTP endpoint as fallback
@@ -671,48 +977,21 @@ def query(
                 stats_url = detect_devtrack_endpoint(timeout=2)
                 if stats_url:
                     with console.status("[bold cyan]Fetching logs from DevTrack...[/]"):
-                        response = requests.get(stats_url, timeout=5)
+                        # The endpoint applies every filter, before its limit
+                        params = {
+                            "limit": limit,
+                            "cursor": cursor,
+                            "path_pattern": path_pattern,
+                            "status_code": status_code,
+                            "method": method,
+                            "since": since.isoformat() if since else None,
+                            "param": param or None,
+                        }
+                        response = requests.get(stats_url, params=params, timeout=5)
                         response.raise_for_status()
                         data = response.json()
                         entries = data.get("entries", [])
-
-                        # Apply filters to API data
-                        if path_pattern:
-                            entries = [
-                                e
-                                for e in entries
-                                if path_pattern.lower()
-                                in e.get("path_pattern", e.get("path", "")).lower()
-                            ]
-
-                        if status_code:
-                            entries = [
-                                e
-                                for e in entries
-                                if e.get("status_code") == status_code
-                            ]
-
-                        if method:
-                            entries = [
-                                e
-                                for e in entries
-                                if e.get("method", "").upper() == method.upper()
-                            ]
-
-                        if days:
-                            cutoff_date = datetime.now() - timedelta(days=days)
-                            entries = [
-                                e
-                                for e in entries
-                                if datetime.fromisoformat(
-                                    e["timestamp"].replace("Z", "+00:00")
-                                )
-                                >= cutoff_date
-                            ]
-
-                        # Apply limit after all filters
-                        if limit:
-                            entries = entries[:limit]
+                        next_cursor = data.get("next_cursor")
 
                         console.print(
                             "[green]✅ Successfully fetched logs via HTTP endpoint[/]"
@@ -741,6 +1020,8 @@ def query(
 
     if not entries:
         console.print("[yellow]No logs found matching the criteria.[/]")
+        if next_cursor:
+            console.print(f"[dim]Next page: --cursor {next_cursor}[/]")
         return
 
     # Display results
@@ -784,6 +1065,8 @@ def query(
         console.print(table)
 
     console.print(f"[bold green]📊 Total results:[/] {len(entries)}")
+    if next_cursor:
+        console.print(f"[dim]Next page: --cursor {next_cursor}[/]")
 
 
 @app.command()
@@ -1154,6 +1437,16 @@ def show_help():
     commands_table.add_row(
         "export", "📤 Export DevTrack logs to JSON or CSV file with filtering"
     )
+    commands_table.add_row("import", "📥 Import DevTrack logs from a JSON export")
+    commands_table.add_row(
+        "collector", "📡 Run the single-writer collector for multi-worker apps"
+    )
+    commands_table.add_row(
+        "archive", "🗂️ Move old logs into time-partitioned Parquet files"
+    )
+    commands_table.add_row(
+        "retention", "♻️ Apply retention policies and compact the database"
+    )
     commands_table.add_row(
         "query", "🔍 Query DevTrack logs with advanced filtering and search"
     )
@@ -0,0 +1,433 @@
+import os
+import socket
+import socketserver
+import struct
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from devtrack_sdk.body import CapturedBody
+from devtrack_sdk.database import INTERNED_COLUMNS, DevTrackDB
+from devtrack_sdk.retention import RetentionScheduler
+from devtrack_sdk.serialization import dumps, dumps_bytes, loads
+from devtrack_sdk.writer import LogWriter
+
+# Every message is a 4-byte big-endian length followed by a JSON object
+_HEADER = struct.Struct(">I")
+_MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+# Distinct strings a client interns per connection before sending raw values
+MAX_INTERNED_STRINGS = 10000
+
+# Read and query methods the dashboards, CLI and middlewares call through a
+# CollectorClient
+REMOTE_QUERY_METHODS = frozenset(
+    {
+        "resolve_interval",
+        "tables_exist",
+        "get_all_logs",
+        "get_logs_page",
+        "get_logs_count",
+        "get_logs_by_path",
+        "get_logs_by_status_code",
+        "get_stats_summary",
+        "get_request_counts",
+        "get_traffic_over_time",
+        "get_error_trends",
+        "get_performance_metrics",
+        "get_latency_percentiles",
+        "get_consumer_segments",
+        "get_client_metrics",
+        "get_client_traffic_over_time",
+        "get_storage_info",
+        "list_partitions",
+    }
+)
+# Writes besides inserts: the sampled request counts the middleware keeps
+# and the deletes the dashboards offer
+REMOTE_WRITE_METHODS = frozenset(
+    {
+        "add_request_counts",
+        "delete_all_logs",
+        "delete_logs_by_path",
+        "delete_logs_by_status_code",
+        "delete_logs_older_than",
+        "delete_logs_by_id",
+        "delete_logs_by_ids",
+    }
+)
+# DevTrackDB methods a collector will run on behalf of clients. Maintenance
+# (compact, archive_logs, drop_partitions, ...) stays with the collector.
+REMOTE_METHODS = REMOTE_QUERY_METHODS | REMOTE_WRITE_METHODS
+
+
+def _recv_exact(sock: socket.socket, size: int) -> Optional[bytes]:
+    """Read exactly size bytes, or return None if the peer closed the socket."""
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock: socket.socket, message: Dict[str, Any]) -> None:
+    payload = dumps_bytes(message, default=str)
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> Optional[Dict[str, Any]]:
+    header = _recv_exact(sock, _HEADER.size)
+    if header is None:
+        return None
+    (size,) = _HEADER.unpack(header)
+    if size > _MAX_FRAME_SIZE:
+        raise ValueError(f"Message of {size} bytes exceeds the frame limit")
+    payload = _recv_exact(sock, size)
+    if payload is None:
+        return None
+    return loads(payload)
+
+
+class _CollectorHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        collector = self.server.collector
+        # This connection's intern table (see CollectorClient._intern)
+        strings: List[str] = []
+        while True:
+            try:
+                message = recv_message(self.request)
+            except (OSError, ValueError):
+                return
+            if message is None:
+                return
+            try:
+                reply = collector.handle_message(message, strings)
+            except Exception as e:
+                reply = {"ok": False, "error": str(e)}
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class _CollectorServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class LogCollector:
+    """
+    Single writer process for multi-worker deployments.
+
+    DuckDB allows only one read-write process per database file. The
+    collector owns the file and listens on a Unix domain socket; app
+    workers send their logs (and dashboard queries) through a
+    ``CollectorClient`` instead of opening the database themselves.
+    Incoming logs are queued on a ``LogWriter`` and written in batches.
+    ``retention`` takes RetentionScheduler options, which then runs here
+    since workers can't open the database. The socket is created with
+    permissions ``socket_mode`` (owner only by default), so run the workers
+    as the same user or widen it, e.g. to ``0o660`` for a shared group.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "devtrack_logs.db",
+        socket_path: str = "/tmp/devtrack.sock",
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        queue_size: int = 100000,
+        overflow_policy: str = "drop_oldest",
+        retention: Optional[Dict[str, Any]] = None,
+        socket_mode: int = 0o600,
+    ):
+        if not 0 <= socket_mode <= 0o777:
+            raise ValueError("socket_mode must be a permission mode like 0o600")
+        self.db_path = db_path
+        self.socket_path = socket_path
+        self.socket_mode = socket_mode
+        self.db = DevTrackDB(db_path, read_only=False)
+        self.writer = LogWriter(
+            self.db,
+            max_queue_size=queue_size,
+            batch_size=batch_size,
+            flush_interval=flush_interval,
+            overflow_policy=overflow_policy,
+        )
+        self.retention = RetentionScheduler(self.db, **retention) if retention else None
+
+        # A socket file left behind by a crashed collector blocks bind()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self._server = _CollectorServer(socket_path, _CollectorHandler)
+        # Anyone who can connect can read and delete logs
+        os.chmod(socket_path, socket_mode)
+        self._server.collector = self
+        self._thread: Optional[threading.Thread] = None
+
+    def handle_message(
+        self, message: Dict[str, Any], strings: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Dispatch one client request and build the reply.
+
+        strings is the connection's intern table; interned insert fields are
+        decoded against it.
+        """
+        op = message.get("op")
+        if op == "insert":
+            records = message.get("records") or []
+            if message.get("interned"):
+                records = self._decode_interned(message, records, strings)
+            for index in message.get("captured") or []:
+                body = records[index].get("request_body")
+                if isinstance(body, str):
+                    records[index]["request_body"] = CapturedBody.from_json(body)
+            accepted = sum(1 for log_data in records if self.writer.submit(log_data))
+            return {"ok": True, "result": accepted}
+        if op == "flush":
+            return {"ok": True, "result": self.writer.flush(message.get("timeout"))}
+        if op == "call":
+            method = message.get("method")
+            if method not in REMOTE_METHODS:
+                return {"ok": False, "error": f"Unknown method: {method}"}
+            # Make queued logs visible to the query
+            self.writer.flush()
+            result = getattr(self.db, method)(
+                *message.get("args", []), **message.get("kwargs", {})
+            )
+            return {"ok": True, "result": result}
+        if op == "stats":
+            return {"ok": True, "result": self.writer.stats()}
+        return {"ok": False, "error": f"Unknown op: {op}"}
+
+    @staticmethod
+    def _decode_interned(
+        message: Dict[str, Any],
+        records: List[Dict[str, Any]],
+        strings: Optional[List[str]],
+    ) -> List[Dict[str, Any]]:
+        if strings is None:
+            raise ValueError("Interned inserts need a connection intern table")
+        strings.extend(message.get("strings") or [])
+        for name, codes in message["interned"].items():
+            for log_data, code in zip(records, codes):
+                if code is not None:
+                    log_data[name] = strings[code]
+        return records
+
+    def serve_forever(self) -> None:
+        """Serve clients in the current thread until shutdown() is called."""
+        self._server.serve_forever()
+
+    def start(self) -> "LogCollector":
+        """Serve clients from a background thread."""
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="devtrack-collector", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def shutdown(self) -> None:
+        """Stop serving, write everything queued and release the database."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.retention is not None:
+            self.retention.close()
+        self.writer.close()
+        self.db.close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class CollectorClient:
+    """
+    Drop-in stand-in for DevTrackDB that forwards calls to a LogCollector.
+
+    ``insert_log``/``insert_logs`` hand records to the collector's writer
+    queue; the DevTrackDB methods in REMOTE_METHODS run inside the collector
+    process and return their result.
+    """
+
+    read_only = False
+
+    def __init__(self, socket_path: str = "/tmp/devtrack.sock", timeout: float = 5.0):
+        self.socket_path = socket_path
+        self.db_path = None
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        # Strings the collector already has for this connection, by code
+        self._string_codes: Dict[str, int] = {}
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def _request(self, message: Dict[str, Any]) -> Any:
+        """
+        Send a request, reconnecting once if the collector restarted.
+
+        Only a failed connect or send is retried. Once the request has been
+        sent the collector may have acted on it, so losing the reply raises
+        rather than risk inserting or deleting twice.
+        """
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: never share the parent's socket
+                self._sock = None
+                self._pid = os.getpid()
+            for attempt in range(2):
+                sent = False
+                try:
+                    if self._sock is None:
+                        self._sock = self._connect()
+                        self._string_codes = {}
+                    if message.get("op") == "insert":
+                        send_message(self._sock, self._intern(message))
+                    else:
+                        send_message(self._sock, message)
+                    sent = True
+                    reply = recv_message(self._sock)
+                    if reply is None:
+                        raise ConnectionError("Collector closed the connection")
+                    break
+                except OSError:
+                    self._disconnect()
+                    if attempt or sent:
+                        raise
+        if not reply.get("ok"):
+            raise RuntimeError(reply.get("error", "Collector request failed"))
+        return reply.get("result")
+
+    def _intern(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replace repeated low-cardinality strings with per-connection codes.
+
+        Each distinct string (user agent, path pattern, ...) is sent once
+        per connection; later records carry its integer code. Fields that
+        aren't interned keep their value in the record. Captured request
+        bodies are sent as their JSON text and listed in "captured", so the
+        collector stores them as they arrived.
+        """
+        count = len(message["records"])
+        records, interned, new_strings, captured = [], {}, [], []
+        codes = self._string_codes
+        for index, log_data in enumerate(message["records"]):
+            log_data = dict(log_data)
+            body = log_data.get("request_body")
+            if isinstance(body, CapturedBody):
+                log_data["request_body"] = body.to_json()
+                captured.append(index)
+            for name in INTERNED_COLUMNS:
+                value = log_data.get(name)
+                if not isinstance(value, str):
+                    continue
+                code = codes.get(value)
+                if code is None:
+                    if len(codes) >= MAX_INTERNED_STRINGS:
+                        continue
+                    code = codes[value] = len(codes)
+                    new_strings.append(value)
+                del log_data[name]
+                if name not in interned:
+                    interned[name] = [None] * count
+                interned[name][index] = code
+            records.append(log_data)
+        return {
+            "op": "insert",
+            "records": records,
+            "interned": interned,
+            "strings": new_strings,
+            "captured": captured,
+        }
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def insert_logs(self, batch: List[Dict[str, Any]]) -> int:
+        """Send logs to the collector. Returns how many it accepted."""
+        return self._request({"op": "insert", "records": list(batch)})
+
+    def insert_log(self, log_data: Dict[str, Any]) -> int:
+        """Send a single log to the collector."""
+        return self.insert_logs([log_data])
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the collector has written everything it accepted."""
+        return self._request({"op": "flush", "timeout": timeout})
+
+    def get_writer_stats(self) -> Dict[str, int]:
+        """Get the collector's writer counters (queued, written, ...)."""
+        return self._request({"op": "stats"})
+
+    def iter_logs(
+        self,
+        path_pattern: Optional[str] = None,
+        status_code: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = 1000,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        query_params: Optional[Dict[str, str]] = None,
+        as_json: bool = False,
+        method: Optional[str] = None,
+    ) -> Iterator[Union[Dict[str, Any], str]]:
+        """Yield logs newest first, one collector round trip per chunk."""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            page = self.get_logs_page(
+                limit=size,
+                cursor=cursor,
+                path_pattern=path_pattern,
+                status_code=status_code,
+                query_params=query_params,
+                method=method,
+                start=start,
+                end=end,
+            )
+            if as_json:
+                for entry in page["entries"]:
+                    yield dumps(entry, default=str)
+            else:
+                yield from page["entries"]
+            if remaining is not None:
+                remaining -= len(page["entries"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+    def close(self) -> None:
+        with self._lock:
+            self._disconnect()
+
+    def __getattr__(self, name: str):
+        if name not in REMOTE_METHODS:
+            raise AttributeError(name)
+
+        def remote_call(*args, **kwargs):
+            return self._request(
+                {"op": "call", "method": name, "args": args, "kwargs": kwargs}
+            )
+
+        remote_call.__name__ = name
+        return remote_call
@@ -1,48 +1,124 @@
 import re
 from pathlib import Path
-from typing import Optional
+from typing import Any, List, Optional
 
 from fastapi import APIRouter, HTTPException, Query, Request
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import (
+    FileResponse,
+    HTMLResponse,
+    JSONResponse,
+    StreamingResponse,
+)
 
-from devtrack_sdk.database import get_db
+from devtrack_sdk.database import (
+    encode_log_stream,
+    get_db,
+    parse_query_param_filters,
+)
+from devtrack_sdk.serialization import dumps_bytes, json_default
 
 router = APIRouter()
 
 
+class DevTrackJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with devtrack_sdk.serialization (orjson or msgspec
+    when installed). Endpoints return it directly, which also skips
+    FastAPI's jsonable_encoder pass over large payloads.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content, default=json_default)
+
+
 @router.get("/__devtrack__/stats", include_in_schema=False)
 async def stats(
-    limit: Optional[int] = Query(None, description="Limit number of entries returned"),
-    offset: int = Query(0, description="Offset for pagination"),
+    limit: Optional[int] = Query(
+        None, description="Page size (defaults to DevTrackDB.DEFAULT_PAGE_SIZE)"
+    ),
+    offset: int = Query(0, description="Offset for pagination (ignored with cursor)"),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor from the previous page"
+    ),
     path_pattern: Optional[str] = Query(None, description="Filter by path pattern"),
     status_code: Optional[int] = Query(None, description="Filter by status code"),
+    method: Optional[str] = Query(None, description="Filter by HTTP method"),
+    since: Optional[str] = Query(
+        None, description="Only logs at or after this ISO 8601 timestamp"
+    ),
+    param: Optional[List[str]] = Query(
+        None, description="Query-string filter as key=value (repeatable)"
+    ),
+    stream: Optional[str] = Query(
+        None, description="Stream entries only, as 'ndjson' or a 'json' array"
+    ),
 ):
-    """Get DevTrack statistics and logs from DuckDB."""
+    """Get DevTrack statistics and one page of logs from DuckDB."""
     db = get_db(read_only=True)
 
+    try:
+        query_params = parse_query_param_filters(param)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if stream:
+        try:
+            body = encode_log_stream(
+                db.iter_logs(
+                    path_pattern=path_pattern,
+                    status_code=status_code,
+                    cursor=cursor,
+                    limit=limit,
+                    start=since,
+                    query_params=query_params,
+                    as_json=True,
+                    method=method,
+                ),
+                stream,
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        media_type = (
+            "application/x-ndjson" if stream == "ndjson" else "application/json"
+        )
+        return StreamingResponse(body, media_type=media_type)
+
+    try:
+        page = db.get_logs_page(
+            limit=limit,
+            cursor=cursor,
+            path_pattern=path_pattern,
+            status_code=status_code,
+            offset=offset,
+            query_params=query_params,
+            method=method,
+            start=since,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     try:
         # Get summary stats
         summary = db.get_stats_summary()
 
-        # Get logs based on filters
-        if path_pattern:
-            entries = db.get_logs_by_path(path_pattern, limit)
-        elif status_code:
-            entries = db.get_logs_by_status_code(status_code, limit)
-        else:
-            entries = db.get_all_logs(limit, offset)
-
-        return {
-            "summary": summary,
-            "total": db.get_logs_count(),
-            "entries": entries,
-            "filters": {
-                "limit": limit,
-                "offset": offset,
-                "path_pattern": path_pattern,
-                "status_code": status_code,
-            },
-        }
+        return DevTrackJSONResponse(
+            {
+                "summary": summary,
+                "total": db.get_logs_count(),
+                "entries": page["entries"],
+                "next_cursor": page["next_cursor"],
+                "filters": {
+                    "limit": limit,
+                    "offset": offset,
+                    "cursor": cursor,
+                    "path_pattern": path_pattern,
+                    "status_code": status_code,
+                    "method": method,
+                    "since": since,
+                    "param": query_params,
+                },
+            }
+        )
     except Exception as e:
         return {"error": f"Failed to retrieve stats: {str(e)}"}
 
@@ -129,12 +205,18 @@ async def delete_log_by_id(log_id: int):
 @router.get("/__devtrack__/metrics/traffic", include_in_schema=False)
 async def metrics_traffic(
     hours: int = Query(24, description="Number of hours to look back"),
+    interval_minutes: Optional[int] = Query(
+        None, description="Bucket width in minutes (default: automatic)"
+    ),
 ):
     """Get traffic metrics over time."""
     db = get_db(read_only=True)
     try:
-        traffic_data = db.get_traffic_over_time(hours=hours)
-        return {"traffic": traffic_data}
+        interval = db.resolve_interval(hours, interval_minutes)
+        traffic_data = db.get_traffic_over_time(hours=hours, interval_minutes=interval)
+        return DevTrackJSONResponse(
+            {"traffic": traffic_data, "interval_minutes": interval}
+        )
     except Exception as e:
         return {"error": f"Failed to retrieve traffic metrics: {str(e)}"}
 
@@ -142,12 +224,17 @@ async def metrics_traffic(
 @router.get("/__devtrack__/metrics/errors", include_in_schema=False)
 async def metrics_errors(
     hours: int = Query(24, description="Number of hours to look back"),
+    interval_minutes: Optional[int] = Query(
+        None, description="Bucket width in minutes (default: automatic)"
+    ),
 ):
     """Get error trends and top failing routes."""
     db = get_db(read_only=True)
     try:
-        error_data = db.get_error_trends(hours=hours)
-        return error_data
+        interval = db.resolve_interval(hours, interval_minutes)
+        error_data = db.get_error_trends(hours=hours, interval_minutes=interval)
+        error_data["interval_minutes"] = interval
+        return DevTrackJSONResponse(error_data)
     except Exception as e:
         return {"error": f"Failed to retrieve error metrics: {str(e)}"}
 
@@ -155,12 +242,20 @@ async def metrics_errors(
 @router.get("/__devtrack__/metrics/perf", include_in_schema=False)
 async def metrics_perf(
     hours: int = Query(24, description="Number of hours to look back"),
+    interval_minutes: Optional[int] = Query(
+        None, description="Bucket width in minutes (default: automatic)"
+    ),
+    exact: bool = Query(False, description="Exact instead of approximate percentiles"),
 ):
     """Get performance metrics (p50/p95/p99 latency)."""
     db = get_db(read_only=True)
     try:
-        perf_data = db.get_performance_metrics(hours=hours)
-        return perf_data
+        interval = db.resolve_interval(hours, interval_minutes)
+        perf_data = db.get_performance_metrics(
+            hours=hours, interval_minutes=interval, exact=exact
+        )
+        perf_data["interval_minutes"] = interval
+        return DevTrackJSONResponse(perf_data)
     except Exception as e:
         return {"error": f"Failed to retrieve performance metrics: {str(e)}"}
 
@@ -173,7 +268,7 @@ async def consumers(
     db = get_db(read_only=True)
     try:
         segments_data = db.get_consumer_segments(hours=hours)
-        return segments_data
+        return DevTrackJSONResponse(segments_data)
     except Exception as e:
         return {"error": f"Failed to retrieve consumer segments: {str(e)}"}
 
@@ -1,17 +1,455 @@
+import base64
+import glob
 import json
+import math
+import os
+import shutil
 import threading
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import duckdb
 
-# Thread-local storage for database connections
-_thread_local = threading.local()
+from devtrack_sdk.body import CapturedBody
+from devtrack_sdk.pool import get_pool
+from devtrack_sdk.serialization import dumps, loads
+from devtrack_sdk.sketch import MIN_VALUE, RELATIVE_ACCURACY, DDSketch
+
+# Columns written on ingest, with the DuckDB type used for batch inserts
+_INSERT_COLUMNS = {
+    "path": "VARCHAR",
+    "path_pattern": "VARCHAR",
+    "method": "VARCHAR",
+    "status_code": "INTEGER",
+    "timestamp": "TIMESTAMP",
+    "client_ip": "VARCHAR",
+    "duration_ms": "DOUBLE",
+    "user_agent": "VARCHAR",
+    "referer": "VARCHAR",
+    "query_params": "JSON",
+    "path_params": "JSON",
+    "request_body": "JSON",
+    "response_size": "INTEGER",
+    "user_id": "VARCHAR",
+    "role": "VARCHAR",
+    "trace_id": "VARCHAR",
+    "client_identifier": "VARCHAR",
+    "sample_weight": "INTEGER",
+    "ttfb_ms": "DOUBLE",
+    "send_ms": "DOUBLE",
+    "overhead_ms": "DOUBLE",
+}
+
+# Columns stored with DuckDB's JSON type
+_JSON_COLUMNS = ("query_params", "path_params", "request_body")
+
+# Text that isn't valid JSON is kept as a JSON string instead of failing
+_TO_JSON_SQL = 'COALESCE(TRY_CAST("{name}" AS JSON), to_json("{name}"))'
+
+# Low-cardinality columns that batches send dictionary-encoded: each distinct
+# value once, plus an integer code per row
+INTERNED_COLUMNS = (
+    "path_pattern",
+    "method",
+    "user_agent",
+    "referer",
+    "role",
+    "client_identifier",
+)
+
+# Timestamps formatted like datetime.isoformat()
+_ISO_TIMESTAMP_SQL = (
+    "regexp_replace(strftime({name}, '%Y-%m-%dT%H:%M:%S.%f'), '\\.0+$', '')"
+)
+
+# Latency rollups store a DDSketch per (minute, path_pattern) as one row per
+# bucket, using the same bucket mapping as devtrack_sdk.sketch.DDSketch
+_SKETCH_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_SKETCH_BUCKET_SQL = (
+    f"CAST(ceil(ln(greatest(duration_ms, {MIN_VALUE})) "
+    f"/ ln({_SKETCH_GAMMA!r})) AS INTEGER)"
+)
+_SKETCH_VALUE_SQL = f"(2 * pow({_SKETCH_GAMMA!r}, bucket) / ({_SKETCH_GAMMA!r} + 1))"
+
+# Inserts return the columns the rollups aggregate, so new rows are added to
+# them from memory instead of being read back
+_ROLLUP_RETURNING_SQL = (
+    "RETURNING id, timestamp, path_pattern, method, status_code, "
+    "client_identifier, duration_ms, response_size, client_ip, sample_weight"
+)
+
+# Columns of request_logs, for when DuckDB returns no cursor description
+_LOG_COLUMNS = [
+    "id",
+    "path",
+    "path_pattern",
+    "method",
+    "status_code",
+    "timestamp",
+    "client_ip",
+    "duration_ms",
+    "ttfb_ms",
+    "send_ms",
+    "overhead_ms",
+    "user_agent",
+    "referer",
+    "query_params",
+    "path_params",
+    "request_body",
+    "response_size",
+    "user_id",
+    "role",
+    "trace_id",
+    "client_identifier",
+    "sample_weight",
+    "created_at",
+]
+
+# Explicit column list, so reads return the same columns from the archive view
+_LOG_SELECT_SQL = ", ".join(f'"{name}"' for name in _LOG_COLUMNS)
+
+# Archived logs are Parquet files under <archive_dir>/log_partition=<key>/,
+# where the key is the log's UTC day or hour formatted with these patterns
+PARTITION_FORMATS = {"day": "%Y-%m-%d", "hour": "%Y-%m-%dT%H"}
+_PARTITION_PERIODS = {"day": timedelta(days=1), "hour": timedelta(hours=1)}
+
+# View over request_logs plus the archived partitions
+_ARCHIVE_VIEW = "request_logs_all"
+
+
+def _log_json_field(name: str) -> str:
+    if name in _JSON_COLUMNS:
+        return f'"{name}" := COALESCE("{name}", \'{{}}\'::JSON)'
+    if name in ("timestamp", "created_at"):
+        return f'"{name}" := {_ISO_TIMESTAMP_SQL.format(name=name)}'
+    return f'"{name}" := "{name}"'
+
+
+# One log row as JSON text, shaped like the dicts _format_log_dict returns
+_LOG_JSON_SQL = (
+    f"to_json(struct_pack({', '.join(_log_json_field(n) for n in _LOG_COLUMNS)}))"
+)
+
+
+def _batch_field(name: str, sql_type: str) -> Tuple[Any, List[str], str]:
+    """JSON structure, aliased unnest expressions and final expression for a column."""
+    field = f'b."{name}"'
+    if name in INTERNED_COLUMNS:
+        structure = {"codes": ["INTEGER"], "dict": [sql_type]}
+        unnest = f"unnest(list_transform({field}.codes, i -> {field}.dict[i + 1]))"
+        return structure, [f'{unnest} AS "{name}"'], f'"{name}"'
+    if name == "timestamp":
+        return ["TIMESTAMPTZ"], [f'unnest({field})::TIMESTAMP AS "{name}"'], f'"{name}"'
+    if name in _JSON_COLUMNS:
+        # Values are stored as given, like insert_log; captured bodies come as
+        # the text that arrived in a parallel list, and text that isn't JSON
+        # stays a JSON string
+        structure = {"data": ["JSON"], "raw": ["VARCHAR"]}
+        unnests = [
+            f'unnest({field}.data) AS "{name}"',
+            f'unnest({field}.raw) AS "{name}_raw"',
+        ]
+        raw = f'"{name}_raw"'
+        expr = f'COALESCE(TRY_CAST({raw} AS JSON), to_json({raw}), "{name}")'
+        return structure, unnests, expr
+    if name == "sample_weight":
+        # Logs that weren't sampled stand for themselves
+        return [sql_type], [f'unnest({field}) AS "{name}"'], f'COALESCE("{name}", 1)'
+    return [sql_type], [f'unnest({field}) AS "{name}"'], f'"{name}"'
+
+
+def _batch_insert_sql() -> str:
+    """
+    INSERT for a whole batch bound as one columnar JSON document.
+
+    Binding a single string and letting DuckDB parse it is far cheaper than
+    binding one Python list per column, which converts every element.
+    """
+    structure, unnests, exprs = {}, [], []
+    for name, sql_type in _INSERT_COLUMNS.items():
+        structure[name], field_unnests, expr = _batch_field(name, sql_type)
+        unnests.extend(field_unnests)
+        exprs.append(expr)
+    return f"""
+    INSERT INTO request_logs ({", ".join(_INSERT_COLUMNS)})
+    SELECT {", ".join(exprs)} FROM (
+        SELECT {", ".join(unnests)}
+        FROM (SELECT from_json(?, '{json.dumps(structure)}') AS b)
+    )
+    {_ROLLUP_RETURNING_SQL}
+    """
+
+
+_BATCH_INSERT_SQL = _batch_insert_sql()
+
+
+def _json_value(value: Any) -> Any:
+    """The value stored in a JSON column; missing values are an empty object."""
+    return {} if value is None else value
+
+
+def _parse_timestamp(value: Union[datetime, str]) -> datetime:
+    """A datetime, or one parsed from ISO 8601 text; raises ValueError."""
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError as e:
+        raise ValueError(f"Invalid timestamp: {value!r}") from e
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; convert aware datetimes to match."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# Bucket widths the time-series resolution picker chooses from
+_BUCKET_INTERVALS_MINUTES = (1, 2, 5, 10, 15, 30, 60, 120, 180, 360, 720, 1440)
+
+# Per-minute aggregates, keyed on the dimensions the dashboards group by.
+# NULL keys are stored as '' (or 0 for status_class) because they are
+# part of the primary key.
+_ROLLUP_TABLES_SQL = """
+CREATE TABLE IF NOT EXISTS request_rollups (
+    minute TIMESTAMP,
+    path_pattern VARCHAR,
+    method VARCHAR,
+    status_class INTEGER,  -- status_code // 100
+    client_identifier VARCHAR,
+    request_count BIGINT,
+    duration_count BIGINT,
+    duration_sum DOUBLE,
+    duration_min DOUBLE,
+    duration_max DOUBLE,
+    response_size_sum BIGINT,
+    first_seen TIMESTAMP,
+    last_seen TIMESTAMP,
+    last_client_ip VARCHAR,
+    PRIMARY KEY (minute, path_pattern, method, status_class, client_identifier)
+);
+CREATE TABLE IF NOT EXISTS request_latency_rollups (
+    minute TIMESTAMP,
+    path_pattern VARCHAR,
+    bucket INTEGER,
+    bucket_count BIGINT,
+    PRIMARY KEY (minute, path_pattern, bucket)
+);
+CREATE TABLE IF NOT EXISTS request_counts (
+    minute TIMESTAMP,
+    path_pattern VARCHAR,
+    method VARCHAR,
+    status_class INTEGER,
+    request_count BIGINT,
+    PRIMARY KEY (minute, path_pattern, method, status_class)
+);
+"""
+
+_REQUEST_COUNTS_UPSERT_SQL = """
+INSERT INTO request_counts
+SELECT minute, path_pattern, method, status_class, SUM(request_count)
+FROM (
+    SELECT unnest(from_json(?, '[{
+        "minute": "TIMESTAMP",
+        "path_pattern": "VARCHAR",
+        "method": "VARCHAR",
+        "status_class": "INTEGER",
+        "request_count": "BIGINT"
+    }]'), recursive := true)
+)
+GROUP BY ALL
+ON CONFLICT DO UPDATE SET
+    request_count = request_counts.request_count + EXCLUDED.request_count
+"""
+
+# AVG(duration_ms) for sampled logs
+_WEIGHTED_AVG_DURATION_SQL = (
+    "SUM(duration_ms * sample_weight) / "
+    "NULLIF(SUM(sample_weight) FILTER (WHERE duration_ms IS NOT NULL), 0)"
+)
+
+_ROLLUP_CONFLICT_SQL = """
+ON CONFLICT DO UPDATE SET
+    request_count = request_count + EXCLUDED.request_count,
+    duration_count = duration_count + EXCLUDED.duration_count,
+    duration_sum = duration_sum + EXCLUDED.duration_sum,
+    duration_min = least(duration_min, EXCLUDED.duration_min),
+    duration_max = greatest(duration_max, EXCLUDED.duration_max),
+    response_size_sum = response_size_sum + EXCLUDED.response_size_sum,
+    first_seen = least(first_seen, EXCLUDED.first_seen),
+    last_client_ip = CASE WHEN EXCLUDED.last_seen >= last_seen
+        THEN EXCLUDED.last_client_ip ELSE last_client_ip END,
+    last_seen = greatest(last_seen, EXCLUDED.last_seen)
+"""
+_LATENCY_CONFLICT_SQL = """
+ON CONFLICT DO UPDATE SET bucket_count = bucket_count + EXCLUDED.bucket_count
+"""
+
+# Sampled logs stand for sample_weight requests, so counts and sums are
+# weighted to stay unbiased
+_ROLLUP_UPSERT_SQL = """
+INSERT INTO request_rollups
+SELECT
+    date_trunc('minute', timestamp),
+    coalesce(path_pattern, ''),
+    coalesce(method, ''),
+    coalesce(status_code // 100, 0),
+    coalesce(client_identifier, ''),
+    SUM(sample_weight),
+    coalesce(SUM(sample_weight) FILTER (WHERE duration_ms IS NOT NULL), 0),
+    coalesce(SUM(duration_ms * sample_weight), 0),
+    MIN(duration_ms),
+    MAX(duration_ms),
+    coalesce(SUM(response_size * sample_weight), 0),
+    MIN(timestamp),
+    MAX(timestamp),
+    arg_max(client_ip, timestamp)
+FROM request_logs
+WHERE timestamp IS NOT NULL AND ({where})
+GROUP BY ALL
+""" + _ROLLUP_CONFLICT_SQL
+
+_LATENCY_ROLLUP_UPSERT_SQL = f"""
+INSERT INTO request_latency_rollups
+SELECT
+    date_trunc('minute', timestamp),
+    coalesce(path_pattern, ''),
+    {_SKETCH_BUCKET_SQL},
+    SUM(sample_weight)
+FROM request_logs
+WHERE timestamp IS NOT NULL AND duration_ms IS NOT NULL AND ({{where}})
+GROUP BY ALL
+""" + _LATENCY_CONFLICT_SQL
+
+# Per-minute deltas built in Python; the batch has one row per key
+_ROLLUP_DELTA_UPSERT_SQL = """
+INSERT INTO request_rollups
+SELECT unnest(from_json(?, '[{
+    "minute": "TIMESTAMP",
+    "path_pattern": "VARCHAR",
+    "method": "VARCHAR",
+    "status_class": "INTEGER",
+    "client_identifier": "VARCHAR",
+    "request_count": "BIGINT",
+    "duration_count": "BIGINT",
+    "duration_sum": "DOUBLE",
+    "duration_min": "DOUBLE",
+    "duration_max": "DOUBLE",
+    "response_size_sum": "BIGINT",
+    "first_seen": "TIMESTAMP",
+    "last_seen": "TIMESTAMP",
+    "last_client_ip": "VARCHAR"
+}]'), recursive := true)
+""" + _ROLLUP_CONFLICT_SQL
+
+_LATENCY_DELTA_UPSERT_SQL = """
+INSERT INTO request_latency_rollups
+SELECT unnest(from_json(?, '[{
+    "minute": "TIMESTAMP",
+    "path_pattern": "VARCHAR",
+    "bucket": "INTEGER",
+    "bucket_count": "BIGINT"
+}]'), recursive := true)
+""" + _LATENCY_CONFLICT_SQL
+_SKETCH_LOG_GAMMA = math.log(_SKETCH_GAMMA)
+
+
+def _rollup_deltas(
+    rows: List[Tuple[Any, ...]],
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Aggregate rows returned by _ROLLUP_RETURNING_SQL into rollup deltas.
+
+    Mirrors _ROLLUP_UPSERT_SQL and _LATENCY_ROLLUP_UPSERT_SQL: one dict per
+    rollup key and one per (minute, path_pattern, sketch bucket).
+    """
+    rollups: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    buckets: Dict[Tuple[Any, ...], int] = {}
+    for row in rows:
+        _, timestamp, pattern, method, status, client, duration, size, ip, weight = row
+        if timestamp is None:
+            continue
+        minute = timestamp.replace(second=0, microsecond=0)
+        pattern = pattern or ""
+        weight = weight or 1
+        key = (
+            minute,
+            pattern,
+            method or "",
+            status // 100 if status is not None else 0,
+            client or "",
+        )
+        delta = rollups.get(key)
+        if delta is None:
+            delta = rollups[key] = {
+                "request_count": 0,
+                "duration_count": 0,
+                "duration_sum": 0.0,
+                "duration_min": None,
+                "duration_max": None,
+                "response_size_sum": 0,
+                "first_seen": timestamp,
+                "last_seen": timestamp,
+                "last_client_ip": ip,
+            }
+        delta["request_count"] += weight
+        if duration is not None:
+            delta["duration_count"] += weight
+            delta["duration_sum"] += duration * weight
+            if delta["duration_min"] is None or duration < delta["duration_min"]:
+                delta["duration_min"] = duration
+            if delta["duration_max"] is None or duration > delta["duration_max"]:
+                delta["duration_max"] = duration
+            bucket = math.ceil(math.log(max(duration, MIN_VALUE)) / _SKETCH_LOG_GAMMA)
+            bucket_key = (minute, pattern, bucket)
+            buckets[bucket_key] = buckets.get(bucket_key, 0) + weight
+        if size is not None:
+            delta["response_size_sum"] += size * weight
+        if timestamp < delta["first_seen"]:
+            delta["first_seen"] = timestamp
+        if timestamp >= delta["last_seen"]:
+            delta["last_seen"] = timestamp
+            delta["last_client_ip"] = ip
+
+    rollup_rows = []
+    for (minute, pattern, method, status_class, client), delta in rollups.items():
+        delta["first_seen"] = delta["first_seen"].isoformat()
+        delta["last_seen"] = delta["last_seen"].isoformat()
+        rollup_rows.append(
+            {
+                "minute": minute.isoformat(),
+                "path_pattern": pattern,
+                "method": method,
+                "status_class": status_class,
+                "client_identifier": client,
+                **delta,
+            }
+        )
+    bucket_rows = [
+        {
+            "minute": minute.isoformat(),
+            "path_pattern": pattern,
+            "bucket": bucket,
+            "bucket_count": count,
+        }
+        for (minute, pattern, bucket), count in buckets.items()
+    ]
+    return rollup_rows, bucket_rows
 
 
 class DevTrackDB:
     """DuckDB manager for DevTrack logging data."""
 
+    # Metrics over windows longer than this read the per-minute rollups
+    ROLLUP_MIN_WINDOW_MINUTES = 15
+    # Upper bound on points per time series returned by the metrics queries
+    MAX_SERIES_POINTS = 500
+    # Page size for get_logs_page when no limit is given, and its hard cap
+    DEFAULT_PAGE_SIZE = 1000
+    MAX_PAGE_SIZE = 100000
+
     @staticmethod
     def _validate_int(value: Any, name: str = "value", min_value: int = 0) -> int:
         """Validate and sanitize integer value to prevent SQL injection."""
@@ -25,41 +463,84 @@ class DevTrackDB:
                 raise
             raise ValueError(f"{name} must be a valid integer") from e
 
-    def __init__(self, db_path: str = "devtrack_logs.db", read_only: bool = True):
-        """Initialize the database connection and create tables if they don't exist."""
+    def __init__(
+        self,
+        db_path: str = "devtrack_logs.db",
+        read_only: bool = True,
+        pool_size: int = 8,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        archive_dir: Optional[str] = None,
+        partition_by: str = "day",
+    ):
+        """
+        Initialize the connection pool and create tables if they don't exist.
+
+        archive_dir enables time-partitioned storage: archive_logs() moves old
+        logs into Parquet partitions there (one directory per day or hour, per
+        partition_by) and the log reads go through a view over both.
+        """
+        if partition_by not in PARTITION_FORMATS:
+            raise ValueError(
+                f"partition_by must be one of: {', '.join(PARTITION_FORMATS)}"
+            )
         self.db_path = db_path
+        self.archive_dir = os.path.abspath(archive_dir) if archive_dir else None
+        self.partition_by = partition_by
         self._lock = threading.Lock()
         self.read_only = read_only
-        # Create initial connection for table creation (only if not read-only)
-        if not read_only:
-            self._init_conn = duckdb.connect(db_path)
-            self._create_tables()
-            self._init_conn.close()
+        # Connections are shared per (db_path, read_only), not per thread
+        self._pool = get_pool(
+            db_path,
+            read_only=read_only,
+            max_size=pool_size,
+            idle_timeout=idle_timeout,
+            health_check_interval=health_check_interval,
+        )
+        self._leased = threading.local()
+        # Connection holders that made the last compact() give up
+        self.compact_blocked_by: List[str] = []
+        # Create tables (only if not read-only)
+        with self._connection() as conn:
+            if not read_only:
+                self._create_tables(conn)
+                if self.archive_dir:
+                    self._refresh_archive_view(conn)
+            # Files created by older versions have no rollups to read from
+            self._rollups_available = self._rollup_tables_exist(conn)
+            # Readers pick up the archive view whoever created it
+            self._logs_source = (
+                _ARCHIVE_VIEW if self._archive_view_readable(conn) else "request_logs"
+            )
+
+    @contextmanager
+    def _connection(self) -> Iterator[Any]:
+        """Check a connection out of the pool for the duration of a block."""
+        with self._pool.connection() as conn:
+            yield conn
 
     @property
     def conn(self):
-        """Get thread-local database connection."""
-        if not hasattr(_thread_local, "connection") or _thread_local.connection is None:
-            _thread_local.connection = duckdb.connect(
-                self.db_path, read_only=self.read_only
-            )
-        else:
-            # Check if connection is closed and reconnect if needed
-            try:
-                # Try a simple query to check if connection is alive
-                _thread_local.connection.execute("SELECT 1")
-            except Exception:
-                # Connection is closed, create a new one
-                try:
-                    _thread_local.connection.close()
-                except Exception:
-                    pass
-                _thread_local.connection = duckdb.connect(
-                    self.db_path, read_only=self.read_only
-                )
-        return _thread_local.connection
+        """
+        Get a connection leased to the calling thread for ad-hoc queries.
 
-    def _create_tables(self):
+        The lease is held until close() is called from the same thread, or
+        until that thread calls compact(), and keeps compact() from swapping
+        the file meanwhile. DevTrackDB methods use short-lived pool checkouts
+        instead.
+        """
+        entry = getattr(self._leased, "entry", None)
+        if entry is None:
+            holder = f"{threading.current_thread().name} (DevTrackDB.conn)"
+            entry = self._pool.checkout(holder=holder)
+            self._leased.entry = entry
+        return entry.conn
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Get connection pool metrics (in use, idle, waits, ...)."""
+        return self._pool.stats()
+
+    def _create_tables(self, conn):
         """Create the logs table if it doesn't exist."""
         # Create sequence for auto-incrementing ID
 
@@ -75,84 +556,410 @@ class DevTrackDB:
             duration_ms DOUBLE,
             user_agent VARCHAR,
             referer VARCHAR,
-            query_params VARCHAR,  -- JSON string
-            path_params VARCHAR,   -- JSON string
-            request_body VARCHAR,  -- JSON string
+            query_params JSON,
+            path_params JSON,
+            request_body JSON,
             response_size INTEGER,
             user_id VARCHAR,
             role VARCHAR,
             trace_id VARCHAR,
             client_identifier VARCHAR,
+            sample_weight INTEGER DEFAULT 1,
+            ttfb_ms DOUBLE,
+            send_ms DOUBLE,
+            overhead_ms DOUBLE,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
         """
-        self._init_conn.execute("CREATE SEQUENCE IF NOT EXISTS seq_log_id START 1")
-        self._init_conn.execute(create_table_sql)
+        conn.execute("CREATE SEQUENCE IF NOT EXISTS seq_log_id START 1")
+        conn.execute(create_table_sql)
 
         # Migration: Rename client_identifier_hash to client_identifier
         try:
-            self._init_conn.execute(
+            conn.execute(
                 "ALTER TABLE request_logs RENAME COLUMN "
                 "client_identifier_hash TO client_identifier"
             )
         except Exception:
             # Column might not exist or already renamed, try adding client_identifier
             try:
-                self._init_conn.execute(
+                conn.execute(
                     "ALTER TABLE request_logs ADD COLUMN client_identifier VARCHAR"
                 )
             except Exception:
                 pass  # Column already exists
 
+        # Migration: logs written before sampling each stand for one request
+        conn.execute(
+            "ALTER TABLE request_logs ADD COLUMN IF NOT EXISTS "
+            "sample_weight INTEGER DEFAULT 1"
+        )
+        # Migration: request phase timings
+        for name in ("ttfb_ms", "send_ms", "overhead_ms"):
+            conn.execute(
+                f"ALTER TABLE request_logs ADD COLUMN IF NOT EXISTS {name} DOUBLE"
+            )
+
+        # Migration: JSON columns used to be VARCHAR holding json.dumps text
+        self._migrate_json_columns(conn)
+
+        # Rollups: backfill from existing logs the first time they're created
+        rollups_existed = self._rollup_tables_exist(conn)
+        conn.execute(_ROLLUP_TABLES_SQL)
+        if not rollups_existed:
+            self._refresh_rollups(conn)
+
+    @staticmethod
+    def _migrate_json_columns(conn) -> None:
+        """Convert VARCHAR JSON columns to the JSON type, dropping invalid text."""
+        rows = conn.execute(
+            "SELECT column_name FROM duckdb_columns() "
+            "WHERE table_name = 'request_logs' AND data_type = 'VARCHAR' "
+            "AND column_name IN ('query_params', 'path_params', 'request_body')"
+        ).fetchall()
+        for (name,) in rows:
+            # Unparseable values read back as {} before, so store them as {}
+            conn.execute(
+                f"ALTER TABLE request_logs ALTER COLUMN {name} TYPE JSON "
+                f"USING CASE WHEN json_valid({name}) THEN {name}::JSON "
+                "ELSE '{}'::JSON END"
+            )
+
+    @staticmethod
+    def _archive_view_exists(conn) -> bool:
+        result = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_views() WHERE view_name = ?", [_ARCHIVE_VIEW]
+        ).fetchone()
+        return result[0] > 0
+
+    def _archive_view_readable(self, conn) -> bool:
+        """
+        Whether the archive view exists and its partitions can be found.
+
+        A view whose archive directory was moved or emptied fails every
+        query, so reads fall back to request_logs and writers drop it.
+        """
+        if not self._archive_view_exists(conn):
+            return False
+        try:
+            conn.execute(f"SELECT * FROM {_ARCHIVE_VIEW} LIMIT 0")
+        except duckdb.IOException:
+            if not self.read_only:
+                conn.execute(f"DROP VIEW IF EXISTS {_ARCHIVE_VIEW}")
+            return False
+        return True
+
+    @staticmethod
+    def _rollup_tables_exist(conn) -> bool:
+        result = conn.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name IN "
+            "('request_rollups', 'request_latency_rollups')"
+        ).fetchone()
+        return result[0] == 2
+
+    @contextmanager
+    def _write_transaction(self) -> Iterator[Any]:
+        """
+        Check out a connection and run the block in one transaction.
+
+        Writers in this process are serialized so that concurrent rollup
+        upserts can't conflict with each other.
+        """
+        with self._pool.write_lock, self._connection() as conn:
+            conn.execute("BEGIN TRANSACTION")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _update_rollups(self, conn, rows: List[Tuple[Any, ...]]) -> None:
+        """
+        Add freshly inserted logs to the rollup tables.
+
+        ``rows`` come from _ROLLUP_RETURNING_SQL. Deltas are aggregated in
+        memory, so only the touched rollup rows are written and request_logs
+        isn't read again while the write lock is held.
+        """
+        rollup_rows, bucket_rows = _rollup_deltas(rows)
+        if rollup_rows:
+            conn.execute(_ROLLUP_DELTA_UPSERT_SQL, [dumps(rollup_rows)])
+        if bucket_rows:
+            conn.execute(_LATENCY_DELTA_UPSERT_SQL, [dumps(bucket_rows)])
+
+    def _refresh_rollups(self, conn, minutes: Optional[List[Any]] = None) -> None:
+        """Rebuild rollups for the given minutes (all of them if None)."""
+        if minutes is None:
+            conn.execute("DELETE FROM request_rollups")
+            conn.execute("DELETE FROM request_latency_rollups")
+            where, params = "TRUE", []
+        elif not minutes:
+            return
+        else:
+            in_minutes = """IN (SELECT unnest(from_json(?, '["TIMESTAMP"]')))"""
+            params = [dumps([minute.isoformat() for minute in minutes])]
+            conn.execute(
+                f"DELETE FROM request_rollups WHERE minute {in_minutes}", params
+            )
+            conn.execute(
+                f"DELETE FROM request_latency_rollups WHERE minute {in_minutes}",
+                params,
+            )
+            where = f"date_trunc('minute', timestamp) {in_minutes}"
+        conn.execute(_ROLLUP_UPSERT_SQL.format(where=where), params)
+        conn.execute(_LATENCY_ROLLUP_UPSERT_SQL.format(where=where), params)
+
+    def _delete_logs(self, where: str, params: Any = ()) -> int:
+        """Delete logs matching a WHERE clause and keep rollups in sync."""
+        with self._write_transaction() as conn:
+            minutes = conn.execute(
+                f"SELECT DISTINCT date_trunc('minute', timestamp) "
+                f"FROM request_logs WHERE {where}",
+                params,
+            ).fetchall()
+            result = conn.execute(
+                f"DELETE FROM request_logs WHERE {where}", params
+            ).fetchone()
+            self._refresh_rollups(conn, [row[0] for row in minutes if row[0]])
+        return result[0] if result else 0
+
+    def _use_rollups(self, hours: int) -> bool:
+        """Whether a metrics window is long enough to be served from rollups."""
+        return self._rollups_available and hours * 60 > self.ROLLUP_MIN_WINDOW_MINUTES
+
+    def resolve_interval(
+        self, hours: int, interval_minutes: Optional[int] = None
+    ) -> int:
+        """
+        Pick the time-series bucket width in minutes for a window.
+
+        Uses the smallest standard width that keeps the series within
+        MAX_SERIES_POINTS. A requested interval_minutes is honored unless it
+        would exceed that cap.
+        """
+        hours_int = self._validate_int(hours, "hours", min_value=0)
+        window_minutes = max(hours_int * 60, 1)
+        auto = next(
+            (
+                width
+                for width in _BUCKET_INTERVALS_MINUTES
+                if window_minutes / width <= self.MAX_SERIES_POINTS
+            ),
+            -(-window_minutes // self.MAX_SERIES_POINTS),
+        )
+        if interval_minutes is None:
+            return auto
+        requested = self._validate_int(
+            interval_minutes, "interval_minutes", min_value=1
+        )
+        return max(requested, -(-window_minutes // self.MAX_SERIES_POINTS))
+
+    @staticmethod
+    def _time_bucket_sql(column: str, interval: int) -> str:
+        """SQL bucketing a timestamp column into `interval`-minute buckets."""
+        return f"time_bucket(INTERVAL '{interval} minutes', {column})"
+
+    @staticmethod
+    def _rollup_window_sql(hours: int) -> str:
+        """SQL for the first rollup minute inside a window of `hours` (validated)."""
+        return f"date_trunc('minute', CURRENT_TIMESTAMP - INTERVAL '{hours} hours')"
+
     def insert_log(self, log_data: Dict[str, Any]) -> int:
-        """Insert a log entry into the database."""
-        # Convert dict fields to JSON strings
-        query_params_json = json.dumps(log_data.get("query_params", {}))
-        path_params_json = json.dumps(log_data.get("path_params", {}))
-        request_body_json = json.dumps(log_data.get("request_body", {}))
+        """Insert a log entry into the database and return its ID."""
+        # Convert dict fields to JSON strings; missing or None values are {}
+        # as in insert_logs
+        query_params_json = dumps(_json_value(log_data.get("query_params")))
+        path_params_json = dumps(_json_value(log_data.get("path_params")))
+        request_body = _json_value(log_data.get("request_body"))
+        request_body_json = (
+            request_body.to_json()
+            if isinstance(request_body, CapturedBody)
+            else dumps(request_body)
+        )
 
         # Parse timestamp
         timestamp = datetime.fromisoformat(log_data["timestamp"].replace("Z", "+00:00"))
 
-        insert_sql = """
+        insert_sql = f"""
         INSERT INTO request_logs (
             path, path_pattern, method, status_code, timestamp, client_ip,
             duration_ms, user_agent, referer, query_params, path_params,
-            request_body, response_size, user_id, role, trace_id, client_identifier
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            request_body, response_size, user_id, role, trace_id, client_identifier,
+            sample_weight, ttfb_ms, send_ms, overhead_ms
+        ) VALUES (
+            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+            COALESCE(TRY_CAST(?::VARCHAR AS JSON), to_json(?::VARCHAR)),
+            ?, ?, ?, ?, ?, ?, ?, ?, ?
+        )
+        {_ROLLUP_RETURNING_SQL}
         """
 
-        result = self.conn.execute(
-            insert_sql,
-            (
-                log_data.get("path"),
-                log_data.get("path_pattern"),
-                log_data.get("method"),
-                log_data.get("status_code"),
-                timestamp,
-                log_data.get("client_ip"),
-                log_data.get("duration_ms"),
-                log_data.get("user_agent"),
-                log_data.get("referer"),
-                query_params_json,
-                path_params_json,
-                request_body_json,
-                log_data.get("response_size"),
-                log_data.get("user_id"),
-                log_data.get("role"),
-                log_data.get("trace_id"),
-                log_data.get("client_identifier")
-                or log_data.get("client_identifier_hash"),
-            ),
-        )
+        with self._write_transaction() as conn:
+            result = conn.execute(
+                insert_sql,
+                (
+                    log_data.get("path"),
+                    log_data.get("path_pattern"),
+                    log_data.get("method"),
+                    log_data.get("status_code"),
+                    timestamp,
+                    log_data.get("client_ip"),
+                    log_data.get("duration_ms"),
+                    log_data.get("user_agent"),
+                    log_data.get("referer"),
+                    query_params_json,
+                    path_params_json,
+                    # Captured bodies that aren't valid JSON stay JSON strings
+                    request_body_json,
+                    request_body_json,
+                    log_data.get("response_size"),
+                    log_data.get("user_id"),
+                    log_data.get("role"),
+                    log_data.get("trace_id"),
+                    log_data.get("client_identifier")
+                    or log_data.get("client_identifier_hash"),
+                    log_data.get("sample_weight") or 1,
+                    log_data.get("ttfb_ms"),
+                    log_data.get("send_ms"),
+                    log_data.get("overhead_ms"),
+                ),
+            ).fetchone()
+            if result:
+                self._update_rollups(conn, [result])
 
-        # Get the ID of the last inserted row
-        # Note: DuckDB auto-commits transactions
-        result = self.conn.execute(
-            "SELECT id FROM request_logs ORDER BY id DESC LIMIT 1"
-        ).fetchone()
+        # RETURNING gives this statement's own ID, so concurrent writers
+        # can't observe each other's rows and no extra scan is needed
         return result[0] if result else None
 
+    def insert_logs(
+        self, batch: Union[List[Dict[str, Any]], Dict[str, List[Any]], Any]
+    ) -> Optional[Tuple[int, int]]:
+        """
+        Insert a batch of log entries with a single INSERT statement.
+
+        Accepts a list of log dicts (same shape as insert_log), a columnar
+        dict of lists, or a PyArrow table. Returns the (first_id, last_id)
+        range assigned to the batch, or None if the batch is empty.
+        """
+        if hasattr(batch, "column_names") and hasattr(batch, "num_rows"):
+            return self._insert_arrow_batch(batch)
+
+        columns = (
+            self._columns_from_dict(batch)
+            if isinstance(batch, dict)
+            else self._columns_from_records(batch)
+        )
+        if not columns["path"]:
+            return None
+
+        payload = self._encode_batch(columns)
+        with self._write_transaction() as conn:
+            result = conn.execute(_BATCH_INSERT_SQL, [payload]).fetchall()
+            self._update_rollups(conn, result)
+        return self._id_range(result)
+
+    def _columns_from_records(
+        self, records: List[Dict[str, Any]]
+    ) -> Dict[str, List[Any]]:
+        """Transpose a list of log dicts into insert-ready column lists."""
+        columns = {name: [] for name in _INSERT_COLUMNS}
+        for log_data in records:
+            for name in _INSERT_COLUMNS:
+                columns[name].append(log_data.get(name))
+            if not log_data.get("client_identifier"):
+                columns["client_identifier"][-1] = log_data.get(
+                    "client_identifier_hash"
+                )
+        return columns
+
+    def _columns_from_dict(self, batch: Dict[str, List[Any]]) -> Dict[str, List[Any]]:
+        """Validate a columnar dict of lists and fill in missing columns."""
+        lengths = {len(values) for values in batch.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns in a batch must have the same length")
+        row_count = lengths.pop() if lengths else 0
+        columns = {
+            name: list(batch.get(name, [None] * row_count)) for name in _INSERT_COLUMNS
+        }
+        return columns
+
+    @staticmethod
+    def _encode_batch(columns: Dict[str, List[Any]]) -> str:
+        """Serialize insert-ready columns into the document _BATCH_INSERT_SQL reads."""
+        payload = {}
+        for name, values in columns.items():
+            if name in INTERNED_COLUMNS:
+                lookup: Dict[Any, int] = {}
+                codes = [
+                    None if value is None else lookup.setdefault(value, len(lookup))
+                    for value in values
+                ]
+                payload[name] = {"codes": codes, "dict": list(lookup)}
+            elif name in _JSON_COLUMNS:
+                data, raw = [], []
+                for value in values:
+                    captured = isinstance(value, CapturedBody)
+                    data.append(None if captured else _json_value(value))
+                    raw.append(value.to_json() if captured else None)
+                payload[name] = {"data": data, "raw": raw}
+            elif name == "timestamp":
+                payload[name] = [
+                    value.isoformat() if hasattr(value, "isoformat") else value
+                    for value in values
+                ]
+            else:
+                payload[name] = values
+        return dumps(payload, default=str)
+
+    def _insert_arrow_batch(self, table: Any) -> Optional[Tuple[int, int]]:
+        """Insert a PyArrow table by registering it and running INSERT ... SELECT."""
+        if table.num_rows == 0:
+            return None
+
+        available = set(table.column_names)
+        select_exprs = []
+        for name, sql_type in _INSERT_COLUMNS.items():
+            if name == "sample_weight":
+                select_exprs.append(
+                    'COALESCE(CAST("sample_weight" AS INTEGER), 1)'
+                    if name in available
+                    else "1"
+                )
+            elif name not in available:
+                select_exprs.append("NULL")
+            elif name in _JSON_COLUMNS:
+                if str(table.schema.field(name).type) in ("string", "large_string"):
+                    select_exprs.append(_TO_JSON_SQL.format(name=name))
+                else:
+                    # Nested Arrow types (struct/map) convert to JSON directly
+                    select_exprs.append(f'to_json("{name}")')
+            else:
+                select_exprs.append(f'CAST("{name}" AS {sql_type})')
+
+        column_names = ", ".join(_INSERT_COLUMNS)
+        insert_sql = f"""
+        INSERT INTO request_logs ({column_names})
+        SELECT {", ".join(select_exprs)} FROM _devtrack_batch
+        {_ROLLUP_RETURNING_SQL}
+        """
+        with self._write_transaction() as conn:
+            conn.register("_devtrack_batch", table)
+            try:
+                result = conn.execute(insert_sql).fetchall()
+            finally:
+                conn.unregister("_devtrack_batch")
+            self._update_rollups(conn, result)
+        return self._id_range(result)
+
+    @staticmethod
+    def _id_range(rows: List[Tuple[int]]) -> Optional[Tuple[int, int]]:
+        """Reduce RETURNING id rows to a (first_id, last_id) range."""
+        if not rows:
+            return None
+        ids = [row[0] for row in rows]
+        return min(ids), max(ids)
+
     def _safe_json_loads(self, value: Any, default: Any = None) -> Any:
         """Safely parse JSON string, returning default on error."""
         if value is None:
@@ -160,11 +967,10 @@ class DevTrackDB:
         if isinstance(value, dict):
             return value
         if isinstance(value, str):
-            if not value.strip():
-                return default if default is not None else {}
             try:
-                return json.loads(value)
-            except (json.JSONDecodeError, TypeError):
+                return loads(value)
+            except (ValueError, TypeError):
+                # Also empty or whitespace-only text
                 return default if default is not None else {}
         return default if default is not None else {}
 
@@ -182,11 +988,35 @@ class DevTrackDB:
                 log_dict["timestamp"] = str(log_dict["timestamp"])
         return log_dict
 
+    def _fetch_logs(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+        """Run a SELECT over the logs and return formatted log dicts."""
+        with self._connection() as conn:
+            cursor = conn.execute(sql, params)
+            result = cursor.fetchall()
+            # Get column names from description, with fallback for DuckDB quirks
+            try:
+                columns = (
+                    [desc[0] for desc in cursor.description]
+                    if cursor.description
+                    else None
+                )
+            except Exception:
+                columns = None
+
+        # If we couldn't get columns from description, use known column names
+        if not columns or (len(columns) == 1 and columns[0] in ["1", "NUMBER"]):
+            columns = _LOG_COLUMNS
+
+        return [self._format_log_dict(dict(zip(columns, row))) for row in result]
+
     def get_all_logs(
         self, limit: Optional[int] = None, offset: int = 0
     ) -> List[Dict[str, Any]]:
         """Retrieve all logs from the database."""
-        sql = "SELECT * FROM request_logs ORDER BY created_at DESC"
+        sql = (
+            f"SELECT {_LOG_SELECT_SQL} FROM {self._logs_source} "
+            "ORDER BY created_at DESC"
+        )
         if limit:
             # Validate and sanitize limit and offset to prevent SQL injection
             limit_int = int(limit)
@@ -195,61 +1025,294 @@ class DevTrackDB:
                 raise ValueError("limit and offset must be non-negative integers")
             sql += f" LIMIT {limit_int} OFFSET {offset_int}"
 
-        # Execute query to get description first, then fetch results
-        cursor = self.conn.execute(sql)
-        # Get column names from description
-        try:
-            columns = (
-                [desc[0] for desc in cursor.description] if cursor.description else None
+        return self._fetch_logs(sql)
+
+    def get_logs_page(
+        self,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        path_pattern: Optional[str] = None,
+        status_code: Optional[int] = None,
+        offset: int = 0,
+        query_params: Optional[Dict[str, str]] = None,
+        method: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        Get one page of logs, newest first, using keyset pagination.
+
+        Pass the returned ``next_cursor`` back to get the following page; it
+        is None on the last page. Pages seek on (created_at, id) instead of
+        skipping rows, so deep pages cost the same as the first one. limit
+        defaults to DEFAULT_PAGE_SIZE and is capped at MAX_PAGE_SIZE.
+        offset is only honored without a cursor, for older clients.
+        query_params keeps logs whose query string has all the given values;
+        method and the start/end timestamps filter before the limit applies.
+        """
+        limit_int = self._validate_int(
+            limit or self.DEFAULT_PAGE_SIZE, "limit", min_value=1
+        )
+        limit_int = min(limit_int, self.MAX_PAGE_SIZE)
+        offset_int = self._validate_int(offset, "offset", min_value=0)
+
+        where, params = self._log_filters(
+            path_pattern,
+            status_code,
+            cursor,
+            start=start,
+            end=end,
+            query_params=query_params,
+            method=method,
+        )
+        if cursor:
+            offset_int = 0
+
+        # One extra row tells us whether there is a next page
+        sql = f"""
+        SELECT {_LOG_SELECT_SQL} FROM {self._logs_source}
+        {where}
+        ORDER BY created_at DESC, id DESC
+        LIMIT {limit_int + 1} OFFSET {offset_int}
+        """
+        entries = self._fetch_logs(sql, params)
+
+        next_cursor = None
+        if len(entries) > limit_int:
+            entries = entries[:limit_int]
+            next_cursor = self._encode_cursor(entries[-1])
+        return {"entries": entries, "next_cursor": next_cursor}
+
+    def iter_logs(
+        self,
+        path_pattern: Optional[str] = None,
+        status_code: Optional[int] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = 1000,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        query_params: Optional[Dict[str, str]] = None,
+        as_json: bool = False,
+        method: Optional[str] = None,
+    ) -> Iterator[Union[Dict[str, Any], str]]:
+        """
+        Yield logs newest first, fetching chunk_size rows at a time.
+
+        Unlike get_logs_page there is no default limit: memory use depends on
+        chunk_size only. The pooled connection is held until the generator is
+        exhausted or closed. Invalid arguments raise ValueError right away,
+        before the first row is requested.
+
+        With as_json=True each log is yielded as JSON text encoded by DuckDB,
+        so the JSON columns are never parsed in Python.
+        """
+        chunk_size = self._validate_int(chunk_size, "chunk_size", min_value=1)
+        where, params = self._log_filters(
+            path_pattern,
+            status_code,
+            cursor,
+            start=start,
+            end=end,
+            query_params=query_params,
+            method=method,
+        )
+        select = _LOG_JSON_SQL if as_json else _LOG_SELECT_SQL
+        sql = (
+            f"SELECT {select} FROM {self._logs_source} {where} "
+            "ORDER BY created_at DESC, id DESC"
+        )
+        if limit:
+            sql += f" LIMIT {self._validate_int(limit, 'limit', min_value=1)}"
+        return self._iter_log_rows(sql, params, chunk_size, as_json)
+
+    def _iter_log_rows(
+        self, sql: str, params: List[Any], chunk_size: int, as_json: bool
+    ) -> Iterator[Union[Dict[str, Any], str]]:
+        with self._connection() as conn:
+            result = conn.execute(sql, params)
+            columns = [desc[0] for desc in result.description]
+            while True:
+                rows = result.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if as_json:
+                    for (row,) in rows:
+                        yield row
+                else:
+                    for row in rows:
+                        yield self._format_log_dict(dict(zip(columns, row)))
+
+    def export_logs(
+        self,
+        output_file: str,
+        format: str = "parquet",
+        compression: Optional[str] = None,
+        path_pattern: Optional[str] = None,
+        status_code: Optional[int] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: Optional[int] = None,
+        query_params: Optional[Dict[str, str]] = None,
+    ) -> int:
+        """
+        Write matching logs straight to a file and return the row count.
+
+        Parquet and CSV are written by DuckDB's COPY, so rows never pass
+        through Python. Arrow IPC streams record batches through pyarrow
+        (an optional dependency). JSON columns are exported as stored text.
+        compression defaults to zstd for Parquet and none for CSV/Arrow.
+        With a limit, the newest rows are exported.
+        """
+        if format not in EXPORT_COMPRESSIONS:
+            raise ValueError(
+                f"format must be one of: {', '.join(sorted(EXPORT_COMPRESSIONS))}"
             )
-        except Exception:
-            columns = None
+        compression = (compression or EXPORT_COMPRESSIONS[format][0]).lower()
+        if compression not in EXPORT_COMPRESSIONS[format]:
+            allowed = ", ".join(EXPORT_COMPRESSIONS[format])
+            raise ValueError(f"{format} compression must be one of: {allowed}")
 
-        # If we couldn't get columns from description, use known column names
-        if not columns or (len(columns) == 1 and columns[0] in ["1", "NUMBER"]):
-            columns = [
-                "id",
-                "path",
-                "path_pattern",
-                "method",
-                "status_code",
-                "timestamp",
-                "client_ip",
-                "duration_ms",
-                "user_agent",
-                "referer",
-                "query_params",
-                "path_params",
-                "request_body",
-                "response_size",
-                "user_id",
-                "role",
-                "trace_id",
-                "client_identifier",
-                "created_at",
-            ]
+        where, params = self._log_filters(
+            path_pattern,
+            status_code,
+            None,
+            start=start,
+            end=end,
+            query_params=query_params,
+        )
+        query = f"SELECT {_LOG_SELECT_SQL} FROM {self._logs_source} {where}"
+        if limit:
+            limit_int = self._validate_int(limit, "limit", min_value=1)
+            query += f" ORDER BY created_at DESC, id DESC LIMIT {limit_int}"
+
+        if format == "arrow":
+            return self._export_arrow(output_file, query, params, compression)
+
+        options = "FORMAT parquet" if format == "parquet" else "FORMAT csv, HEADER"
+        if compression != "none":
+            options += f", COMPRESSION {compression}"
+        target = output_file.replace("'", "''")
+        with self._connection() as conn:
+            # Filters are bound parameters; options come from the whitelist above
+            # nosemgrep: python.lang.security.audit.sql-injection
+            result = conn.execute(f"COPY ({query}) TO '{target}' ({options})", params)
+            row = result.fetchone()
+        return row[0] if row else 0
+
+    def _export_arrow(
+        self, output_file: str, query: str, params: List[Any], compression: str
+    ) -> int:
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise RuntimeError(
+                "Arrow export requires pyarrow: pip install devtrack-sdk[arrow]"
+            ) from e
+
+        options = pa.ipc.IpcWriteOptions(
+            compression=None if compression == "none" else compression
+        )
+        rows = 0
+        with self._connection() as conn:
+            reader = conn.execute(query, params).fetch_record_batch()
+            with pa.OSFile(output_file, "wb") as sink:
+                with pa.ipc.new_file(sink, reader.schema, options=options) as writer:
+                    for batch in reader:
+                        writer.write_batch(batch)
+                        rows += batch.num_rows
+        return rows
+
+    def _log_filters(
+        self,
+        path_pattern: Optional[str],
+        status_code: Optional[int],
+        cursor: Optional[str],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        query_params: Optional[Dict[str, str]] = None,
+        method: Optional[str] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        WHERE clause and parameters shared by the log reads and exports.
 
-        # Fetch all results
-        result = cursor.fetchall()
+        start and end may be datetimes or ISO 8601 strings (as sent by the
+        HTTP endpoints and the collector); aware ones are converted to UTC.
+        """
+        conditions, params = [], []
+        if path_pattern:
+            conditions.append("path_pattern = ?")
+            params.append(path_pattern)
+        if status_code:
+            conditions.append("status_code = ?")
+            params.append(int(status_code))
+        if method:
+            conditions.append("method = ?")
+            params.append(method.upper())
+        start, end = (
+            _naive_utc(_parse_timestamp(value)) if value is not None else None
+            for value in (start, end)
+        )
+        if start is not None:
+            conditions.append("timestamp >= ?::TIMESTAMP")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp < ?::TIMESTAMP")
+            params.append(end)
+        if self._logs_source == _ARCHIVE_VIEW:
+            # Day-prefix bounds hold for day and hour keys alike and let
+            # DuckDB skip archived partitions outside the range
+            if start is not None:
+                conditions.append("log_partition >= ?")
+                params.append(_naive_utc(start).strftime(PARTITION_FORMATS["day"]))
+            if end is not None:
+                next_day = _naive_utc(end) + timedelta(days=1)
+                conditions.append("log_partition < ?")
+                params.append(next_day.strftime(PARTITION_FORMATS["day"]))
+        for key, value in (query_params or {}).items():
+            # JSON pointer, so keys may contain any character
+            pointer = "/" + str(key).replace("~", "~0").replace("/", "~1")
+            conditions.append("json_extract_string(query_params, ?) = ?")
+            params.extend([pointer, str(value)])
+        if cursor:
+            created_at, log_id = self._decode_cursor(cursor)
+            conditions.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, log_id])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
 
-        logs = []
-        for row in result:
-            log_dict = dict(zip(columns, row))
-            log_dict = self._format_log_dict(log_dict)
-            logs.append(log_dict)
+    @staticmethod
+    def _encode_cursor(log: Dict[str, Any]) -> str:
+        """Opaque cursor pointing just past a log entry."""
+        created_at = log["created_at"]
+        if hasattr(created_at, "isoformat"):
+            created_at = created_at.isoformat()
+        payload = json.dumps([created_at, log["id"]]).encode("utf-8")
+        return base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
 
-        return logs
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            created_at, log_id = json.loads(base64.urlsafe_b64decode(padded))
+            return datetime.fromisoformat(created_at), int(log_id)
+        except (ValueError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
 
     def get_logs_count(self) -> int:
         """Get the total count of logs in the database."""
-        result = self.conn.execute("SELECT COUNT(*) FROM request_logs").fetchone()
+        with self._connection() as conn:
+            result = conn.execute(
+                f"SELECT COUNT(*) FROM {self._logs_source}"
+            ).fetchone()
         return result[0]
 
     def tables_exist(self) -> bool:
         """Check if database tables exist (read-only check)."""
         try:
             # Try to query the table - will fail if it doesn't exist
-            self.conn.execute("SELECT 1 FROM request_logs LIMIT 1")
+            with self._connection() as conn:
+                conn.execute("SELECT 1 FROM request_logs LIMIT 1")
             return True
         except Exception:
             return False
@@ -259,7 +1322,8 @@ class DevTrackDB:
     ) -> List[Dict[str, Any]]:
         """Get logs filtered by path pattern."""
         sql = (
-            "SELECT * FROM request_logs WHERE path_pattern = ? ORDER BY created_at DESC"
+            f"SELECT {_LOG_SELECT_SQL} FROM {self._logs_source} "
+            "WHERE path_pattern = ? ORDER BY created_at DESC"
         )
         if limit:
             # Validate and sanitize limit to prevent SQL injection
@@ -270,55 +1334,15 @@ class DevTrackDB:
 
         # path_pattern is parameterized with ? placeholder - safe from SQL injection
         # nosemgrep: python.lang.security.audit.sql-injection
-        cursor = self.conn.execute(sql, (path_pattern,))
-        result = cursor.fetchall()
-
-        # Get column names from description, with fallback for DuckDB quirks
-        try:
-            columns = (
-                [desc[0] for desc in cursor.description] if cursor.description else None
-            )
-        except Exception:
-            columns = None
-
-        # If we couldn't get columns from description, use known column names
-        if not columns or (len(columns) == 1 and columns[0] in ["1", "NUMBER"]):
-            columns = [
-                "id",
-                "path",
-                "path_pattern",
-                "method",
-                "status_code",
-                "timestamp",
-                "client_ip",
-                "duration_ms",
-                "user_agent",
-                "referer",
-                "query_params",
-                "path_params",
-                "request_body",
-                "response_size",
-                "user_id",
-                "role",
-                "trace_id",
-                "client_identifier",
-                "created_at",
-            ]
-
-        logs = []
-        for row in result:
-            log_dict = dict(zip(columns, row))
-            log_dict = self._format_log_dict(log_dict)
-            logs.append(log_dict)
-
-        return logs
+        return self._fetch_logs(sql, (path_pattern,))
 
     def get_logs_by_status_code(
         self, status_code: int, limit: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """Get logs filtered by status code."""
         sql = (
-            "SELECT * FROM request_logs WHERE status_code = ? ORDER BY created_at DESC"
+            f"SELECT {_LOG_SELECT_SQL} FROM {self._logs_source} "
+            "WHERE status_code = ? ORDER BY created_at DESC"
         )
         if limit:
             # Validate and sanitize limit to prevent SQL injection
@@ -329,74 +1353,52 @@ class DevTrackDB:
 
         # status_code is parameterized with ? placeholder - safe from SQL injection
         # nosemgrep: python.lang.security.audit.sql-injection
-        cursor = self.conn.execute(sql, (status_code,))
-        result = cursor.fetchall()
-
-        # Get column names from description, with fallback for DuckDB quirks
-        try:
-            columns = (
-                [desc[0] for desc in cursor.description] if cursor.description else None
-            )
-        except Exception:
-            columns = None
-
-        # If we couldn't get columns from description, use known column names
-        if not columns or (len(columns) == 1 and columns[0] in ["1", "NUMBER"]):
-            columns = [
-                "id",
-                "path",
-                "path_pattern",
-                "method",
-                "status_code",
-                "timestamp",
-                "client_ip",
-                "duration_ms",
-                "user_agent",
-                "referer",
-                "query_params",
-                "path_params",
-                "request_body",
-                "response_size",
-                "user_id",
-                "role",
-                "trace_id",
-                "client_identifier",
-                "created_at",
-            ]
-
-        logs = []
-        for row in result:
-            log_dict = dict(zip(columns, row))
-            log_dict = self._format_log_dict(log_dict)
-            logs.append(log_dict)
-
-        return logs
+        return self._fetch_logs(sql, (status_code,))
 
     def get_stats_summary(self) -> Dict[str, Any]:
         """Get summary statistics from the logs."""
-        stats_sql = """
+        stats_sql = f"""
         SELECT
-            COUNT(*) as total_requests,
+            coalesce(SUM(sample_weight), 0) as total_requests,
             COUNT(DISTINCT path_pattern) as unique_endpoints,
-            AVG(duration_ms) as avg_duration_ms,
+            {_WEIGHTED_AVG_DURATION_SQL} as avg_duration_ms,
             MIN(duration_ms) as min_duration_ms,
             MAX(duration_ms) as max_duration_ms,
-            COUNT(CASE WHEN status_code >= 200 AND status_code < 300
-                THEN 1 END) as success_count,
-            COUNT(CASE WHEN status_code >= 400 THEN 1 END) as error_count
+            coalesce(SUM(sample_weight) FILTER (
+                WHERE status_code >= 200 AND status_code < 300), 0) as success_count,
+            coalesce(SUM(sample_weight) FILTER (WHERE status_code >= 400), 0)
+                as error_count
         FROM request_logs
         """
-
-        cursor = self.conn.execute(stats_sql)
-        result = cursor.fetchone()
-
-        # Get column names from description, with fallback for DuckDB quirks
-        try:
-            columns = (
-                [desc[0] for desc in cursor.description] if cursor.description else None
-            )
-        except Exception:
-            columns = None
+        if self._rollups_available:
+            stats_sql = """
+            SELECT
+                coalesce(SUM(request_count), 0) as total_requests,
+                COUNT(DISTINCT NULLIF(path_pattern, '')) as unique_endpoints,
+                SUM(duration_sum) / NULLIF(SUM(duration_count), 0)
+                    as avg_duration_ms,
+                MIN(duration_min) as min_duration_ms,
+                MAX(duration_max) as max_duration_ms,
+                coalesce(SUM(request_count) FILTER (WHERE status_class = 2), 0)
+                    as success_count,
+                coalesce(SUM(request_count) FILTER (WHERE status_class >= 4), 0)
+                    as error_count
+            FROM request_rollups
+            """
+
+        with self._connection() as conn:
+            cursor = conn.execute(stats_sql)
+            result = cursor.fetchone()
+
+            # Get column names from description, with fallback for DuckDB quirks
+            try:
+                columns = (
+                    [desc[0] for desc in cursor.description]
+                    if cursor.description
+                    else None
+                )
+            except Exception:
+                columns = None
 
         # If we couldn't get columns from description or got invalid column names,
         # use the known column names from the SQL query
@@ -414,151 +1416,573 @@ class DevTrackDB:
         return dict(zip(columns, result))
 
     def delete_all_logs(self) -> int:
-        """Delete all logs from the database."""
-        # Get count before deletion
-        count_result = self.conn.execute("SELECT COUNT(*) FROM request_logs").fetchone()
-        count_before = count_result[0] if count_result else 0
-
-        # Delete all logs
-        self.conn.execute("DELETE FROM request_logs")
-
-        return count_before
+        """Delete all logs from the database, including archived partitions."""
+        with self._write_transaction() as conn:
+            result = conn.execute("DELETE FROM request_logs").fetchone()
+            conn.execute("DELETE FROM request_rollups")
+            conn.execute("DELETE FROM request_latency_rollups")
+            conn.execute("DELETE FROM request_counts")
+        deleted = result[0] if result else 0
+        if self.archive_dir:
+            deleted += self.drop_partitions(datetime.max)
+        return deleted
 
     def reset_sequence(self) -> None:
         """Reset the sequence to start from 1."""
-        try:
-            # Try to reset the sequence
-            self.conn.execute("ALTER SEQUENCE seq_log_id RESTART WITH 1")
-        except Exception:
-            # If sequence doesn't exist or can't be reset, try to recreate it
+        with self._connection() as conn:
             try:
-                self.conn.execute("DROP SEQUENCE IF EXISTS seq_log_id")
-                self.conn.execute("CREATE SEQUENCE seq_log_id START 1")
+                # Try to reset the sequence
+                conn.execute("ALTER SEQUENCE seq_log_id RESTART WITH 1")
             except Exception:
-                pass  # Ignore if sequence operations fail
+                # If sequence doesn't exist or can't be reset, try to recreate it
+                try:
+                    conn.execute("DROP SEQUENCE IF EXISTS seq_log_id")
+                    conn.execute("CREATE SEQUENCE seq_log_id START 1")
+                except Exception:
+                    pass  # Ignore if sequence operations fail
 
     def delete_logs_by_path(self, path_pattern: str) -> int:
         """Delete logs filtered by path pattern."""
-        # Get count before deletion
-        count_result = self.conn.execute(
-            "SELECT COUNT(*) FROM request_logs WHERE path_pattern = ?", (path_pattern,)
-        ).fetchone()
-        count_before = count_result[0] if count_result else 0
-
-        # Delete logs
-        self.conn.execute(
-            "DELETE FROM request_logs WHERE path_pattern = ?", (path_pattern,)
-        )
-
-        return count_before
+        return self._delete_logs("path_pattern = ?", (path_pattern,))
 
     def delete_logs_by_status_code(self, status_code: int) -> int:
         """Delete logs filtered by status code."""
-        # Get count before deletion
-        count_result = self.conn.execute(
-            "SELECT COUNT(*) FROM request_logs WHERE status_code = ?", (status_code,)
-        ).fetchone()
-        count_before = count_result[0] if count_result else 0
-
-        # Delete logs
-        self.conn.execute(
-            "DELETE FROM request_logs WHERE status_code = ?", (status_code,)
-        )
-
-        return count_before
+        return self._delete_logs("status_code = ?", (status_code,))
 
     def delete_logs_by_date_range(
         self, start_date: datetime, end_date: datetime
     ) -> int:
-        """Delete logs within a date range."""
-        # Get count before deletion
-        count_result = self.conn.execute(
-            "SELECT COUNT(*) FROM request_logs WHERE timestamp BETWEEN ? AND ?",
-            (start_date, end_date),
-        ).fetchone()
-        count_before = count_result[0] if count_result else 0
-
-        # Delete logs
-        self.conn.execute(
-            "DELETE FROM request_logs WHERE timestamp BETWEEN ? AND ?",
-            (start_date, end_date),
-        )
+        """
+        Delete logs within a date range.
 
-        return count_before
+        Archived partitions are only dropped when they lie entirely inside
+        the range.
+        """
+        deleted = self._delete_logs("timestamp BETWEEN ? AND ?", (start_date, end_date))
+        if self.archive_dir:
+            deleted += self.drop_partitions(
+                end_date, after=start_date, keep_rollups=False
+            )
+        return deleted
 
     def delete_logs_older_than(self, days: int) -> int:
-        """Delete logs older than specified number of days."""
+        """
+        Delete logs older than specified number of days.
+
+        Archived partitions that end before the cutoff are dropped whole.
+        """
         # Validate and sanitize days to prevent SQL injection
         days_int = self._validate_int(days, "days", min_value=0)
 
-        # Get count before deletion
         # days_int is validated as integer - safe from SQL injection
         # nosemgrep: python.lang.security.audit.sql-injection
-        count_result = self.conn.execute(
-            f"SELECT COUNT(*) FROM request_logs WHERE timestamp < "
-            f"(CURRENT_TIMESTAMP - INTERVAL '{days_int} days')"
-        ).fetchone()
-        count_before = count_result[0] if count_result else 0
-
-        # Delete logs
-        # days_int is validated as integer - safe from SQL injection
-        # nosemgrep: python.lang.security.audit.sql-injection
-        self.conn.execute(
-            f"DELETE FROM request_logs WHERE timestamp < "
-            f"(CURRENT_TIMESTAMP - INTERVAL '{days_int} days')"
+        deleted = self._delete_logs(
+            f"timestamp < (CURRENT_TIMESTAMP - INTERVAL '{days_int} days')"
         )
-
-        return count_before
+        if self.archive_dir:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=days_int)
+            deleted += self.drop_partitions(cutoff, keep_rollups=False)
+        return deleted
 
     def delete_logs_by_id(self, log_id: int) -> int:
         """Delete a specific log by ID."""
-        # Get count before deletion
-        count_result = self.conn.execute(
-            "SELECT COUNT(*) FROM request_logs WHERE id = ?", (log_id,)
-        ).fetchone()
-        count_before = count_result[0] if count_result else 0
-
-        # Delete log
-        self.conn.execute("DELETE FROM request_logs WHERE id = ?", (log_id,))
-
-        return count_before
+        return self._delete_logs("id = ?", (log_id,))
 
     def delete_logs_by_ids(self, log_ids: List[int]) -> int:
         """Delete multiple logs by their IDs."""
         if not log_ids:
             return 0
 
-        # Get count before deletion
         placeholders = ",".join(["?" for _ in log_ids])
-        count_result = self.conn.execute(
-            f"SELECT COUNT(*) FROM request_logs WHERE id IN ({placeholders})", log_ids
-        ).fetchone()
-        count_before = count_result[0] if count_result else 0
+        return self._delete_logs(f"id IN ({placeholders})", log_ids)
+
+    def _require_archive_dir(self) -> str:
+        if not self.archive_dir:
+            raise ValueError("Partitioned storage needs an archive_dir")
+        return self.archive_dir
+
+    def _archive_files_exist(self) -> bool:
+        pattern = os.path.join(self.archive_dir, "log_partition=*", "*.parquet")
+        return bool(glob.glob(pattern))
+
+    def _refresh_archive_view(self, conn) -> None:
+        """(Re)create the view over request_logs and the archived partitions."""
+        if not self._archive_files_exist():
+            # read_parquet fails on a glob that matches nothing
+            conn.execute(f"DROP VIEW IF EXISTS {_ARCHIVE_VIEW}")
+            self._logs_source = "request_logs"
+            return
+        pattern = os.path.join(self.archive_dir, "*", "*.parquet").replace("'", "''")
+        day_format = PARTITION_FORMATS["day"]
+        source = f"""read_parquet(
+                '{pattern}',
+                hive_partitioning = true,
+                hive_types = {{'log_partition': VARCHAR}},
+                union_by_name = true
+            )"""
+        # Partitions archived by older versions lack the newer columns
+        archived = {
+            row[0]
+            for row in conn.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()
+        }
+        columns = []
+        for name in _LOG_COLUMNS:
+            value = f'"{name}"' if name in archived else "NULL"
+            if name == "sample_weight":
+                # Logs archived before sampling stand for one request
+                value = f"COALESCE({value}, 1)"
+            columns.append(f'{value} AS "{name}"')
+        archived_columns = ", ".join(columns)
+        # The path is escaped above and the formats are constants
+        # nosemgrep: python.lang.security.audit.sql-injection
+        conn.execute(f"""
+            CREATE OR REPLACE VIEW {_ARCHIVE_VIEW} AS
+            SELECT {_LOG_SELECT_SQL},
+                strftime(timestamp, '{day_format}') AS log_partition
+            FROM request_logs
+            UNION ALL
+            SELECT {archived_columns}, log_partition
+            FROM {source}
+            """)
+        self._logs_source = _ARCHIVE_VIEW
+
+    def _partitions(self) -> List[Tuple[str, datetime, datetime, str]]:
+        """(key, start, end, directory) of every archived partition, oldest first."""
+        partitions = []
+        for path in glob.glob(os.path.join(self._require_archive_dir(), "*")):
+            name, _, key = os.path.basename(path).partition("=")
+            if name != "log_partition":
+                continue
+            for granularity, pattern in PARTITION_FORMATS.items():
+                try:
+                    start = datetime.strptime(key, pattern)
+                except ValueError:
+                    continue
+                end = start + _PARTITION_PERIODS[granularity]
+                partitions.append((key, start, end, path))
+                break
+        return sorted(partitions)
+
+    def list_partitions(self) -> List[Dict[str, Any]]:
+        """Archived partitions with their time range, row count and size on disk."""
+        partitions = self._partitions()
+        if not partitions:
+            return []
+        pattern = os.path.join(self.archive_dir, "*", "*.parquet")
+        with self._connection() as conn:
+            counts = dict(
+                conn.execute(
+                    "SELECT log_partition, COUNT(*) FROM read_parquet(?, "
+                    "hive_partitioning = true, "
+                    "hive_types = {'log_partition': VARCHAR}) GROUP BY ALL",
+                    [pattern],
+                ).fetchall()
+            )
+        result = []
+        for key, start, end, path in partitions:
+            files = glob.glob(os.path.join(path, "*.parquet"))
+            result.append(
+                {
+                    "partition": key,
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "rows": counts.get(key, 0),
+                    "files": len(files),
+                    "bytes": sum(os.path.getsize(file) for file in files),
+                }
+            )
+        return result
+
+    def archive_logs(self, before: datetime) -> int:
+        """
+        Move logs older than `before` into Parquet partitions under archive_dir.
+
+        `before` is rounded down to a partition boundary so every partition is
+        archived whole. Rollups are left as they are, so the metrics still
+        cover archived logs. Returns the number of logs archived.
+        """
+        target = self._require_archive_dir()
+        cutoff = _naive_utc(before).replace(minute=0, second=0, microsecond=0)
+        if self.partition_by == "day":
+            cutoff = cutoff.replace(hour=0)
+        partition_format = PARTITION_FORMATS[self.partition_by]
+
+        with self._write_transaction() as conn:
+            # The path is escaped and the format is a constant
+            # nosemgrep: python.lang.security.audit.sql-injection
+            count, files = conn.execute(
+                f"""
+                COPY (
+                    SELECT {_LOG_SELECT_SQL},
+                        strftime(timestamp, '{partition_format}') AS log_partition
+                    FROM request_logs
+                    WHERE timestamp < ?
+                ) TO '{target.replace("'", "''")}' (
+                    FORMAT parquet,
+                    COMPRESSION zstd,
+                    PARTITION_BY (log_partition),
+                    APPEND,
+                    FILENAME_PATTERN 'logs_{{uuid}}',
+                    RETURN_FILES
+                )
+                """,
+                [cutoff],
+            ).fetchone()
+            if not count:
+                return 0
+            try:
+                conn.execute("DELETE FROM request_logs WHERE timestamp < ?", [cutoff])
+                self._refresh_archive_view(conn)
+            except BaseException:
+                # Don't leave copies of logs that are staying in the table
+                for file in files or ():
+                    if os.path.exists(file):
+                        os.unlink(file)
+                raise
+        return count
+
+    def drop_partitions(
+        self,
+        before: datetime,
+        after: Optional[datetime] = None,
+        keep_rollups: bool = True,
+    ) -> int:
+        """
+        Delete archived partitions that end at or before `before`.
+
+        Whole directories are removed, so no rows are rewritten. With `after`,
+        only partitions starting at or after it are dropped. Rollups are kept
+        unless keep_rollups is False. Returns the number of logs dropped.
+        """
+        before = _naive_utc(before)
+        after = _naive_utc(after) if after is not None else None
+        dropped = [
+            (start, end, path)
+            for _, start, end, path in self._partitions()
+            if end <= before and (after is None or start >= after)
+        ]
+        if not dropped:
+            return 0
+
+        with self._write_transaction() as conn:
+            patterns = [os.path.join(path, "*.parquet") for _, _, path in dropped]
+            count = conn.execute(
+                "SELECT COUNT(*) FROM read_parquet(?)", [patterns]
+            ).fetchone()[0]
+            for _, _, path in dropped:
+                shutil.rmtree(path)
+            self._refresh_archive_view(conn)
+            if not keep_rollups:
+                self._update_rollups(conn, [])
+                for start, end, _ in dropped:
+                    for table in (
+                        "request_rollups",
+                        "request_latency_rollups",
+                        "request_counts",
+                    ):
+                        conn.execute(
+                            f"DELETE FROM {table} WHERE minute >= ? AND minute < ?",
+                            [start, end],
+                        )
+        return count
+
+    def prune_logs(
+        self, before: Optional[datetime] = None, keep_rows: Optional[int] = None
+    ) -> int:
+        """
+        Delete raw logs for retention while keeping their rollups.
+
+        Every insert already adds the log to the rollups, so metrics keep
+        covering pruned logs; only the raw rows go. Removes logs older than
+        `before` and/or all but the newest `keep_rows` logs in request_logs,
+        always at whole-minute boundaries so no rollup minute is left half
+        backed by raw rows. Archived partitions that end before `before` are
+        dropped too. Returns the number of logs deleted.
+        """
+        cutoffs = []
+        if before is not None:
+            cutoffs.append(_naive_utc(before).replace(second=0, microsecond=0))
+        keep_int = None
+        if keep_rows is not None:
+            keep_int = self._validate_int(keep_rows, "keep_rows", min_value=0)
+
+        with self._write_transaction() as conn:
+            if keep_int is not None:
+                row = conn.execute(
+                    "SELECT date_trunc('minute', timestamp) FROM request_logs "
+                    "WHERE timestamp IS NOT NULL "
+                    "ORDER BY timestamp DESC LIMIT 1 OFFSET ?",
+                    [keep_int],
+                ).fetchone()
+                if row:
+                    cutoffs.append(row[0])
+            result = None
+            if cutoffs:
+                result = conn.execute(
+                    "DELETE FROM request_logs WHERE timestamp < ?", [max(cutoffs)]
+                ).fetchone()
+        deleted = result[0] if result else 0
+        if before is not None and self.archive_dir:
+            deleted += self.drop_partitions(before)
+        return deleted
+
+    def prune_rollups(self, before: datetime) -> int:
+        """Delete rollup minutes older than `before`; returns rows deleted."""
+        with self._write_transaction() as conn:
+            self._update_rollups(conn, [])
+            result = conn.execute(
+                "DELETE FROM request_rollups WHERE minute < ?", [_naive_utc(before)]
+            ).fetchone()
+            conn.execute(
+                "DELETE FROM request_latency_rollups WHERE minute < ?",
+                [_naive_utc(before)],
+            )
+            conn.execute(
+                "DELETE FROM request_counts WHERE minute < ?", [_naive_utc(before)]
+            )
+        return result[0] if result else 0
+
+    def checkpoint(self) -> None:
+        """Flush the WAL into the database file so freed blocks can be reused."""
+        with self._pool.write_lock, self._connection() as conn:
+            conn.execute("CHECKPOINT")
+
+    def get_storage_info(self) -> Dict[str, Any]:
+        """Database file usage in bytes, plus the number of raw logs stored."""
+        with self._connection() as conn:
+            block_size, total, used, free = conn.execute(
+                "SELECT block_size, total_blocks, used_blocks, free_blocks "
+                "FROM pragma_database_size() "
+                "WHERE database_name = current_database()"
+            ).fetchone()
+            rows = conn.execute("SELECT COUNT(*) FROM request_logs").fetchone()[0]
+        wal_path = f"{self.db_path}.wal"
+        return {
+            "file_bytes": total * block_size,
+            "used_bytes": used * block_size,
+            "free_bytes": free * block_size,
+            "wal_bytes": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+            "rows": rows,
+        }
 
-        # Delete logs
-        self.conn.execute(
-            f"DELETE FROM request_logs WHERE id IN ({placeholders})", log_ids
+    def compact(self, timeout: float = 30.0) -> bool:
+        """
+        Rewrite the database file without its free blocks.
+
+        DuckDB reuses blocks freed by deletes but never shrinks the file, so
+        this copies the database into a fresh file and swaps it in. The copy
+        is taken from a snapshot while writers keep going; they only wait
+        for the catch-up (logs written or deleted meanwhile, and the small
+        rollup tables) and the swap. Returns False, leaving the file as it
+        was, if checked-out connections aren't returned within timeout;
+        compact_blocked_by then names their holders. The calling thread's
+        own conn lease is released first.
+        """
+        if self.read_only:
+            raise ValueError("compact needs a database opened with read_only=False")
+        self.compact_blocked_by = []
+        # A lease from this thread would hold up the swap below
+        self._release_lease()
+        target = f"{self.db_path}.compact"
+        for path in (target, f"{target}.wal"):
+            if os.path.exists(path):
+                os.unlink(path)
+
+        with self._connection() as conn:
+            name = conn.execute("SELECT current_database()").fetchone()[0]
+            # The path is escaped and the catalog name comes from DuckDB
+            # nosemgrep: python.lang.security.audit.sql-injection
+            escaped = target.replace("'", "''")
+            conn.execute(f"ATTACH '{escaped}' AS devtrack_compact")
+            try:
+                with self._pool.write_lock:
+                    conn.execute("CHECKPOINT")
+                    # Start the snapshot between writes, so every log with
+                    # a higher id than it holds was written after it
+                    conn.execute("BEGIN TRANSACTION")
+                    copied = conn.execute(
+                        "SELECT coalesce(max(id), 0), count(*) "
+                        f'FROM "{name}".request_logs'
+                    ).fetchone()
+                try:
+                    conn.execute(f'COPY FROM DATABASE "{name}" TO devtrack_compact')
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except BaseException:
+                conn.execute("DETACH devtrack_compact")
+                for path in (target, f"{target}.wal"):
+                    if os.path.exists(path):
+                        os.unlink(path)
+                raise
+
+        with self._pool.write_lock:
+            with self._connection() as conn:
+                try:
+                    self._compact_catch_up(conn, name, *copied)
+                finally:
+                    conn.execute("DETACH devtrack_compact")
+            try:
+                with self._pool.exclusive(timeout):
+                    # Every connection is closed, so the WAL was checkpointed
+                    if os.path.exists(f"{self.db_path}.wal"):
+                        os.unlink(f"{self.db_path}.wal")
+                    os.replace(target, self.db_path)
+            except TimeoutError:
+                self.compact_blocked_by = self._pool.holders()
+                os.unlink(target)
+                return False
+        return True
+
+    @staticmethod
+    def _compact_catch_up(conn, name: str, copied_max_id: int, copied: int) -> None:
+        """Apply writes made since compact()'s snapshot to the copy."""
+        source = f'"{name}"'
+        conn.execute("BEGIN TRANSACTION")
+        try:
+            # Logs are only ever inserted or deleted
+            conn.execute(
+                "INSERT INTO devtrack_compact.request_logs "
+                f"SELECT * FROM {source}.request_logs WHERE id > ?",
+                [copied_max_id],
+            )
+            remaining, new_max_id = conn.execute(
+                "SELECT count(*) FILTER (WHERE id <= ?), coalesce(max(id), 0) "
+                f"FROM {source}.request_logs",
+                [copied_max_id],
+            ).fetchone()
+            if remaining != copied:
+                conn.execute(
+                    "DELETE FROM devtrack_compact.request_logs WHERE id <= ? "
+                    f"AND id NOT IN (SELECT id FROM {source}.request_logs)",
+                    [copied_max_id],
+                )
+            if new_max_id > copied_max_id:
+                # The copied sequence stopped at the snapshot
+                conn.execute(
+                    "SELECT nextval('devtrack_compact.seq_log_id') FROM range(?)",
+                    [new_max_id - copied_max_id],
+                ).fetchall()
+            # Rollups are upserted in place, but small enough to copy again
+            tables = conn.execute(
+                "SELECT table_name FROM duckdb_tables() "
+                "WHERE database_name = ? AND table_name != 'request_logs'",
+                [name],
+            ).fetchall()
+            for (table,) in tables:
+                conn.execute(f'DELETE FROM devtrack_compact."{table}"')
+                conn.execute(
+                    f'INSERT INTO devtrack_compact."{table}" '
+                    f'SELECT * FROM {source}."{table}"'
+                )
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def add_request_counts(self, counts: List[Dict[str, Any]]) -> None:
+        """
+        Add exact per-minute request counts (see sampling.RequestCounter).
+
+        Each entry has minute, path_pattern, method, status_class and
+        request_count; counts for a key that already exists are added up.
+        """
+        if not counts:
+            return
+        payload = dumps(
+            [
+                {
+                    "minute": (
+                        entry["minute"].isoformat()
+                        if hasattr(entry["minute"], "isoformat")
+                        else entry["minute"]
+                    ),
+                    "path_pattern": entry.get("path_pattern") or "",
+                    "method": entry.get("method") or "",
+                    "status_class": entry.get("status_class") or 0,
+                    "request_count": entry["request_count"],
+                }
+                for entry in counts
+            ]
         )
+        with self._write_transaction() as conn:
+            conn.execute(_REQUEST_COUNTS_UPSERT_SQL, [payload])
+
+    def get_request_counts(
+        self, hours: int = 24, path_pattern: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get exact request counts per path_pattern, method and status class.
+
+        Unlike the log-based metrics these count every request, including
+        the ones sampling dropped.
+        """
+        hours_int = self._validate_int(hours, "hours", min_value=0)
+        where = f"minute >= {self._rollup_window_sql(hours_int)}"
+        params: List[Any] = []
+        if path_pattern is not None:
+            where += " AND path_pattern = ?"
+            params.append(path_pattern)
 
-        return count_before
+        # hours_int is validated and the filter is parameterized
+        # nosemgrep: python.lang.security.audit.sql-injection
+        sql = f"""
+        SELECT
+            NULLIF(path_pattern, '') as path_pattern,
+            NULLIF(method, '') as method,
+            status_class,
+            SUM(request_count) as request_count
+        FROM request_counts
+        WHERE {where}
+        GROUP BY ALL
+        ORDER BY request_count DESC, path_pattern, method, status_class
+        """
+        with self._connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return [
+            {
+                "path_pattern": row[0],
+                "method": row[1],
+                "status_class": row[2],
+                "request_count": row[3],
+            }
+            for row in rows
+        ]
 
     def get_traffic_over_time(
-        self, hours: int = 24, interval_minutes: int = 5
+        self, hours: int = 24, interval_minutes: Optional[int] = None
     ) -> List[Dict[str, Any]]:
-        """Get traffic counts grouped by time intervals."""
+        """
+        Get traffic counts grouped by time intervals.
+
+        interval_minutes defaults to an automatic width (see resolve_interval).
+        """
         # Validate and sanitize hours to prevent SQL injection
         hours_int = self._validate_int(hours, "hours", min_value=0)
+        interval = self.resolve_interval(hours_int, interval_minutes)
 
         sql = f"""
         SELECT
-            date_trunc('minute', timestamp) as time_bucket,
-            COUNT(*) as request_count
+            {self._time_bucket_sql("timestamp", interval)} as time_bucket,
+            SUM(sample_weight) as request_count
         FROM request_logs
         WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
-        GROUP BY date_trunc('minute', timestamp)
+        GROUP BY time_bucket
         ORDER BY time_bucket ASC
         """
-        result = self.conn.execute(sql).fetchall()
+        if self._use_rollups(hours_int):
+            sql = f"""
+            SELECT
+                {self._time_bucket_sql("minute", interval)} as time_bucket,
+                SUM(request_count) as request_count
+            FROM request_rollups
+            WHERE minute >= {self._rollup_window_sql(hours_int)}
+            GROUP BY time_bucket
+            ORDER BY time_bucket ASC
+            """
+        with self._connection() as conn:
+            result = conn.execute(sql).fetchall()
         return [
             {
                 "time_bucket": (
@@ -570,53 +1994,88 @@ class DevTrackDB:
         ]
 
     def get_error_trends(
-        self, hours: int = 24, interval_minutes: int = 5
+        self, hours: int = 24, interval_minutes: Optional[int] = None
     ) -> Dict[str, Any]:
         """Get error trends including failure rates over time and top failing routes."""
         # Validate and sanitize hours to prevent SQL injection
         hours_int = self._validate_int(hours, "hours", min_value=0)
+        interval = self.resolve_interval(hours_int, interval_minutes)
 
         # Error rates over time
         sql = f"""
         SELECT
-            date_trunc('minute', timestamp) as time_bucket,
-            COUNT(*) as total_requests,
-            COUNT(CASE WHEN status_code >= 400 THEN 1 END) as error_count
+            {self._time_bucket_sql("timestamp", interval)} as time_bucket,
+            SUM(sample_weight) as total_requests,
+            coalesce(SUM(sample_weight) FILTER (WHERE status_code >= 400), 0)
+                as error_count
         FROM request_logs
         WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
-        GROUP BY date_trunc('minute', timestamp)
+        GROUP BY time_bucket
         ORDER BY time_bucket ASC
         """
-        result = self.conn.execute(sql).fetchall()
-        error_trends = [
-            {
-                "time_bucket": (
-                    row[0].isoformat() if hasattr(row[0], "isoformat") else str(row[0])
-                ),
-                "total_requests": row[1],
-                "error_count": row[2],
-                "error_rate": (row[2] / row[1] * 100) if row[1] > 0 else 0,
-            }
-            for row in result
-        ]
-
-        # Top failing routes
-        total_errors = self.conn.execute(
-            "SELECT COUNT(*) FROM request_logs WHERE status_code >= 400"
-        ).fetchone()[0]
-
+        total_errors_sql = """
+        SELECT coalesce(SUM(sample_weight), 0)
+        FROM request_logs
+        WHERE status_code >= 400
+        """
         top_failing_sql = """
         SELECT
             path_pattern,
             method,
-            COUNT(*) as error_count
+            SUM(sample_weight) as error_count
         FROM request_logs
         WHERE status_code >= 400
         GROUP BY path_pattern, method
         ORDER BY error_count DESC
         LIMIT 10
         """
-        top_failing_result = self.conn.execute(top_failing_sql).fetchall()
+        if self._use_rollups(hours_int):
+            sql = f"""
+            SELECT
+                {self._time_bucket_sql("minute", interval)} as time_bucket,
+                SUM(request_count) as total_requests,
+                coalesce(SUM(request_count) FILTER (WHERE status_class >= 4), 0)
+                    as error_count
+            FROM request_rollups
+            WHERE minute >= {self._rollup_window_sql(hours_int)}
+            GROUP BY time_bucket
+            ORDER BY time_bucket ASC
+            """
+            total_errors_sql = """
+            SELECT coalesce(SUM(request_count), 0)
+            FROM request_rollups
+            WHERE status_class >= 4
+            """
+            top_failing_sql = """
+            SELECT
+                NULLIF(path_pattern, '') as path_pattern,
+                NULLIF(method, '') as method,
+                SUM(request_count) as error_count
+            FROM request_rollups
+            WHERE status_class >= 4
+            GROUP BY path_pattern, method
+            ORDER BY error_count DESC
+            LIMIT 10
+            """
+        with self._connection() as conn:
+            result = conn.execute(sql).fetchall()
+            error_trends = [
+                {
+                    "time_bucket": (
+                        row[0].isoformat()
+                        if hasattr(row[0], "isoformat")
+                        else str(row[0])
+                    ),
+                    "total_requests": row[1],
+                    "error_count": row[2],
+                    "error_rate": (row[2] / row[1] * 100) if row[1] > 0 else 0,
+                }
+                for row in result
+            ]
+
+            # Top failing routes
+            total_errors = conn.execute(total_errors_sql).fetchone()[0]
+            top_failing_result = conn.execute(top_failing_sql).fetchall()
         top_failing_routes = [
             {
                 "route": f"{row[1]} {row[0]}" if row[0] else "-",
@@ -634,124 +2093,236 @@ class DevTrackDB:
         }
 
     def get_performance_metrics(
-        self, hours: int = 24, interval_minutes: int = 5
+        self,
+        hours: int = 24,
+        interval_minutes: Optional[int] = None,
+        exact: bool = False,
     ) -> Dict[str, Any]:
-        """Get performance metrics including p50, p95, p99 latency over time."""
-        import statistics
+        """
+        Get performance metrics including p50, p95, p99 latency over time.
 
+        Percentiles are computed inside DuckDB. With exact=False they come
+        from the latency rollups (long windows) or approx_quantile; with
+        exact=True every duration in the window is read with quantile_cont.
+        """
         # Validate and sanitize hours to prevent SQL injection
         hours_int = self._validate_int(hours, "hours", min_value=0)
+        interval = self.resolve_interval(hours_int, interval_minutes)
 
-        # Get all duration_ms values grouped by time bucket
+        if not exact and self._use_rollups(hours_int):
+            return self._performance_metrics_from_rollups(hours_int, interval)
+
+        quantile = "quantile_cont" if exact else "approx_quantile"
+        time_bucket = self._time_bucket_sql("timestamp", interval)
+        # One pass: ROLLUP adds the window-wide row (time_bucket NULL)
         sql = f"""
         SELECT
-            date_trunc('minute', timestamp) as time_bucket,
-            duration_ms
+            {time_bucket} as time_bucket,
+            {quantile}(duration_ms, 0.50) as p50,
+            {quantile}(duration_ms, 0.95) as p95,
+            {quantile}(duration_ms, 0.99) as p99,
+            {_WEIGHTED_AVG_DURATION_SQL} as avg
         FROM request_logs
         WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
             AND duration_ms IS NOT NULL
-        ORDER BY time_bucket ASC, duration_ms ASC
+        GROUP BY ROLLUP ({time_bucket})
+        ORDER BY time_bucket ASC NULLS LAST
         """
-        result = self.conn.execute(sql).fetchall()
+        with self._connection() as conn:
+            result = conn.execute(sql).fetchall()
 
-        # Group by time bucket and calculate percentiles
-        from collections import defaultdict
-
-        time_buckets = defaultdict(list)
-        for row in result:
-            time_bucket = (
-                row[0].isoformat() if hasattr(row[0], "isoformat") else str(row[0])
-            )
-            duration = row[1]
-            if duration is not None:
-                time_buckets[time_bucket].append(float(duration))
+        def rounded(value):
+            return round(value, 2) if value is not None else None
 
-        # Calculate percentiles for each time bucket
         performance_metrics = []
-        for time_bucket, durations in sorted(time_buckets.items()):
-            if durations:
-                sorted_durations = sorted(durations)
-                n = len(sorted_durations)
-                p50_idx = int(n * 0.50)
-                p95_idx = int(n * 0.95)
-                p99_idx = int(n * 0.99)
-
+        overall_metrics = {"p50": None, "p95": None, "p99": None, "avg": None}
+        for row in result:
+            metrics = {
+                "p50": rounded(row[1]),
+                "p95": rounded(row[2]),
+                "p99": rounded(row[3]),
+                "avg": rounded(row[4]),
+            }
+            if row[0] is None:
+                overall_metrics = metrics
+            else:
                 performance_metrics.append(
-                    {
-                        "time_bucket": time_bucket,
-                        "p50": round(
-                            (
-                                sorted_durations[p50_idx]
-                                if p50_idx < n
-                                else sorted_durations[-1]
-                            ),
-                            2,
-                        ),
-                        "p95": round(
-                            (
-                                sorted_durations[p95_idx]
-                                if p95_idx < n
-                                else sorted_durations[-1]
-                            ),
-                            2,
-                        ),
-                        "p99": round(
-                            (
-                                sorted_durations[p99_idx]
-                                if p99_idx < n
-                                else sorted_durations[-1]
-                            ),
-                            2,
-                        ),
-                        "avg": round(statistics.mean(durations), 2),
-                    }
+                    {"time_bucket": row[0].isoformat(), **metrics}
                 )
 
-        # Overall percentiles
-        # hours_int already validated above
-        overall_sql = f"""
-        SELECT duration_ms
-        FROM request_logs
-        WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
-            AND duration_ms IS NOT NULL
-        ORDER BY duration_ms ASC
+        return {
+            "latency_over_time": performance_metrics,
+            "overall_stats": overall_metrics,
+        }
+
+    def _performance_metrics_from_rollups(
+        self, hours: int, interval: int
+    ) -> Dict[str, Any]:
+        """Read latency percentiles from the per-minute latency sketches."""
+        window = self._rollup_window_sql(hours)
+        time_bucket = self._time_bucket_sql("minute", interval)
+
+        # Same rank rule as DDSketch.quantile: first bucket past q * (n - 1)
+        percentiles = ", ".join(
+            f"MIN({_SKETCH_VALUE_SQL}) FILTER (WHERE cumulative > {q} * (total - 1))"
+            for q in (0.50, 0.95, 0.99)
+        )
+
+        def percentiles_sql(partition: str) -> str:
+            return f"""
+            WITH buckets AS (
+                SELECT {time_bucket} as period, bucket, SUM(bucket_count) as n
+                FROM request_latency_rollups
+                WHERE minute >= {window}
+                GROUP BY period, bucket
+            ),
+            ranked AS (
+                SELECT
+                    period,
+                    bucket,
+                    SUM(n) OVER (PARTITION BY {partition} ORDER BY bucket)
+                        as cumulative,
+                    SUM(n) OVER (PARTITION BY {partition}) as total
+                FROM buckets
+            )
+            SELECT
+                {partition} as time_bucket,
+                {percentiles}
+            FROM ranked
+            GROUP BY {partition}
+            ORDER BY time_bucket ASC
+            """
+
+        avg_sql = f"""
+        SELECT
+            {time_bucket} as period,
+            SUM(duration_sum) / NULLIF(SUM(duration_count), 0)
+        FROM request_rollups
+        WHERE minute >= {window}
+        GROUP BY ROLLUP (period)
         """
-        overall_result = self.conn.execute(overall_sql).fetchall()
-        overall_durations = [
-            float(row[0]) for row in overall_result if row[0] is not None
-        ]
+        with self._connection() as conn:
+            per_period = conn.execute(percentiles_sql("period")).fetchall()
+            overall = conn.execute(percentiles_sql("NULL")).fetchone()
+            # ROLLUP adds the window-wide average under the NULL period
+            averages = dict(conn.execute(avg_sql).fetchall())
 
-        overall_metrics = {}
-        if overall_durations:
-            sorted_overall = sorted(overall_durations)
-            n = len(sorted_overall)
-            p50_idx = int(n * 0.50)
-            p95_idx = int(n * 0.95)
-            p99_idx = int(n * 0.99)
-
-            overall_metrics = {
-                "p50": round(
-                    sorted_overall[p50_idx] if p50_idx < n else sorted_overall[-1], 2
-                ),
-                "p95": round(
-                    sorted_overall[p95_idx] if p95_idx < n else sorted_overall[-1], 2
-                ),
-                "p99": round(
-                    sorted_overall[p99_idx] if p99_idx < n else sorted_overall[-1], 2
-                ),
-                "avg": round(statistics.mean(overall_durations), 2),
+        def rounded(value):
+            return round(value, 2) if value is not None else None
+
+        latency_over_time = [
+            {
+                "time_bucket": row[0].isoformat(),
+                "p50": rounded(row[1]),
+                "p95": rounded(row[2]),
+                "p99": rounded(row[3]),
+                "avg": rounded(averages.get(row[0])),
             }
-        else:
-            overall_metrics = {
-                "p50": None,
-                "p95": None,
-                "p99": None,
-                "avg": None,
+            for row in per_period
+        ]
+
+        overall_stats = {"p50": None, "p95": None, "p99": None, "avg": None}
+        if overall:
+            overall_stats = {
+                "p50": rounded(overall[1]),
+                "p95": rounded(overall[2]),
+                "p99": rounded(overall[3]),
+                "avg": rounded(averages.get(None)),
             }
+        return {
+            "latency_over_time": latency_over_time,
+            "overall_stats": overall_stats,
+        }
 
+    def _latency_sketch_filters(
+        self,
+        path_pattern: Optional[str],
+        start: Optional[datetime],
+        end: Optional[datetime],
+    ) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause shared by the latency sketch queries."""
+        conditions, params = ["TRUE"], []
+        if path_pattern is not None:
+            conditions.append("path_pattern = ?")
+            params.append(path_pattern)
+        if start is not None:
+            conditions.append("minute >= date_trunc('minute', ?::TIMESTAMP)")
+            params.append(start)
+        if end is not None:
+            conditions.append("minute <= ?::TIMESTAMP")
+            params.append(end)
+        return " AND ".join(conditions), params
+
+    def get_latency_sketch(
+        self,
+        path_pattern: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> DDSketch:
+        """
+        Merge the per-minute latency sketches for a route and/or time range.
+
+        Windows are aligned to whole minutes. Quantiles read from the result
+        are within 1% (sketch.RELATIVE_ACCURACY) of the exact duration at
+        that rank; durations below 1 microsecond are reported as 1 microsecond.
+        """
+        where, params = self._latency_sketch_filters(path_pattern, start, end)
+        sql = f"""
+        SELECT bucket, SUM(bucket_count)
+        FROM request_latency_rollups
+        WHERE {where}
+        GROUP BY bucket
+        """
+        with self._connection() as conn:
+            result = conn.execute(sql, params).fetchall()
+        return DDSketch.from_buckets(result)
+
+    def get_latency_sketches(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, DDSketch]:
+        """Get one merged latency sketch per path pattern."""
+        where, params = self._latency_sketch_filters(None, start, end)
+        sql = f"""
+        SELECT path_pattern, bucket, SUM(bucket_count)
+        FROM request_latency_rollups
+        WHERE {where}
+        GROUP BY path_pattern, bucket
+        """
+        with self._connection() as conn:
+            result = conn.execute(sql, params).fetchall()
+
+        buckets: Dict[str, List[Tuple[int, int]]] = {}
+        for path_pattern, bucket, count in result:
+            buckets.setdefault(path_pattern, []).append((bucket, count))
         return {
-            "latency_over_time": performance_metrics,
-            "overall_stats": overall_metrics,
+            path_pattern: DDSketch.from_buckets(pairs)
+            for path_pattern, pairs in buckets.items()
+        }
+
+    def get_latency_percentiles(
+        self,
+        path_pattern: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        quantiles: Tuple[float, ...] = (0.50, 0.95, 0.99),
+    ) -> Dict[str, Any]:
+        """
+        Get latency percentiles from the merged sketches.
+
+        Returns the request count, one ``p<NN>`` key per quantile and the
+        relative error bound of the estimates.
+        """
+        sketch = self.get_latency_sketch(path_pattern, start, end)
+        percentiles = {
+            f"p{q * 100:g}": (round(sketch.quantile(q), 2) if sketch.count else None)
+            for q in quantiles
+        }
+        return {
+            "count": sketch.count,
+            **percentiles,
+            "relative_error": sketch.relative_accuracy,
         }
 
     def get_consumer_segments(self, hours: int = 24) -> Dict[str, Any]:
@@ -763,10 +2334,11 @@ class DevTrackDB:
         sql = f"""
         SELECT
             client_identifier,
-            COUNT(*) as request_count,
+            SUM(sample_weight) as request_count,
             COUNT(DISTINCT path_pattern) as unique_endpoints,
-            AVG(duration_ms) as avg_latency,
-            COUNT(CASE WHEN status_code >= 400 THEN 1 END) as error_count,
+            {_WEIGHTED_AVG_DURATION_SQL} as avg_latency,
+            coalesce(SUM(sample_weight) FILTER (WHERE status_code >= 400), 0)
+                as error_count,
             MIN(timestamp) as first_seen,
             MAX(timestamp) as last_seen,
             (SELECT client_ip FROM request_logs r2
@@ -780,7 +2352,70 @@ class DevTrackDB:
         ORDER BY request_count DESC
         LIMIT 50
         """
-        result = self.conn.execute(sql).fetchall()
+        # Get total unique clients
+        # hours_int already validated above
+        total_clients_sql = f"""
+        SELECT COUNT(DISTINCT client_identifier)
+        FROM request_logs
+        WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
+            AND client_identifier IS NOT NULL
+        """
+
+        # Get client identification source breakdown
+        source_sql = f"""
+        SELECT
+            CASE
+                WHEN client_identifier IS NULL THEN 'unknown'
+                ELSE 'identified'
+            END as source_type,
+            COUNT(DISTINCT client_identifier) as client_count,
+            SUM(sample_weight) as request_count
+        FROM request_logs
+        WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
+        GROUP BY source_type
+        """
+
+        if self._use_rollups(hours_int):
+            window = self._rollup_window_sql(hours_int)
+            sql = f"""
+            SELECT
+                client_identifier,
+                SUM(request_count) as request_count,
+                COUNT(DISTINCT NULLIF(path_pattern, '')) as unique_endpoints,
+                SUM(duration_sum) / NULLIF(SUM(duration_count), 0) as avg_latency,
+                coalesce(SUM(request_count) FILTER (WHERE status_class >= 4), 0)
+                    as error_count,
+                MIN(first_seen) as first_seen,
+                MAX(last_seen) as last_seen,
+                arg_max(last_client_ip, last_seen) as latest_ip
+            FROM request_rollups
+            WHERE minute >= {window} AND client_identifier <> ''
+            GROUP BY client_identifier
+            ORDER BY request_count DESC
+            LIMIT 50
+            """
+            total_clients_sql = f"""
+            SELECT COUNT(DISTINCT client_identifier)
+            FROM request_rollups
+            WHERE minute >= {window} AND client_identifier <> ''
+            """
+            source_sql = f"""
+            SELECT
+                CASE
+                    WHEN client_identifier = '' THEN 'unknown'
+                    ELSE 'identified'
+                END as source_type,
+                COUNT(DISTINCT NULLIF(client_identifier, '')) as client_count,
+                SUM(request_count) as request_count
+            FROM request_rollups
+            WHERE minute >= {window}
+            GROUP BY source_type
+            """
+
+        with self._connection() as conn:
+            result = conn.execute(sql).fetchall()
+            total_clients = conn.execute(total_clients_sql).fetchone()[0] or 0
+            source_result = conn.execute(source_sql).fetchall()
 
         segments = []
         for row in result:
@@ -810,30 +2445,6 @@ class DevTrackDB:
                 }
             )
 
-        # Get total unique clients
-        # hours_int already validated above
-        total_clients_sql = f"""
-        SELECT COUNT(DISTINCT client_identifier)
-        FROM request_logs
-        WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
-            AND client_identifier IS NOT NULL
-        """
-        total_clients = self.conn.execute(total_clients_sql).fetchone()[0] or 0
-
-        # Get client identification source breakdown
-        source_sql = f"""
-        SELECT
-            CASE
-                WHEN client_identifier IS NULL THEN 'unknown'
-                ELSE 'identified'
-            END as source_type,
-            COUNT(DISTINCT client_identifier) as client_count,
-            COUNT(*) as request_count
-        FROM request_logs
-        WHERE timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
-        GROUP BY source_type
-        """
-        source_result = self.conn.execute(source_sql).fetchall()
         source_breakdown = {
             row[0]: {
                 "client_count": row[1],
@@ -855,19 +2466,21 @@ class DevTrackDB:
 
         sql = f"""
         SELECT
-            COUNT(*) as request_count,
+            coalesce(SUM(sample_weight), 0) as request_count,
             COUNT(DISTINCT path_pattern) as unique_endpoints,
-            AVG(duration_ms) as avg_latency,
+            {_WEIGHTED_AVG_DURATION_SQL} as avg_latency,
             MIN(duration_ms) as min_latency,
             MAX(duration_ms) as max_latency,
-            COUNT(CASE WHEN status_code >= 400 THEN 1 END) as error_count,
-            COUNT(CASE WHEN status_code >= 200 AND status_code < 300
-                THEN 1 END) as success_count
+            coalesce(SUM(sample_weight) FILTER (WHERE status_code >= 400), 0)
+                as error_count,
+            coalesce(SUM(sample_weight) FILTER (
+                WHERE status_code >= 200 AND status_code < 300), 0) as success_count
         FROM request_logs
         WHERE client_identifier = ?
             AND timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
         """
-        result = self.conn.execute(sql, (client_hash,)).fetchone()
+        with self._connection() as conn:
+            result = conn.execute(sql, (client_hash,)).fetchone()
 
         if not result or result[0] == 0:
             return {"error": "Client not found or no data"}
@@ -896,14 +2509,15 @@ class DevTrackDB:
         sql = f"""
         SELECT
             date_trunc('minute', timestamp) as time_bucket,
-            COUNT(*) as request_count
+            SUM(sample_weight) as request_count
         FROM request_logs
         WHERE client_identifier = ?
             AND timestamp >= CURRENT_TIMESTAMP - INTERVAL '{hours_int} hours'
         GROUP BY date_trunc('minute', timestamp)
         ORDER BY time_bucket ASC
         """
-        result = self.conn.execute(sql, (client_hash,)).fetchall()
+        with self._connection() as conn:
+            result = conn.execute(sql, (client_hash,)).fetchall()
         return [
             {
                 "timestamp": (
@@ -915,30 +2529,105 @@ class DevTrackDB:
         ]
 
     def close(self):
-        """Close the database connection."""
-        if (
-            hasattr(_thread_local, "connection")
-            and _thread_local.connection is not None
-        ):
-            try:
-                _thread_local.connection.close()
-            except Exception:
-                pass
-            _thread_local.connection = None
+        """
+        Release this thread's leased connection and close idle pool connections.
+
+        The pool is shared by every DevTrackDB opened on the same file and
+        mode, so their idle connections are closed too and their checked-out
+        ones are retired when returned. Those instances keep working and open
+        fresh connections as needed.
+        """
+        self._release_lease()
+        self._pool.close()
+
+    def _release_lease(self):
+        """Return the connection leased through the conn property, if any."""
+        leased = getattr(self, "_leased", None)
+        entry = getattr(leased, "entry", None) if leased is not None else None
+        if entry is not None:
+            leased.entry = None
+            self._pool.checkin(entry)
 
     def __del__(self):
-        """Ensure connection is closed when object is destroyed."""
-        # Don't access self.conn property here as it may try to create a new connection
-        # Instead, directly check and close thread-local connection
-        if (
-            hasattr(_thread_local, "connection")
-            and _thread_local.connection is not None
-        ):
-            try:
-                _thread_local.connection.close()
-            except Exception:
-                pass
-            _thread_local.connection = None
+        """Return any leased connection when the object is destroyed."""
+        try:
+            self._release_lease()
+        except Exception:
+            pass
+
+
+# Formats encode_log_stream() writes
+STREAM_FORMATS = ("ndjson", "json")
+
+# Compression codecs per export format; the first one is the default
+EXPORT_COMPRESSIONS = {
+    "parquet": ("zstd", "snappy", "gzip", "none"),
+    "csv": ("none", "gzip", "zstd"),
+    "arrow": ("none", "zstd", "lz4"),
+}
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_log_stream(
+    entries: Iterable[Dict[str, Any]], stream_format: str = "ndjson", batch: int = 500
+) -> Iterator[str]:
+    """
+    Encode logs for a streaming response, a batch of rows per chunk.
+
+    Entries may be dicts or JSON text (see DevTrackDB.iter_logs(as_json=True)).
+
+    "ndjson" writes one JSON object per line; "json" writes a single array.
+    Raises ValueError for any other format before anything is read.
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise ValueError(f"stream must be one of: {', '.join(STREAM_FORMATS)}")
+    if stream_format == "ndjson":
+        return _encode_ndjson(entries, batch)
+    return _encode_json_array(entries, batch)
+
+
+def parse_query_param_filters(values: Optional[Iterable[str]]) -> Dict[str, str]:
+    """Turn ["key=value", ...] filter arguments into a query_params dict."""
+    filters = {}
+    for item in values or ():
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            raise ValueError(f"Invalid param filter {item!r}, expected key=value")
+        filters[key] = value
+    return filters
+
+
+def _batched_lines(
+    entries: Iterable[Dict[str, Any]], batch: int
+) -> Iterator[List[str]]:
+    lines: List[str] = []
+    for entry in entries:
+        if not isinstance(entry, str):
+            entry = dumps(entry, default=_json_default)
+        lines.append(entry)
+        if len(lines) >= batch:
+            yield lines
+            lines = []
+    if lines:
+        yield lines
+
+
+def _encode_ndjson(entries: Iterable[Dict[str, Any]], batch: int) -> Iterator[str]:
+    for lines in _batched_lines(entries, batch):
+        yield "\n".join(lines) + "\n"
+
+
+def _encode_json_array(entries: Iterable[Dict[str, Any]], batch: int) -> Iterator[str]:
+    separator = "["
+    for lines in _batched_lines(entries, batch):
+        yield separator + ",".join(lines)
+        separator = ","
+    yield "[]" if separator == "[" else "]"
 
 
 # Global database instance
@@ -946,8 +2635,20 @@ _db_instance: Optional[DevTrackDB] = None
 
 
 def get_db(read_only: bool = True) -> DevTrackDB:
-    """Get the global database instance."""
+    """
+    Get the global database instance.
+
+    When DEVTRACK_COLLECTOR_SOCKET is set, returns a CollectorClient that
+    forwards to the collector process owning the database instead.
+    """
     global _db_instance
+    collector_socket = os.environ.get("DEVTRACK_COLLECTOR_SOCKET")
+    if collector_socket:
+        if getattr(_db_instance, "socket_path", None) != collector_socket:
+            from devtrack_sdk.collector import CollectorClient
+
+            _db_instance = CollectorClient(collector_socket)
+        return _db_instance
     # If instance exists but has different read_only setting, recreate it
     # BUT: If we have an existing instance with write access, we can use it
     # for reads too (DuckDB allows read operations on write connections)
@@ -967,10 +2668,20 @@ def get_db(read_only: bool = True) -> DevTrackDB:
     return _db_instance
 
 
-def init_db(db_path: str = "devtrack_logs.db", read_only: bool = True):
+def init_db(
+    db_path: str = "devtrack_logs.db",
+    read_only: bool = True,
+    archive_dir: Optional[str] = None,
+    partition_by: str = "day",
+):
     """Initialize the database with a custom path."""
     global _db_instance
     if _db_instance:
         _db_instance.close()
-    _db_instance = DevTrackDB(db_path, read_only=read_only)
+    _db_instance = DevTrackDB(
+        db_path,
+        read_only=read_only,
+        archive_dir=archive_dir,
+        partition_by=partition_by,
+    )
     return _db_instance
@@ -1,14 +1,24 @@
 import hashlib
-import json
 import uuid
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Optional, Union
 
 from django.conf import settings
-from django.http import HttpRequest, HttpResponse
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django.http.request import RawPostDataException
 from django.utils.deprecation import MiddlewareMixin
 
+from .body import BodyCapture, CapturedBody
+from .collector import CollectorClient
 from .database import DevTrackDB
+from .identity import ClientResolver
+from .paths import PathNormalizer, route_template
+from .redaction import Redactor
+from .retention import RetentionScheduler
+from .sampling import RequestCounter, Sampler
+from .timing import RequestTimer
+from .writer import LogWriter
 
 
 class DevTrackDjangoMiddleware(MiddlewareMixin):
@@ -16,7 +26,11 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
     Django middleware for request tracking with DuckDB integration
     """
 
-    _db_instance: Optional[DevTrackDB] = None
+    _db_instance: Optional[Union[DevTrackDB, CollectorClient]] = None
+    _writer: Optional[LogWriter] = None
+    _retention: Optional[RetentionScheduler] = None
+    _sampler: Optional[Sampler] = None
+    _counter: Optional[RequestCounter] = None
 
     def __init__(
         self, get_response=None, exclude_path: list[str] = None, db_path: str = None
@@ -46,7 +60,19 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
         final_db_path = db_path or getattr(
             settings, "DEVTRACK_DB_PATH", "devtrack_logs.db"
         )
-        if DevTrackDjangoMiddleware._db_instance is None or (
+        collector_socket = getattr(settings, "DEVTRACK_COLLECTOR_SOCKET", None)
+        if collector_socket and not db_path:
+            # Multi-worker mode: a collector process owns the database file
+            if (
+                getattr(DevTrackDjangoMiddleware._db_instance, "socket_path", None)
+                != collector_socket
+            ):
+                if DevTrackDjangoMiddleware._db_instance is not None:
+                    DevTrackDjangoMiddleware._db_instance.close()
+                DevTrackDjangoMiddleware._db_instance = CollectorClient(
+                    collector_socket
+                )
+        elif DevTrackDjangoMiddleware._db_instance is None or (
             db_path and DevTrackDjangoMiddleware._db_instance.db_path != db_path
         ):
             # Close existing instance if switching databases
@@ -56,6 +82,63 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
                 final_db_path, read_only=False
             )
 
+        # Redaction: Redactor options; buffered mode masks in the writer thread
+        self.redactor = Redactor(**getattr(settings, "DEVTRACK_REDACTION", None) or {})
+
+        # Buffered mode: queue logs for a background writer thread
+        self.buffered = getattr(settings, "DEVTRACK_BUFFERED_WRITES", True)
+        if self.buffered:
+            writer = DevTrackDjangoMiddleware._writer
+            if writer is None or writer.db is not DevTrackDjangoMiddleware._db_instance:
+                if writer is not None:
+                    writer.close()
+                DevTrackDjangoMiddleware._writer = LogWriter(
+                    DevTrackDjangoMiddleware._db_instance,
+                    max_queue_size=getattr(settings, "DEVTRACK_QUEUE_SIZE", 10000),
+                    flush_interval=getattr(settings, "DEVTRACK_FLUSH_INTERVAL", 1.0),
+                    overflow_policy=getattr(
+                        settings, "DEVTRACK_OVERFLOW_POLICY", "drop_oldest"
+                    ),
+                )
+            DevTrackDjangoMiddleware._writer.redactor = self.redactor
+
+        # Retention policies run here unless a collector owns the database
+        retention = getattr(settings, "DEVTRACK_RETENTION", None)
+        db = DevTrackDjangoMiddleware._db_instance
+        if retention and isinstance(db, DevTrackDB):
+            scheduler = DevTrackDjangoMiddleware._retention
+            if scheduler is None or scheduler.db is not db:
+                if scheduler is not None:
+                    scheduler.close()
+                DevTrackDjangoMiddleware._retention = RetentionScheduler(
+                    db, **retention
+                )
+
+        # Client identification: ClientResolver options, compiled once
+        self.resolver = ClientResolver(
+            **getattr(settings, "DEVTRACK_CLIENT_IDENTIFICATION", None) or {}
+        )
+
+        # Body capture: BodyCapture options (size cap, content types, paths)
+        self.body_capture = BodyCapture(
+            **getattr(settings, "DEVTRACK_BODY_CAPTURE", None) or {}
+        )
+
+        # Path normalization: PathNormalizer options for unresolved paths
+        self.normalizer = PathNormalizer(
+            **getattr(settings, "DEVTRACK_PATH_NORMALIZATION", None) or {}
+        )
+
+        # Sampling: keep a sample of logs, but count every request exactly
+        sampling = getattr(settings, "DEVTRACK_SAMPLING", None)
+        DevTrackDjangoMiddleware._sampler = Sampler(**sampling) if sampling else None
+        counter = DevTrackDjangoMiddleware._counter
+        if counter is not None and (not sampling or counter.db is not db):
+            counter.close()
+            DevTrackDjangoMiddleware._counter = None
+        if sampling and DevTrackDjangoMiddleware._counter is None:
+            DevTrackDjangoMiddleware._counter = RequestCounter(db)
+
         super().__init__(get_response)
 
     def __call__(self, request: HttpRequest) -> HttpResponse:
@@ -63,64 +146,115 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
         if request.path in self.skip_paths or request.path.startswith("/__devtrack__/"):
             return self.get_response(request)
 
+        timer = RequestTimer()
         start_time = datetime.now(timezone.utc)
 
         # Process the request
         response = self.get_response(request)
 
+        if isinstance(response, StreamingHttpResponse) and not response.has_header(
+            "Content-Length"
+        ):
+            # Count the body as the server sends it and log once it's done
+            timer.mark_response_start()
+            # is_async was added in Django 4.2; older versions only stream sync
+            is_async = getattr(response, "is_async", False)
+            stream_class = _AsyncCountedStream if is_async else _CountedStream
+            response.streaming_content = stream_class(
+                response.streaming_content,
+                timer,
+                lambda size: self._log_request(
+                    request, response, start_time, timer, size
+                ),
+            )
+            return response
+
+        # The server sends the body after we return, so the handler's
+        # response is as far as the timing can see
+        timer.mark_first_byte()
+        timer.finish()
+        self._log_request(request, response, start_time, timer)
+        return response
+
+    def _log_request(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        start_time: datetime,
+        timer: RequestTimer,
+        response_size: Optional[int] = None,
+    ) -> None:
         try:
-            log_data = self._extract_devtrack_log_data(request, response, start_time)
-            # Store in DuckDB directly (synchronous write)
-            DevTrackDjangoMiddleware._db_instance.insert_log(log_data)
+            extract_start = perf_counter_ns()
+            log_data = self._extract_devtrack_log_data(
+                request, response, start_time, response_size
+            )
+            timer.add_overhead(extract_start)
+            log_data.update(timer.phases())
+            sampler = DevTrackDjangoMiddleware._sampler
+            if sampler is not None:
+                DevTrackDjangoMiddleware._counter.add(log_data)
+                if not sampler.sample(log_data):
+                    return
+            if self.buffered:
+                body = log_data.get("request_body")
+                if isinstance(body, CapturedBody):
+                    body.detach()
+                DevTrackDjangoMiddleware._writer.submit(log_data)
+            else:
+                # Store in DuckDB directly (synchronous write)
+                DevTrackDjangoMiddleware._db_instance.insert_log(
+                    self.redactor.redact(log_data)
+                )
         except Exception as e:
             print(f"[DevTrackDjangoMiddleware] Logging error: {e}")
 
-        return response
-
     def _extract_devtrack_log_data(
-        self, request: HttpRequest, response: HttpResponse, start_time: datetime
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        start_time: datetime,
+        response_size: Optional[int] = None,
     ) -> Dict[str, Any]:
-        """Extract tracking data from Django request/response"""
-        duration = (
-            datetime.now(timezone.utc) - start_time
-        ).total_seconds() * 1000  # in ms
-
-        # Get path pattern (Django doesn't have route objects like FastAPI)
-        path_pattern = (
-            request.resolver_match.route if request.resolver_match else request.path
-        )
+        """
+        Extract tracking data from Django request/response.
 
-        # Capture query params
-        query_params = dict(request.GET)
+        response_size is the byte count of a streamed body; other responses
+        are measured from their content or Content-Length header. The timing
+        fields (duration_ms, ...) are added by the caller.
+        """
 
-        # Capture request body
-        request_body = {}
-        if request.content_type == "application/json":
-            try:
-                request_body = (
-                    json.loads(request.body.decode("utf-8")) if request.body else {}
-                )
-            except Exception as e:
-                request_body = {"error": f"Invalid JSON: {str(e)}"}
-        elif request.content_type == "application/x-www-form-urlencoded":
-            request_body = dict(request.POST)
+        # Get path pattern: the matched route (re_path() regexes turned into
+        # templates), else a normalized template of the raw path
+        if request.resolver_match:
+            path_pattern = route_template(request.resolver_match.route)
         else:
-            request_body = {"error": "Unsupported content type"}
+            path_pattern = self.normalizer.normalize(request.path)
 
-        # Filter sensitive data
-        if "password" in request_body:
-            request_body["password"] = "***"
+        # Capture query params
+        query_params = dict(request.GET)
 
-        # Get response size
-        response_size = len(response.content) if hasattr(response, "content") else 0
+        # Capture request body: kept as received, parsed only if read
+        body = None
+        media = self.body_capture.wants(request.path, request.content_type)
+        if media:
+            try:
+                body = self.body_capture.capture(request.body, media)
+            except RawPostDataException:
+                pass  # A streamed upload the view already consumed
+        # Sensitive fields are masked by the Redactor before the log is stored
+        request_body = {} if body is None else body
+
+        # Get response size without consuming streaming responses
+        if response_size is None and isinstance(response, StreamingHttpResponse):
+            response_size = int(response.get("Content-Length", 0))
+        elif response_size is None:
+            response_size = len(response.content) if hasattr(response, "content") else 0
 
         # Get headers
         user_agent = request.META.get("HTTP_USER_AGENT", "")
         referer = request.META.get("HTTP_REFERER", "")
 
-        # Get client IP
-        client_ip = self._get_client_ip(request)
-
         # Get user info if authenticated
         user_id = None
         role = None
@@ -128,8 +262,8 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
             user_id = str(request.user.id)
             role = getattr(request.user, "role", None) or "user"
 
-        # Consumer Segmentation: Identify client from multiple sources
-        client_identifier = self._identify_client(request, user_id)
+        # Consumer Segmentation: identify the client and its real public IP
+        client_identifier, client_ip = self.resolver.resolve_django(request, user_id)
 
         return {
             "path": request.path,
@@ -138,7 +272,6 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
             "status_code": response.status_code,
             "timestamp": start_time.isoformat(),
             "client_ip": client_ip,  # Original IP address
-            "duration_ms": round(duration, 2),
             "user_agent": user_agent,  # Original user agent
             "referer": referer,
             "query_params": query_params,
@@ -153,64 +286,6 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
             "client_identifier": client_identifier,  # Original client identifier
         }
 
-    def _identify_client(
-        self, request: HttpRequest, user_id: Optional[str] = None
-    ) -> Optional[str]:
-        """
-        Identify client from multiple sources (priority order):
-        1. Headers (x-client-id, x-api-key, x-app-id, etc.)
-        2. JWT token (from Authorization header)
-        3. Auth context (user_id from authenticated user)
-        4. IP address (as fallback)
-        """
-        # 1. Check custom client identification headers
-        client_id_headers = [
-            "HTTP_X_CLIENT_ID",
-            "HTTP_X_API_KEY",
-            "HTTP_X_APP_ID",
-            "HTTP_X_CONSUMER_ID",
-            "HTTP_X_TENANT_ID",
-            "HTTP_CLIENT_ID",
-            "HTTP_API_KEY",
-        ]
-        for header_name in client_id_headers:
-            client_id = request.META.get(header_name)
-            if client_id:
-                # Convert Django header name back to original
-                original_header = (
-                    header_name.replace("HTTP_", "").replace("_", "-").lower()
-                )
-                return f"header:{original_header}:{client_id}"
-
-        # 2. Extract from JWT token (Authorization header)
-        auth_header = request.META.get("HTTP_AUTHORIZATION", "")
-        if auth_header.startswith("Bearer "):
-            token = auth_header[7:]  # Remove "Bearer " prefix
-            try:
-                # Simple extraction - use first 32 chars as identifier
-                token_id = token[:32]
-                return f"jwt:{token_id}"
-            except Exception:
-                pass
-
-        # 3. Use authenticated user ID if available
-        if user_id:
-            return f"user:{user_id}"
-
-        # 4. Check request for auth context
-        if hasattr(request, "user") and request.user.is_authenticated:
-            if hasattr(request.user, "id"):
-                return f"auth:{request.user.id}"
-            elif hasattr(request.user, "username"):
-                return f"auth:{request.user.username}"
-
-        # 5. Fallback to IP address
-        client_ip = self._get_client_ip(request)
-        if client_ip and client_ip != "unknown":
-            return f"ip:{client_ip}"
-
-        return None
-
     def _hash_identifier(self, identifier: Optional[str]) -> Optional[str]:
         """Hash client identifier for privacy (SHA-256)."""
         if not identifier:
@@ -219,50 +294,52 @@ class DevTrackDjangoMiddleware(MiddlewareMixin):
             :16
         ]  # Use first 16 chars for shorter hash
 
-    def _get_client_ip(self, request: HttpRequest) -> str:
-        """
-        Get the real public client IP address.
-        Handles proxies, load balancers, and CDNs by checking common headers.
-        Priority order:
-        1. X-Forwarded-For (first IP in chain)
-        2. X-Real-IP
-        3. X-Client-IP
-        4. CF-Connecting-IP (Cloudflare)
-        5. True-Client-IP (Akamai/Cloudflare)
-        6. REMOTE_ADDR (direct connection)
-        """
-        # 1. X-Forwarded-For: Multiple IPs, take first (original client)
-        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-        if x_forwarded_for:
-            # X-Forwarded-For can be comma-separated: "client, proxy1, proxy2"
-            # The first IP is the original client
-            ip = x_forwarded_for.split(",")[0].strip()
-            if ip:
-                return ip
-
-        # 2. X-Real-IP: Single IP header (nginx, etc.)
-        x_real_ip = request.META.get("HTTP_X_REAL_IP")
-        if x_real_ip:
-            return x_real_ip.strip()
-
-        # 3. X-Client-IP: Alternative header
-        x_client_ip = request.META.get("HTTP_X_CLIENT_IP")
-        if x_client_ip:
-            return x_client_ip.strip()
-
-        # 4. CF-Connecting-IP: Cloudflare
-        cf_connecting_ip = request.META.get("HTTP_CF_CONNECTING_IP")
-        if cf_connecting_ip:
-            return cf_connecting_ip.strip()
-
-        # 5. True-Client-IP: Akamai/Cloudflare
-        true_client_ip = request.META.get("HTTP_TRUE_CLIENT_IP")
-        if true_client_ip:
-            return true_client_ip.strip()
-
-        # 6. Fallback to REMOTE_ADDR (direct connection)
-        remote_addr = request.META.get("REMOTE_ADDR")
-        if remote_addr:
-            return remote_addr.strip()
-
-        return "unknown"
+
+class _CountedStream:
+    """
+    Wraps a streaming response body to count its bytes as they're sent.
+
+    ``on_done`` gets the byte count once, when the body is exhausted or the
+    server closes the response, whichever comes first.
+    """
+
+    def __init__(self, content, timer: RequestTimer, on_done: Callable[[int], None]):
+        self._content = content
+        self._timer = timer
+        self._on_done = on_done
+        self._size = 0
+        self._done = False
+
+    def __iter__(self):
+        try:
+            for chunk in self._content:
+                if chunk:
+                    self._timer.mark_first_byte()
+                self._size += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        # Django calls this when the response is closed
+        if not self._done:
+            self._done = True
+            self._timer.finish()
+            self._on_done(self._size)
+
+
+class _AsyncCountedStream(_CountedStream):
+    """_CountedStream for async iterators (served under ASGI)."""
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self._content:
+                if chunk:
+                    self._timer.mark_first_byte()
+                self._size += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    # Only async iteration, so Django keeps treating the body as async
+    __iter__ = None
@@ -3,29 +3,55 @@ import re
 from pathlib import Path
 
 from django.conf import settings
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 
-from .database import DevTrackDB
+from .collector import CollectorClient
+from .database import DevTrackDB, encode_log_stream, parse_query_param_filters
 from .django_middleware import DevTrackDjangoMiddleware
+from .serialization import dumps_bytes, json_default
+
+
+class DevTrackJsonResponse(HttpResponse):
+    """
+    JsonResponse encoded with devtrack_sdk.serialization (orjson or msgspec
+    when installed), for the large log and metrics payloads.
+    """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(dumps_bytes(data, default=json_default), **kwargs)
 
 
 def get_db_instance() -> DevTrackDB:
     """Get the database instance from middleware"""
     if DevTrackDjangoMiddleware._db_instance is None:
-        db_path = getattr(settings, "DEVTRACK_DB_PATH", "devtrack_logs.db")
-        DevTrackDjangoMiddleware._db_instance = DevTrackDB(db_path, read_only=False)
+        collector_socket = getattr(settings, "DEVTRACK_COLLECTOR_SOCKET", None)
+        if collector_socket:
+            DevTrackDjangoMiddleware._db_instance = CollectorClient(collector_socket)
+        else:
+            db_path = getattr(settings, "DEVTRACK_DB_PATH", "devtrack_logs.db")
+            DevTrackDjangoMiddleware._db_instance = DevTrackDB(db_path, read_only=False)
     return DevTrackDjangoMiddleware._db_instance
 
 
 @csrf_exempt
 @require_http_methods(["POST"])
 def track_view(request):
-    """Django view for manual log tracking"""
+    """Django view for manual log tracking (single log or a list of logs)"""
     try:
         data = json.loads(request.body.decode("utf-8")) if request.body else {}
+        if isinstance(data, list):
+            # Batch of logs - insert in a single statement
+            if not data or not all(isinstance(entry, dict) for entry in data):
+                return JsonResponse({"ok": False, "error": "Invalid data"}, status=400)
+            db = get_db_instance()
+            db.insert_logs(data)
+            return JsonResponse(
+                {"ok": True, "message": f"Tracked {len(data)} logs successfully"}
+            )
         if data and not data.get("error"):
             db = get_db_instance()
             db.insert_log(data)
@@ -43,34 +69,75 @@ def stats_view(request):
         db = get_db_instance()
 
         # Get query parameters
-        # Default to None (no limit) to return all records, or use provided limit
+        # Without a limit, one page of DevTrackDB.DEFAULT_PAGE_SIZE is returned
         limit_str = request.GET.get("limit")
         limit = int(limit_str) if limit_str else None
         offset = int(request.GET.get("offset", 0))
+        cursor = request.GET.get("cursor")
         path_pattern = request.GET.get("path_pattern")
         status_code = request.GET.get("status_code")
-
-        # Get logs based on filters
-        if path_pattern:
-            entries = db.get_logs_by_path(path_pattern, limit=limit)
-        elif status_code:
-            entries = db.get_logs_by_status_code(int(status_code), limit=limit)
-        else:
-            entries = db.get_all_logs(limit=limit, offset=offset)
+        method = request.GET.get("method")
+        since = request.GET.get("since")
+        stream = request.GET.get("stream")
+        try:
+            query_params = parse_query_param_filters(request.GET.getlist("param"))
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
+
+        if stream:
+            try:
+                body = encode_log_stream(
+                    db.iter_logs(
+                        path_pattern=path_pattern,
+                        status_code=int(status_code) if status_code else None,
+                        cursor=cursor,
+                        limit=limit,
+                        start=since,
+                        query_params=query_params,
+                        as_json=True,
+                        method=method,
+                    ),
+                    stream,
+                )
+            except ValueError as e:
+                return JsonResponse({"error": str(e)}, status=400)
+            content_type = (
+                "application/x-ndjson" if stream == "ndjson" else "application/json"
+            )
+            return StreamingHttpResponse(body, content_type=content_type)
+
+        try:
+            page = db.get_logs_page(
+                limit=limit,
+                cursor=cursor,
+                path_pattern=path_pattern,
+                status_code=int(status_code) if status_code else None,
+                offset=offset,
+                query_params=query_params,
+                method=method,
+                start=since,
+            )
+        except ValueError as e:
+            return JsonResponse({"error": str(e)}, status=400)
 
         # Get summary statistics
         stats_summary = db.get_stats_summary()
 
-        return JsonResponse(
+        return DevTrackJsonResponse(
             {
                 "summary": stats_summary,
                 "total": db.get_logs_count(),
-                "entries": entries,
+                "entries": page["entries"],
+                "next_cursor": page["next_cursor"],
                 "filters": {
                     "limit": limit,
                     "offset": offset,
+                    "cursor": cursor,
                     "path_pattern": path_pattern,
                     "status_code": status_code,
+                    "method": method,
+                    "since": since,
+                    "param": query_params,
                 },
             }
         )
@@ -156,8 +223,11 @@ def metrics_traffic_view(request):
     try:
         db = get_db_instance()
         hours = int(request.GET.get("hours", 24))
-        traffic_data = db.get_traffic_over_time(hours=hours)
-        return JsonResponse({"traffic": traffic_data})
+        interval = db.resolve_interval(hours, request.GET.get("interval_minutes"))
+        traffic_data = db.get_traffic_over_time(hours=hours, interval_minutes=interval)
+        return DevTrackJsonResponse(
+            {"traffic": traffic_data, "interval_minutes": interval}
+        )
     except Exception as e:
         import traceback
 
@@ -172,8 +242,10 @@ def metrics_errors_view(request):
     try:
         db = get_db_instance()
         hours = int(request.GET.get("hours", 24))
-        error_data = db.get_error_trends(hours=hours)
-        return JsonResponse(error_data)
+        interval = db.resolve_interval(hours, request.GET.get("interval_minutes"))
+        error_data = db.get_error_trends(hours=hours, interval_minutes=interval)
+        error_data["interval_minutes"] = interval
+        return DevTrackJsonResponse(error_data)
     except Exception as e:
         import traceback
 
@@ -188,8 +260,13 @@ def metrics_perf_view(request):
     try:
         db = get_db_instance()
         hours = int(request.GET.get("hours", 24))
-        perf_data = db.get_performance_metrics(hours=hours)
-        return JsonResponse(perf_data)
+        interval = db.resolve_interval(hours, request.GET.get("interval_minutes"))
+        exact = request.GET.get("exact", "false").lower() == "true"
+        perf_data = db.get_performance_metrics(
+            hours=hours, interval_minutes=interval, exact=exact
+        )
+        perf_data["interval_minutes"] = interval
+        return DevTrackJsonResponse(perf_data)
     except Exception as e:
         import traceback
 
@@ -205,7 +282,7 @@ def consumers_view(request):
         db = get_db_instance()
         hours = int(request.GET.get("hours", 24))
         segments_data = db.get_consumer_segments(hours=hours)
-        return JsonResponse(segments_data)
+        return DevTrackJsonResponse(segments_data)
     except Exception as e:
         import traceback
 
@@ -0,0 +1,241 @@
+import base64
+import binascii
+import ipaddress
+import json
+from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+
+# Headers that name the calling client, checked in this order
+CLIENT_HEADERS = (
+    "x-client-id",
+    "x-api-key",
+    "x-app-id",
+    "x-consumer-id",
+    "x-tenant-id",
+    "client-id",
+    "api-key",
+)
+
+# Headers proxies and CDNs use for the original client IP, in this order
+IP_HEADERS = (
+    "x-forwarded-for",
+    "x-real-ip",
+    "x-client-ip",
+    "cf-connecting-ip",  # Cloudflare
+    "true-client-ip",  # Akamai/Cloudflare
+)
+
+# ASGI scope key the resolved (client_identifier, client_ip) is cached under
+_SCOPE_KEY = "devtrack.client"
+
+
+def _jwt_claim(token: str, claim: str) -> Optional[str]:
+    """Read a claim from a JWT payload without verifying the token."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        value = json.loads(base64.urlsafe_b64decode(payload)).get(claim)
+    except (IndexError, ValueError, AttributeError, binascii.Error):
+        return None
+    return None if value is None else str(value)
+
+
+class ClientResolver:
+    """
+    Works out who made a request and from which IP.
+
+    ``rules`` is the order identification is tried in, first match wins:
+
+    - ``header``: one of ``client_headers`` (``header:<name>:<value>``)
+    - ``jwt``: a bearer JWT, identified by its ``jwt_claim`` or, without
+      one, by the first 32 characters of the token (``jwt:<id>``)
+    - ``user``: the request's user id (``user:<id>``)
+    - ``auth``: the authenticated user object (``auth:<id or username>``)
+    - ``ip``: the client IP (``ip:<address>``)
+
+    The client IP comes from the first of ``ip_headers`` present, else the
+    peer address. With ``trusted_proxies`` (CIDRs), those headers are only
+    believed when the peer is a trusted proxy, and X-Forwarded-For style
+    chains are read right to left, skipping trusted hops.
+
+    Everything is compiled once; per request the headers are read in a
+    single pass and the result is cached on the request.
+    """
+
+    RULES = ("header", "jwt", "user", "auth", "ip")
+
+    def __init__(
+        self,
+        rules: Iterable[str] = RULES,
+        client_headers: Iterable[str] = CLIENT_HEADERS,
+        ip_headers: Iterable[str] = IP_HEADERS,
+        jwt_claim: Optional[str] = None,
+        trusted_proxies: Optional[Iterable[str]] = None,
+    ):
+        rules = tuple(rules)
+        unknown = set(rules) - set(self.RULES)
+        if unknown:
+            raise ValueError(
+                f"Unknown rules {', '.join(sorted(unknown))}; "
+                f"expected {', '.join(self.RULES)}"
+            )
+        self.rules = rules
+        self.client_headers = tuple(name.lower() for name in client_headers)
+        self.ip_headers = tuple(name.lower() for name in ip_headers)
+        self.jwt_claim = jwt_claim
+        self.trusted_proxies = (
+            None
+            if trusted_proxies is None
+            else tuple(
+                ipaddress.ip_network(cidr, strict=False) for cidr in trusted_proxies
+            )
+        )
+
+        self._steps = tuple(getattr(self, f"_by_{rule}") for rule in rules)
+        wanted = self.ip_headers
+        if "header" in rules:
+            wanted += self.client_headers
+        if "jwt" in rules:
+            wanted += ("authorization",)
+        # ASGI header names are lowercase bytes; WSGI uses HTTP_* META keys
+        self._asgi_names = {name.encode("latin-1"): name for name in wanted}
+        self._meta_keys = tuple(
+            ("HTTP_" + name.upper().replace("-", "_"), name) for name in wanted
+        )
+
+    def collect_asgi(
+        self, raw_headers: Iterable[Tuple[bytes, bytes]]
+    ) -> Dict[str, str]:
+        """Pick the headers the rules read out of an ASGI header list."""
+        names = self._asgi_names
+        found: Dict[str, str] = {}
+        for raw_name, raw_value in raw_headers:
+            name = names.get(raw_name)
+            if name is not None:
+                value = raw_value.decode("latin-1")
+                # Repeated headers combine the way HTTP defines
+                found[name] = f"{found[name]}, {value}" if name in found else value
+        return found
+
+    def collect_meta(self, meta: Mapping[str, Any]) -> Dict[str, str]:
+        """Pick the headers the rules read out of a WSGI environ / Django META."""
+        found = {}
+        for key, name in self._meta_keys:
+            value = meta.get(key)
+            if value:
+                found[name] = value
+        return found
+
+    def resolve(
+        self,
+        headers: Mapping[str, str],
+        peer_ip: Optional[str],
+        user_id: Optional[str] = None,
+        auth_user: Any = None,
+    ) -> Tuple[Optional[str], str]:
+        """(client_identifier, client_ip) from headers picked by collect_*()."""
+        client_ip = self._client_ip(headers, peer_ip)
+        for step in self._steps:
+            identifier = step(headers, client_ip, user_id, auth_user)
+            if identifier:
+                return identifier, client_ip
+        return None, client_ip
+
+    def resolve_asgi(
+        self, scope: Dict[str, Any], user_id: Optional[str] = None
+    ) -> Tuple[Optional[str], str]:
+        """resolve() for an ASGI request, cached in its scope."""
+        cached = scope.get(_SCOPE_KEY)
+        if cached is None:
+            client = scope.get("client")
+            cached = scope[_SCOPE_KEY] = self.resolve(
+                self.collect_asgi(scope.get("headers", ())),
+                client[0] if client else None,
+                user_id,
+                scope.get("state", {}).get("user"),
+            )
+        return cached
+
+    def resolve_django(
+        self, request: Any, user_id: Optional[str] = None
+    ) -> Tuple[Optional[str], str]:
+        """resolve() for a Django request, cached on the request."""
+        cached = getattr(request, "_devtrack_client", None)
+        if cached is None:
+            user = getattr(request, "user", None)
+            cached = self.resolve(
+                self.collect_meta(request.META),
+                request.META.get("REMOTE_ADDR"),
+                user_id,
+                user if user is not None and user.is_authenticated else None,
+            )
+            request._devtrack_client = cached
+        return cached
+
+    def _is_trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    def _client_ip(self, headers: Mapping[str, str], peer_ip: Optional[str]) -> str:
+        peer_ip = peer_ip.strip() if peer_ip else None
+        if self.trusted_proxies is None:
+            # No proxy config: take the headers at their word
+            for name in self.ip_headers:
+                value = headers.get(name)
+                if value:
+                    # Chains are "client, proxy1, proxy2"
+                    ip = value.split(",")[0].strip()
+                    if ip:
+                        return ip
+            return peer_ip or "unknown"
+
+        if not peer_ip or not self._is_trusted(peer_ip):
+            # Anyone can send these headers; only proxies we trust count
+            return peer_ip or "unknown"
+        for name in self.ip_headers:
+            value = headers.get(name)
+            if not value:
+                continue
+            hops = [hop.strip() for hop in value.split(",") if hop.strip()]
+            for hop in reversed(hops):
+                if not self._is_trusted(hop):
+                    return hop
+            if hops:
+                return hops[0]
+        return peer_ip
+
+    def _by_header(self, headers, client_ip, user_id, auth_user) -> Optional[str]:
+        for name in self.client_headers:
+            value = headers.get(name)
+            if value:
+                return f"header:{name}:{value}"
+        return None
+
+    def _by_jwt(self, headers, client_ip, user_id, auth_user) -> Optional[str]:
+        authorization = headers.get("authorization", "")
+        if not authorization.startswith("Bearer "):
+            return None
+        token = authorization[7:]
+        if "." not in token:
+            return None  # Not a JWT
+        if self.jwt_claim:
+            claim = _jwt_claim(token, self.jwt_claim)
+            return None if claim is None else f"jwt:{claim}"
+        return f"jwt:{token[:32]}"
+
+    def _by_user(self, headers, client_ip, user_id, auth_user) -> Optional[str]:
+        return f"user:{user_id}" if user_id else None
+
+    def _by_auth(self, headers, client_ip, user_id, auth_user) -> Optional[str]:
+        if auth_user is None:
+            return None
+        if hasattr(auth_user, "id"):
+            return f"auth:{auth_user.id}"
+        if hasattr(auth_user, "username"):
+            return f"auth:{auth_user.username}"
+        return None
+
+    def _by_ip(self, headers, client_ip, user_id, auth_user) -> Optional[str]:
+        return f"ip:{client_ip}" if client_ip and client_ip != "unknown" else None
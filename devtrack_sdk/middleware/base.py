@@ -1,15 +1,53 @@
 from datetime import datetime, timezone
+from time import perf_counter_ns
+from typing import Any, Dict, List, Optional, Pattern, Tuple
 
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.types import Message
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from devtrack_sdk.database import get_db
+from devtrack_sdk.body import BodyBuffer, BodyCapture, CapturedBody
+from devtrack_sdk.database import DevTrackDB, get_db
+from devtrack_sdk.identity import ClientResolver
 from devtrack_sdk.middleware.extractor import extract_devtrack_log_data
+from devtrack_sdk.paths import PathNormalizer
+from devtrack_sdk.redaction import Redactor
+from devtrack_sdk.retention import RetentionScheduler
+from devtrack_sdk.sampling import RequestCounter, Sampler
+from devtrack_sdk.timing import RequestTimer
+from devtrack_sdk.writer import LogWriter
 
+# ASGI extensions that hand a file to the server instead of body messages
+_FILE_SEND_MESSAGES = ("http.response.pathsend", "http.response.zerocopysend")
 
-class DevTrackMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, exclude_path: list[str] = [], db_instance=None):
+
+class DevTrackMiddleware:
+    """
+    ASGI middleware that logs every HTTP request it sees.
+
+    It wraps ``send`` to read the status code and count response bytes as
+    they stream, so responses pass through untouched. Request bodies that
+    ``body_capture`` selects are recorded as the app reads them, up to its
+    byte limit; ``capture_body=False`` turns body capture off.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        exclude_path: list[str] = [],
+        db_instance=None,
+        buffered: bool = True,
+        queue_size: int = 10000,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "drop_oldest",
+        retention: Optional[Dict[str, Any]] = None,
+        sampling: Optional[Dict[str, Any]] = None,
+        capture_body: bool = True,
+        body_capture: Optional[Dict[str, Any]] = None,
+        client_identification: Optional[Dict[str, Any]] = None,
+        path_normalization: Optional[Dict[str, Any]] = None,
+        redaction: Optional[Dict[str, Any]] = None,
+    ):
+        self.app = app
         self.skip_paths = [
             "/__devtrack__/stats",
             "/__devtrack__/logs",
@@ -22,37 +60,181 @@ class DevTrackMiddleware(BaseHTTPMiddleware):
         ]
         self.skip_paths += exclude_path if isinstance(exclude_path, list) else []
         self.db_instance = db_instance
-        super().__init__(app)
 
-    async def dispatch(self, request: Request, call_next):
-        # Skip logging for DevTrack endpoints and excluded paths
-        if request.url.path in self.skip_paths or request.url.path.startswith(
-            "/__devtrack__/"
-        ):
-            return await call_next(request)
+        # Buffered mode: hand logs to a background writer instead of
+        # inserting them before the response is returned
+        self.buffered = buffered
+        self.writer_options = {
+            "max_queue_size": queue_size,
+            "flush_interval": flush_interval,
+            "overflow_policy": overflow_policy,
+        }
+        if overflow_policy not in LogWriter.OVERFLOW_POLICIES:
+            policies = ", ".join(LogWriter.OVERFLOW_POLICIES)
+            raise ValueError(f"overflow_policy must be one of {policies}")
+        self.writer = None
+
+        # Retention: RetentionScheduler options, started with the first write
+        self.retention_options = retention
+        self.retention = None
+
+        # Sampling: Sampler options; every request is still counted exactly
+        self.sampler = Sampler(**sampling) if sampling else None
+        self.counter = None
+
+        # Body capture: BodyCapture options (size cap, content types, paths)
+        self.capture_body = capture_body
+        self.body_capture = BodyCapture(**(body_capture or {}))
+
+        # Client identification: ClientResolver options, compiled once
+        self.resolver = ClientResolver(**(client_identification or {}))
+
+        # Path normalization: PathNormalizer options; the route table is
+        # read from the app on the first request
+        self.normalizer = PathNormalizer(**(path_normalization or {}))
+
+        # Redaction: Redactor options; buffered mode masks in the writer thread
+        self.redactor = Redactor(**(redaction or {}))
+
+    def _get_writer(self, db) -> LogWriter:
+        """Create the background writer lazily on the first tracked request."""
+        if self.writer is None or self.writer.db is not db:
+            if self.writer is not None:
+                self.writer.close()
+            self.writer = LogWriter(db, redactor=self.redactor, **self.writer_options)
+        return self.writer
 
+    def _get_counter(self, db) -> RequestCounter:
+        """Create the exact request counter for the database being written to."""
+        if self.counter is None or self.counter.db is not db:
+            if self.counter is not None:
+                self.counter.close()
+            self.counter = RequestCounter(db)
+        return self.counter
+
+    def _start_retention(self, db) -> None:
+        """Start the retention scheduler for the database being written to."""
+        if self.retention is None or self.retention.db is not db:
+            if self.retention is not None:
+                self.retention.close()
+            self.retention = RetentionScheduler(db, **self.retention_options)
+
+    def _skip(self, path: str) -> bool:
+        """DevTrack endpoints and excluded paths aren't tracked."""
+        return path in self.skip_paths or path.startswith("/__devtrack__/")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._skip(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        timer = RequestTimer()
         start_time = datetime.now(timezone.utc)
+        request = Request(scope)
+        if self.normalizer.routes is None:
+            self.normalizer.set_routes(_route_table(scope.get("app")))
 
-        # ✅ Read and buffer the body
-        body = await request.body()
+        # Selected bodies are kept as the app reads them, never read ahead
+        recorder = None
+        media = self.capture_body and self.body_capture.wants(
+            scope["path"], request.headers.get("content-type")
+        )
+        if media:
+            recorder = self.body_capture.buffer(media)
+            receive = _record_body(recorder, receive)
+        timer.add_overhead(timer.start)
 
-        async def receive() -> Message:
-            return {
-                "type": "http.request",
-                "body": body,
-                "more_body": False,
-            }
+        status_code = 500
+        response_size = 0
+        content_length = 0
 
-        # ✅ Rebuild the request with the modified receive function
-        request = Request(request.scope, receive)
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size, content_length
+            message_type = message["type"]
+            if message_type == "http.response.start":
+                timer.mark_response_start()
+                status_code = message["status"]
+                for name, value in message.get("headers", ()):
+                    if name.lower() == b"content-length":
+                        content_length = int(value)
+            elif message_type == "http.response.body":
+                chunk_size = len(message.get("body", b""))
+                if chunk_size:
+                    timer.mark_first_byte()
+                response_size += chunk_size
+            elif message_type in _FILE_SEND_MESSAGES:
+                # The server sends the file itself, as declared in the headers
+                timer.mark_first_byte()
+                response_size += content_length
+            await send(message)
 
-        response = await call_next(request)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timer.finish()
+            # Unhandled exceptions are logged as the 500 they turn into
+            body = recorder.body() if recorder is not None else None
+            await self._log(
+                request, status_code, response_size, start_time, body, timer
+            )
 
+    async def _log(
+        self,
+        request: Request,
+        status_code: int,
+        response_size: int,
+        start_time: datetime,
+        body: Optional[CapturedBody],
+        timer: RequestTimer,
+    ) -> None:
         try:
-            log_data = await extract_devtrack_log_data(request, response, start_time)
+            extract_start = perf_counter_ns()
+            log_data = await extract_devtrack_log_data(
+                request,
+                status_code,
+                response_size,
+                start_time,
+                body,
+                self.resolver,
+                self.normalizer,
+            )
+            timer.add_overhead(extract_start)
+            log_data.update(timer.phases())
             db = self.db_instance if self.db_instance else get_db(read_only=False)
-            db.insert_log(log_data)
+            # With a collector, retention runs in the collector process
+            if self.retention_options and isinstance(db, DevTrackDB):
+                self._start_retention(db)
+            if self.sampler is not None:
+                self._get_counter(db).add(log_data)
+                if not self.sampler.sample(log_data):
+                    return
+            if self.buffered:
+                if body is not None:
+                    body.detach()
+                self._get_writer(db).submit(log_data)
+            else:
+                # The response has been sent by now
+                db.insert_log(self.redactor.redact(log_data))
         except Exception as e:
             print(f"[DevTrackMiddleware] Logging error: {e}")
 
-        return response
+
+def _route_table(app: Any) -> List[Tuple[Pattern, str]]:
+    """(path regex, path template) for each route of a Starlette app."""
+    return [
+        (route.path_regex, route.path_format)
+        for route in getattr(app, "routes", None) or ()
+        if hasattr(route, "path_regex") and hasattr(route, "path_format")
+    ]
+
+
+def _record_body(recorder: BodyBuffer, receive: Receive) -> Receive:
+    """Pass the body through to the app, keeping what the recorder wants of it."""
+
+    async def record() -> Message:
+        message = await receive()
+        if message["type"] == "http.request":
+            recorder.add(message.get("body", b""))
+        return message
+
+    return record
@@ -0,0 +1,98 @@
+import re
+import threading
+from functools import lru_cache
+from typing import Iterable, List, Optional, Pattern, Tuple
+
+_UUID_RE = re.compile(
+    r"^[0-9a-fA-F]{8}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?[0-9a-fA-F]{4}-?"
+    r"[0-9a-fA-F]{12}$"
+)
+_NUMBER_RE = re.compile(r"^\d+$")
+_HEX_RE = re.compile(r"^(?=.*\d)[0-9a-fA-F]{16,}$")
+
+# Named groups in a Django re_path() route, e.g. (?P<year>[0-9]{4})
+_NAMED_GROUP_RE = re.compile(r"\(\?P<(\w+)>(?:[^()]|\([^()]*\))*\)")
+# Anchors, and what tells a regex route from a path() one
+_ANCHOR_RE = re.compile(r"\^|\$|\\Z")
+_REGEX_ROUTE_RE = re.compile(r"\^|\$|\\Z|\(\?P<")
+
+
+@lru_cache(maxsize=1024)
+def route_template(route: str) -> str:
+    """
+    Template for a Django resolver_match.route.
+
+    path() routes are returned as they are; re_path() routes such as
+    ^items/(?P<pk>\\d+)/$ become items/{pk}/.
+    """
+    if not _REGEX_ROUTE_RE.search(route):
+        return route
+    template = _NAMED_GROUP_RE.sub(r"{\1}", route)
+    return _ANCHOR_RE.sub("", template).replace("\\", "")
+
+
+def _segment_template(segment: str) -> str:
+    if _NUMBER_RE.match(segment):
+        return "{id}"
+    if _UUID_RE.match(segment):
+        return "{uuid}"
+    if _HEX_RE.match(segment):
+        return "{hash}"
+    return segment
+
+
+class PathNormalizer:
+    """
+    Maps raw paths that no route matched to a bounded set of templates.
+
+    A path is matched against the app's route table first (see set_routes),
+    then numeric, UUID and long hex segments become ``{id}``, ``{uuid}``
+    and ``{hash}``. Once ``max_patterns`` distinct templates have been
+    produced, new ones are reported as ``other``, so 404 scans can't grow
+    the number of path_pattern values without bound. Results are kept in
+    an LRU cache of ``cache_size`` paths.
+    """
+
+    def __init__(
+        self,
+        max_patterns: int = 1000,
+        cache_size: int = 4096,
+        other: str = "/{other}",
+    ):
+        if max_patterns < 1:
+            raise ValueError("max_patterns must be >= 1")
+        if cache_size < 0:
+            raise ValueError("cache_size must be >= 0")
+        self.max_patterns = max_patterns
+        self.other = other
+        self.routes: Optional[List[Tuple[Pattern, str]]] = None
+
+        self._lock = threading.Lock()
+        self._templates = set()
+        self._normalize = lru_cache(maxsize=cache_size)(self._template_for)
+
+    def set_routes(self, routes: Iterable[Tuple[Pattern, str]]) -> None:
+        """Set the (compiled path regex, template) pairs tried before heuristics."""
+        self.routes = list(routes)
+        self._normalize.cache_clear()
+
+    def normalize(self, path: str) -> str:
+        """Get the template for a path no route matched."""
+        return self._normalize(path)
+
+    def cache_info(self):
+        return self._normalize.cache_info()
+
+    def _template_for(self, path: str) -> str:
+        for regex, template in self.routes or ():
+            if regex.match(path):
+                return template
+
+        template = "/".join(_segment_template(segment) for segment in path.split("/"))
+        with self._lock:
+            if template in self._templates:
+                return template
+            if len(self._templates) >= self.max_patterns:
+                return self.other
+            self._templates.add(template)
+        return template
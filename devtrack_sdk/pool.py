@@ -0,0 +1,285 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import duckdb
+
+
+class _PooledConnection:
+    """A DuckDB connection plus the bookkeeping the pool needs."""
+
+    __slots__ = ("conn", "generation", "last_used", "last_checked", "holder")
+
+    def __init__(self, conn, generation: int):
+        now = time.monotonic()
+        self.conn = conn
+        self.generation = generation
+        self.last_used = now
+        self.last_checked = now
+        self.holder = ""  # Who has it checked out, for error messages
+
+
+class ConnectionPool:
+    """
+    Pool of DuckDB connections for a single (db_path, read_only) pair.
+
+    Connections are checked out for the duration of one operation and
+    checked back in afterwards. Idle connections are closed after
+    ``idle_timeout`` seconds, and a connection is only probed with
+    ``SELECT 1`` when it has not been checked for ``health_check_interval``
+    seconds, instead of on every access.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        read_only: bool = True,
+        max_size: int = 8,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 30.0,
+        checkout_timeout: float = 30.0,
+    ):
+        if max_size < 1:
+            raise ValueError("max_size must be >= 1")
+        self.db_path = db_path
+        self.read_only = read_only
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.checkout_timeout = checkout_timeout
+
+        self._idle: deque = deque()
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._size = 0  # Open connections (idle + in use)
+        self._in_use = 0
+        self._checked_out: Set[_PooledConnection] = set()
+        self._generation = 0
+        self._exclusive = False  # Checkouts wait while set (see exclusive())
+
+        # Serializes writes that update shared rows (e.g. rollups), which
+        # would otherwise hit DuckDB write-write conflicts between connections
+        self.write_lock = threading.RLock()
+
+        self._waits = 0
+        self._created = 0
+        self._closed = 0
+        self._health_check_failures = 0
+
+    def _connect(self):
+        return duckdb.connect(self.db_path, read_only=self.read_only)
+
+    def _close_entry(self, entry: _PooledConnection) -> None:
+        """Close a pooled connection. Caller must hold the lock."""
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        self._size -= 1
+        self._closed += 1
+
+    def _evict_idle(self, now: float) -> None:
+        """Close connections idle longer than idle_timeout. Caller holds the lock."""
+        while self._idle and now - self._idle[0].last_used > self.idle_timeout:
+            self._close_entry(self._idle.popleft())
+
+    def checkout(
+        self, timeout: Optional[float] = None, holder: Optional[str] = None
+    ) -> _PooledConnection:
+        """
+        Check out a connection, waiting up to timeout if the pool is full.
+
+        ``holder`` names the borrower in exclusive() timeouts (the calling
+        thread's name by default).
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        holder = holder or threading.current_thread().name
+        deadline = time.monotonic() + timeout
+        entry = None
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            while True:
+                if self._idle and not self._exclusive:
+                    # LIFO keeps the most recently used (warmest) connection busy
+                    entry = self._idle.pop()
+                    self._checked_out.add(entry)
+                    break
+                if self._size < self.max_size and not self._exclusive:
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"Timed out waiting for a connection to {self.db_path}"
+                    )
+                self._waits += 1
+                self._available.wait(remaining)
+            self._in_use += 1
+            generation = self._generation
+
+        if entry is None:
+            return self._open_entry(generation, holder)
+
+        if time.monotonic() - entry.last_checked >= self.health_check_interval:
+            try:
+                entry.conn.execute("SELECT 1")
+                entry.last_checked = time.monotonic()
+            except Exception:
+                with self._lock:
+                    self._health_check_failures += 1
+                    self._checked_out.discard(entry)
+                    self._close_entry(entry)
+                    self._size += 1  # Reserve the slot for the replacement
+                return self._open_entry(generation, holder)
+        entry.holder = holder
+        return entry
+
+    def _open_entry(self, generation: int, holder: str) -> _PooledConnection:
+        """Open a new connection for a slot already reserved by checkout()."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._in_use -= 1
+                self._available.notify()
+            raise
+        entry = _PooledConnection(conn, generation)
+        entry.holder = holder
+        with self._lock:
+            self._created += 1
+            self._checked_out.add(entry)
+        return entry
+
+    def checkin(self, entry: _PooledConnection, discard: bool = False) -> None:
+        """Return a connection to the pool (or close it if discarded/stale)."""
+        with self._lock:
+            self._in_use -= 1
+            self._checked_out.discard(entry)
+            if discard or entry.generation != self._generation:
+                self._close_entry(entry)
+            else:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            if self._exclusive:
+                # exclusive() waits on the same condition as checkouts
+                self._available.notify_all()
+            else:
+                self._available.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Context manager that checks a connection out and back in."""
+        entry = self.checkout()
+        discard = False
+        try:
+            yield entry.conn
+        except duckdb.ConnectionException:
+            # The connection itself is broken - don't hand it out again
+            discard = True
+            raise
+        finally:
+            self.checkin(entry, discard=discard)
+
+    def close(self) -> None:
+        """
+        Close idle connections and retire the ones currently checked out.
+
+        Retired connections are closed when they're checked in. The pool
+        stays usable: later checkouts open fresh connections.
+        """
+        with self._lock:
+            self._generation += 1
+            while self._idle:
+                self._close_entry(self._idle.popleft())
+
+    @contextmanager
+    def exclusive(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """
+        Close every connection and hold new checkouts for the block.
+
+        Waits up to timeout for checked-out connections to come back and
+        raises TimeoutError, naming their holders, if they don't. Used to
+        swap the database file.
+        """
+        timeout = self.checkout_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            self._exclusive = True
+            while self._in_use:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._exclusive = False
+                    self._available.notify_all()
+                    raise TimeoutError(
+                        f"Timed out waiting for connections to {self.db_path}, "
+                        f"held by: {', '.join(self._holders())}"
+                    )
+                self._available.wait(remaining)
+            self._generation += 1
+            while self._idle:
+                self._close_entry(self._idle.popleft())
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._exclusive = False
+                self._available.notify_all()
+
+    def _holders(self) -> List[str]:
+        """Who has connections checked out. Caller must hold the lock."""
+        return sorted(entry.holder for entry in self._checked_out)
+
+    def holders(self) -> List[str]:
+        """Who has connections checked out (thread names or checkout labels)."""
+        with self._lock:
+            return self._holders()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get pool metrics (in use, idle, waits, ...)."""
+        with self._lock:
+            return {
+                "db_path": self.db_path,
+                "read_only": self.read_only,
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "waits": self._waits,
+                "created": self._created,
+                "closed": self._closed,
+                "health_check_failures": self._health_check_failures,
+            }
+
+
+# Pools keyed by (absolute db_path, read_only)
+_pools: Dict[Tuple[str, bool], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, read_only: bool = True, **options) -> ConnectionPool:
+    """
+    Get the shared pool for (db_path, read_only), creating it if needed.
+
+    Options (max_size, idle_timeout, ...) only apply when the pool is created.
+    """
+    key = (os.path.abspath(db_path), read_only)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ConnectionPool(db_path, read_only=read_only, **options)
+            _pools[key] = pool
+        return pool
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Get metrics for every pool, keyed by '<db_path> (ro|rw)'."""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {
+        f"{path} ({'ro' if read_only else 'rw'})": pool.stats()
+        for (path, read_only), pool in pools
+    }
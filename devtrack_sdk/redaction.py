@@ -0,0 +1,237 @@
+import hashlib
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
+
+from devtrack_sdk.body import CapturedBody
+
+# Key names whose values are masked wherever they appear (shell-style,
+# case-insensitive)
+KEYS = (
+    "password",
+    "passwd",
+    "secret",
+    "*_secret",
+    "token",
+    "*_token",
+    "api_key",
+    "apikey",
+    "authorization",
+    "cookie",
+)
+
+# Credential headers worth hashing when they identify clients. Not hashed
+# unless passed as ``headers``, since hashing changes the stored identifiers
+# of existing clients
+HEADERS = ("authorization", "cookie", "x-api-key", "api-key")
+
+# Card numbers: 13-19 digits starting 2-6, optionally grouped; matches are
+# Luhn-checked
+CARD_NUMBER = r"\b[2-6](?:[ -]?\d){12,18}\b"
+# JSON Web Tokens and bearer credentials
+JWT = r"\beyJ[\w-]{4,}\.[\w-]{4,}\.[\w-]*"
+BEARER = r"(?i)\bbearer\s+[\w.~+/-]+=*"
+
+PATTERNS = (CARD_NUMBER, JWT, BEARER)
+
+# Fields of a log record that are free text
+_TEXT_FIELDS = ("path", "referer")
+# Fields of a log record holding decoded JSON
+_JSON_FIELDS = ("query_params", "path_params", "request_body")
+
+
+def _luhn_valid(digits: str) -> bool:
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        value = int(digit)
+        if index % 2:
+            value = value * 2 - 9 if value > 4 else value * 2
+        total += value
+    return total % 10 == 0
+
+
+def _glob_regex(pattern: str, wildcard: str) -> str:
+    return wildcard.join(re.escape(part) for part in pattern.lower().split("*"))
+
+
+def _parse_path(path: str) -> Tuple[str, Tuple[str, ...]]:
+    """'request_body.items[*].token' -> ('request_body', ('items', '*', 'token'))"""
+    segments = tuple(
+        segment
+        for segment in re.sub(r"\[(\w+|\*)\]", r".\1", path).split(".")
+        if segment
+    )
+    if len(segments) < 2 or segments[0] not in _JSON_FIELDS:
+        raise ValueError(
+            f"Invalid redaction path {path!r}: must start with one of "
+            f"{', '.join(_JSON_FIELDS)} and name a field inside it"
+        )
+    return segments[0], segments[1:]
+
+
+class Redactor:
+    """
+    Masks sensitive values in log records.
+
+    - ``keys``: key names (shell-style, case-insensitive) whose values are
+      masked at any depth of query_params, path_params and request_body,
+      and in query strings of the path and referer
+    - ``paths``: exact JSON paths to mask, like ``request_body.card.number``
+      or ``request_body.items[*].token``
+    - ``patterns``: regexes masked in every string value (card numbers,
+      JWTs and bearer tokens by default; card numbers must pass Luhn)
+    - ``headers``: headers whose values are hashed when they identify the
+      client (``header:x-api-key:<value>``), so clients stay distinguishable;
+      none by default (pass ``HEADERS`` for the usual credential headers)
+
+    Rules are compiled once. With buffered writes, records go through
+    ``redact_batch()`` in the background writer, off the request path.
+    Captured request bodies are only parsed when their text could match a
+    rule (or a path targets request_body).
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str] = KEYS,
+        paths: Iterable[str] = (),
+        patterns: Iterable[str] = PATTERNS,
+        headers: Iterable[str] = (),
+        mask: str = "***",
+    ):
+        self.keys = tuple(keys)
+        self.paths = tuple(paths)
+        self.patterns = tuple(patterns)
+        self.headers = frozenset(name.lower() for name in headers)
+        self.mask = mask
+
+        self._paths = [_parse_path(path) for path in self.paths]
+        self._parse_bodies = any(field == "request_body" for field, _ in self._paths)
+        self._value_res = [
+            (re.compile(pattern), pattern == CARD_NUMBER) for pattern in self.patterns
+        ]
+
+        self._key_re = self._json_key_re = self._query_key_re = None
+        if self.keys:
+            self._key_re = re.compile(
+                "|".join(_glob_regex(key, ".*") for key in self.keys)
+            )
+            names = "|".join(_glob_regex(key, r"[\w.-]*") for key in self.keys)
+            # "key": value in JSON text (such as a truncated body)
+            self._json_key_re = re.compile(
+                rf'("(?:{names})"\s*:\s*)("(?:[^"\\]|\\.)*"|[^,}}\]\s]*)', re.I
+            )
+            # key=value in query strings and form bodies
+            self._query_key_re = re.compile(
+                rf"((?:^|[?&;])(?:{names})=)([^&#;]*)", re.I
+            )
+        # Strings no check matches are left alone without further work
+        self._checks = [regex for regex, _ in self._value_res]
+        if self._key_re is not None:
+            self._checks += [self._json_key_re, self._query_key_re]
+        self._is_secret_key = lru_cache(maxsize=4096)(self._match_key)
+
+    def redact(self, log_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Mask a log record in place and return it."""
+        for name in _TEXT_FIELDS:
+            value = log_data.get(name)
+            if isinstance(value, str):
+                log_data[name] = self._scrub_text(value)
+
+        body = log_data.get("request_body")
+        if isinstance(body, CapturedBody) and (
+            self._parse_bodies or self._could_match(body.text)
+        ):
+            # Otherwise nothing can match and the body is stored as it arrived
+            log_data["request_body"] = body.value
+        for name in _JSON_FIELDS:
+            value = log_data.get(name)
+            if isinstance(value, (dict, list, str)):
+                log_data[name] = self._scrub(value)
+
+        for field, segments in self._paths:
+            value = log_data.get(field)
+            if isinstance(value, (dict, list)):
+                self._mask_path(value, segments)
+
+        identifier = log_data.get("client_identifier")
+        if identifier:
+            log_data["client_identifier"] = self._scrub_identifier(identifier)
+        return log_data
+
+    def redact_batch(self, batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Mask a batch of log records in place and return it."""
+        for log_data in batch:
+            self.redact(log_data)
+        return batch
+
+    def _could_match(self, text: str) -> bool:
+        return any(regex.search(text) for regex in self._checks)
+
+    def _match_key(self, key: str) -> bool:
+        return self._key_re is not None and bool(self._key_re.fullmatch(key.lower()))
+
+    def _scrub(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if isinstance(key, str) and self._is_secret_key(key):
+                    value[key] = self.mask
+                else:
+                    value[key] = self._scrub(item)
+            return value
+        if isinstance(value, list):
+            value[:] = [self._scrub(item) for item in value]
+            return value
+        if isinstance(value, str):
+            return self._scrub_text(value)
+        if isinstance(value, int) and value >= 10**12:
+            # Card numbers also arrive as JSON numbers
+            text = str(value)
+            return self.mask if self._scrub_text(text) != text else value
+        return value
+
+    def _scrub_text(self, text: str) -> str:
+        if not self._could_match(text):
+            return text
+        mask = self.mask
+        for regex, luhn in self._value_res:
+            text = regex.sub(self._mask_card if luhn else lambda m: mask, text)
+        if self._json_key_re is not None:
+            text = self._json_key_re.sub(lambda m: f'{m.group(1)}"{mask}"', text)
+            text = self._query_key_re.sub(lambda m: m.group(1) + mask, text)
+        return text
+
+    def _mask_card(self, match: "re.Match") -> str:
+        digits = re.sub(r"\D", "", match.group())
+        return self.mask if _luhn_valid(digits) else match.group()
+
+    def _mask_path(self, node: Any, segments: Tuple[str, ...]) -> None:
+        head, rest = segments[0], segments[1:]
+        if isinstance(node, dict):
+            targets = list(node) if head == "*" else [head] if head in node else []
+        elif isinstance(node, list):
+            if head == "*":
+                targets = range(len(node))
+            elif head.isdigit() and int(head) < len(node):
+                targets = [int(head)]
+            else:
+                targets = []
+        else:
+            return
+        for target in targets:
+            if rest:
+                self._mask_path(node[target], rest)
+            else:
+                node[target] = self.mask
+
+    def _scrub_identifier(self, identifier: str) -> str:
+        kind, _, rest = identifier.partition(":")
+        if kind == "header":
+            name, _, value = rest.partition(":")
+            if name in self.headers:
+                return f"header:{name}:{_hash(value)}"
+        return identifier
+
+
+def _hash(value: str) -> str:
+    """Short SHA-256 of a value, so masked clients can still be told apart."""
+    return hashlib.sha256(value.encode()).hexdigest()[:16]
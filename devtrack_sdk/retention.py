@@ -0,0 +1,172 @@
+import atexit
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+
+class RetentionScheduler:
+    """
+    Background thread that keeps the database bounded.
+
+    Every ``interval`` seconds (and once on start) it applies the configured
+    policies, in this order:
+
+    - ``archive_after_days``: move older logs into Parquet partitions
+      (needs a DevTrackDB with an archive_dir)
+    - ``max_age_days``: delete raw logs and archived partitions older than this
+    - ``max_rows``: keep only the newest raw logs
+    - ``rollup_max_age_days``: delete per-minute rollups older than this
+    - ``max_file_size_mb``: delete the oldest raw logs until the data fits
+
+    Raw logs are deleted without touching the rollups, so metrics keep
+    covering them until the rollups themselves age out. Each run ends with a
+    CHECKPOINT, and with a copy-compaction once at least
+    ``compact_min_free_mb`` of the file is free space. Pruning for
+    ``max_file_size_mb`` always compacts, since DuckDB keeps the space of
+    deleted rows until their row group is rewritten.
+    """
+
+    # Fraction of the file that must be free before compacting
+    COMPACT_MIN_FREE_RATIO = 0.5
+    # Size pruning aims this far below max_file_size_mb to avoid pruning
+    # a little on every run
+    SIZE_HEADROOM = 0.9
+
+    def __init__(
+        self,
+        db,
+        max_age_days: Optional[int] = None,
+        max_rows: Optional[int] = None,
+        max_file_size_mb: Optional[float] = None,
+        archive_after_days: Optional[int] = None,
+        rollup_max_age_days: Optional[int] = None,
+        interval: float = 3600.0,
+        compact_min_free_mb: Optional[float] = 64.0,
+        start: bool = True,
+    ):
+        for name, value in (
+            ("max_age_days", max_age_days),
+            ("max_rows", max_rows),
+            ("archive_after_days", archive_after_days),
+            ("rollup_max_age_days", rollup_max_age_days),
+        ):
+            if value is not None and value < 0:
+                raise ValueError(f"{name} must be >= 0")
+        if max_file_size_mb is not None and max_file_size_mb <= 0:
+            raise ValueError("max_file_size_mb must be > 0")
+        if interval <= 0:
+            raise ValueError("interval must be > 0")
+
+        self.db = db
+        self.max_age_days = max_age_days
+        self.max_rows = max_rows
+        self.max_file_size_mb = max_file_size_mb
+        self.archive_after_days = archive_after_days
+        self.rollup_max_age_days = rollup_max_age_days
+        self.interval = interval
+        self.compact_min_free_mb = compact_min_free_mb
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._runs = 0
+        self._failures = 0
+        self._last_run: Optional[str] = None
+        self._last_result: Dict[str, Any] = {}
+        # Size pruning waits for a compaction that failed, so the stale size
+        # doesn't make it prune again
+        self._compaction_pending = False
+
+        self._thread = None
+        if start:
+            self.start()
+
+    def start(self) -> None:
+        """Start the background thread (done by __init__ unless start=False)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="devtrack-retention", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the background thread, letting a run in progress finish."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get scheduler counters and the outcome of the last run."""
+        with self._lock:
+            return {
+                "runs": self._runs,
+                "failures": self._failures,
+                "last_run": self._last_run,
+                "last_result": dict(self._last_result),
+            }
+
+    def run_once(self) -> Dict[str, Any]:
+        """Apply every configured policy now and return what was done."""
+        db = self.db
+        now = datetime.now(timezone.utc)
+        result = {"archived": 0, "pruned": 0, "rollups_pruned": 0, "compacted": False}
+
+        if self.archive_after_days is not None:
+            result["archived"] = db.archive_logs(
+                now - timedelta(days=self.archive_after_days)
+            )
+        if self.max_age_days is not None:
+            result["pruned"] += db.prune_logs(
+                before=now - timedelta(days=self.max_age_days)
+            )
+        if self.max_rows is not None:
+            result["pruned"] += db.prune_logs(keep_rows=self.max_rows)
+        if self.rollup_max_age_days is not None:
+            result["rollups_pruned"] = db.prune_rollups(
+                now - timedelta(days=self.rollup_max_age_days)
+            )
+
+        db.checkpoint()
+        storage = db.get_storage_info()
+        compact = self._compaction_pending
+        if self.max_file_size_mb is not None and not compact:
+            limit = self.max_file_size_mb * 1024 * 1024
+            if storage["used_bytes"] > limit and storage["rows"]:
+                # Assume raw logs dominate the file and shrink them to fit
+                keep = int(
+                    storage["rows"] * limit * self.SIZE_HEADROOM / storage["used_bytes"]
+                )
+                result["pruned"] += db.prune_logs(keep_rows=keep)
+                compact = True
+        size_compaction = compact
+
+        if self.compact_min_free_mb is not None and storage["file_bytes"]:
+            free = storage["free_bytes"]
+            compact = compact or (
+                free >= self.compact_min_free_mb * 1024 * 1024
+                and free / storage["file_bytes"] >= self.COMPACT_MIN_FREE_RATIO
+            )
+        if compact:
+            result["compacted"] = db.compact()
+            if not result["compacted"]:
+                result["compact_blocked_by"] = db.compact_blocked_by
+            storage = db.get_storage_info()
+
+        result["file_bytes"] = storage["file_bytes"]
+        with self._lock:
+            self._runs += 1
+            self._last_run = now.isoformat()
+            self._last_result = result
+            self._compaction_pending = size_compaction and not result["compacted"]
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                with self._lock:
+                    self._failures += 1
+                print(f"[DevTrackRetention] Retention run failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,241 @@
+import atexit
+import math
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+
+class Sampler:
+    """
+    Decides which request logs to keep.
+
+    - ``rate``: fraction of requests kept by default
+    - ``path_rates``: per-``path_pattern`` rates overriding ``rate``
+    - ``keep_errors``: always keep requests with status >= 400
+    - ``slow_ms``: always keep requests at least this slow
+    - ``target_rows_per_sec``: scale the rates down when sampled traffic
+      would exceed this budget (re-evaluated every ``adjust_interval``)
+
+    A kept log gets a ``sample_weight``: the number of requests it stands
+    for. Rates are rounded down to 1/N so weights stay whole numbers and
+    weighted counts remain unbiased. Errors and slow requests are kept with
+    weight 1 and count against the budget first.
+    """
+
+    # Lowest scale the budget can push rates down to
+    MIN_SCALE = 1e-4
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        path_rates: Optional[Dict[str, float]] = None,
+        keep_errors: bool = True,
+        slow_ms: Optional[float] = None,
+        target_rows_per_sec: Optional[float] = None,
+        adjust_interval: float = 1.0,
+        seed: Optional[int] = None,
+    ):
+        path_rates = dict(path_rates or {})
+        for name, value in [("rate", rate)] + [
+            (f"path_rates[{path!r}]", value) for path, value in path_rates.items()
+        ]:
+            if not 0 <= value <= 1:
+                raise ValueError(f"{name} must be between 0 and 1")
+        if target_rows_per_sec is not None and target_rows_per_sec <= 0:
+            raise ValueError("target_rows_per_sec must be > 0")
+        if adjust_interval <= 0:
+            raise ValueError("adjust_interval must be > 0")
+
+        self.rate = rate
+        self.path_rates = path_rates
+        self.keep_errors = keep_errors
+        self.slow_ms = slow_ms
+        self.target_rows_per_sec = target_rows_per_sec
+        self.adjust_interval = adjust_interval
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scale = 1.0
+        # Traffic seen since the scale was last adjusted
+        self._window_start = time.monotonic()
+        self._window_forced = 0
+        self._window_demand = 0.0
+
+        self._seen = 0
+        self._kept = 0
+        self._forced_count = 0
+
+    def _always_keep(self, log_data: Dict[str, Any]) -> bool:
+        """Whether the request is always kept (errors and slow requests)."""
+        status_code = log_data.get("status_code") or 0
+        if self.keep_errors and status_code >= 400:
+            return True
+        duration_ms = log_data.get("duration_ms")
+        return (
+            self.slow_ms is not None
+            and duration_ms is not None
+            and duration_ms >= self.slow_ms
+        )
+
+    def _adjust(self, now: float) -> None:
+        """Fit the configured rates to the budget. Caller holds the lock."""
+        elapsed = now - self._window_start
+        if elapsed < self.adjust_interval:
+            return
+        budget = self.target_rows_per_sec - self._window_forced / elapsed
+        demand = self._window_demand / elapsed
+        if demand > 0:
+            self._scale = min(1.0, max(self.MIN_SCALE, budget / demand))
+        self._window_start = now
+        self._window_forced = 0
+        self._window_demand = 0.0
+
+    def sample(self, log_data: Dict[str, Any]) -> bool:
+        """Decide whether to keep a log, setting its sample_weight if kept."""
+        forced = self._always_keep(log_data)
+        base_rate = self.path_rates.get(log_data.get("path_pattern"), self.rate)
+        with self._lock:
+            self._seen += 1
+            if self.target_rows_per_sec is not None:
+                self._adjust(time.monotonic())
+                if forced:
+                    self._window_forced += 1
+                else:
+                    self._window_demand += base_rate
+            scale = self._scale
+
+            if forced:
+                weight = 1
+                self._forced_count += 1
+            else:
+                rate = base_rate * scale
+                if rate <= 0:
+                    return False
+                # Round the rate down to 1/N so the weight is a whole number
+                weight = max(1, math.ceil(1 / rate - 1e-9))
+                if weight > 1 and self._random.random() * weight >= 1:
+                    return False
+            self._kept += 1
+
+        log_data["sample_weight"] = weight
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Get sampler counters and the current budget scale."""
+        with self._lock:
+            return {
+                "seen": self._seen,
+                "kept": self._kept,
+                "dropped": self._seen - self._kept,
+                "forced": self._forced_count,
+                "scale": self._scale,
+            }
+
+
+class RequestCounter:
+    """
+    Exact per-minute request counts, kept in memory and flushed periodically.
+
+    Counts every request by minute, path_pattern, method and status class,
+    whether or not its log was sampled, and adds them to the database's
+    ``request_counts`` table every ``flush_interval`` seconds.
+    """
+
+    def __init__(self, db, flush_interval: float = 10.0):
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be > 0")
+        self.db = db
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._flushed = 0
+        self._failures = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="devtrack-counter", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _key(log_data: Dict[str, Any]) -> Tuple[str, str, str, int]:
+        timestamp = log_data.get("timestamp") or datetime.now(timezone.utc).isoformat()
+        if hasattr(timestamp, "isoformat"):
+            timestamp = timestamp.isoformat()
+        status_code = log_data.get("status_code") or 0
+        return (
+            timestamp[:16],  # YYYY-MM-DDTHH:MM
+            log_data.get("path_pattern") or "",
+            log_data.get("method") or "",
+            status_code // 100,
+        )
+
+    def add(self, log_data: Dict[str, Any]) -> None:
+        """Count one request."""
+        key = self._key(log_data)
+        with self._lock:
+            self._counts[key] += 1
+
+    def flush(self) -> int:
+        """Write the pending counts; returns the number of requests flushed."""
+        with self._lock:
+            counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        try:
+            self.db.add_request_counts(
+                [
+                    {
+                        "minute": minute,
+                        "path_pattern": path_pattern,
+                        "method": method,
+                        "status_class": status_class,
+                        "request_count": count,
+                    }
+                    for (minute, path_pattern, method, status_class), count in (
+                        counts.items()
+                    )
+                ]
+            )
+        except Exception:
+            # Keep the counts for the next flush
+            with self._lock:
+                self._counts.update(counts)
+                self._failures += 1
+            raise
+        total = sum(counts.values())
+        with self._lock:
+            self._flushed += total
+        return total
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the flush thread and write whatever is still pending."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"[DevTrackCounter] Final flush failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        """Get counter totals (pending, flushed, failures)."""
+        with self._lock:
+            return {
+                "pending": sum(self._counts.values()),
+                "flushed": self._flushed,
+                "failures": self._failures,
+            }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[DevTrackCounter] Flush failed: {e}")
@@ -0,0 +1,110 @@
+import json
+import os
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# JSON libraries in order of preference; "json" is the standard library
+BACKENDS = ("orjson", "msgspec", "json")
+
+Default = Optional[Callable[[Any], Any]]
+
+
+def _json_dumps(obj: Any, default: Default = None) -> bytes:
+    return json.dumps(obj, default=default).encode("utf-8")
+
+
+def _json_loads(data: Union[str, bytes]) -> Any:
+    return json.loads(data)
+
+
+def _orjson_dumps(obj: Any, default: Default = None) -> bytes:
+    try:
+        return orjson.dumps(obj, default=default, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # orjson refuses a few things json accepts, like integers over 64 bits
+        return _json_dumps(obj, default)
+
+
+def _msgspec_dumps(obj: Any, default: Default = None) -> bytes:
+    try:
+        return msgspec.json.encode(obj, enc_hook=default)
+    except (TypeError, OverflowError, msgspec.EncodeError):
+        return _json_dumps(obj, default)
+
+
+def _msgspec_loads(data: Union[str, bytes]) -> Any:
+    try:
+        return msgspec.json.decode(data)
+    except msgspec.DecodeError as e:
+        # Callers handle invalid JSON as ValueError, like json.JSONDecodeError
+        raise ValueError(str(e)) from None
+
+
+# Backend name -> (module, None if not installed; dumps; loads)
+_IMPLEMENTATIONS = {
+    "orjson": (orjson, _orjson_dumps, getattr(orjson, "loads", None)),
+    "msgspec": (msgspec, _msgspec_dumps, _msgspec_loads),
+    "json": (json, _json_dumps, _json_loads),
+}
+
+_backend = "json"
+_dumps = _json_dumps
+_loads = _json_loads
+
+
+def json_default(value: Any) -> Any:
+    """``default`` for API payloads: datetimes as ISO 8601, anything else as str."""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def set_backend(name: Optional[str] = None) -> str:
+    """
+    Choose the JSON library used for log records and API responses.
+
+    With no name, the fastest installed one of BACKENDS is used. Returns the
+    backend now in use. Raises ValueError for an unknown or missing library.
+    """
+    global _backend, _dumps, _loads
+    if name is None:
+        name = next(n for n in BACKENDS if _IMPLEMENTATIONS[n][0] is not None)
+    if name not in _IMPLEMENTATIONS:
+        raise ValueError(f"JSON backend must be one of {', '.join(BACKENDS)}")
+    module, dumps_impl, loads_impl = _IMPLEMENTATIONS[name]
+    if module is None:
+        raise ValueError(f"JSON backend {name!r} is not installed")
+    _backend, _dumps, _loads = name, dumps_impl, loads_impl
+    return name
+
+
+def backend() -> str:
+    """The name of the JSON library in use."""
+    return _backend
+
+
+def dumps_bytes(obj: Any, default: Default = None) -> bytes:
+    """Encode obj as UTF-8 JSON; ``default`` converts unsupported objects."""
+    return _dumps(obj, default)
+
+
+def dumps(obj: Any, default: Default = None) -> str:
+    """Encode obj as JSON text; ``default`` converts unsupported objects."""
+    return _dumps(obj, default).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text or bytes. Raises ValueError for invalid JSON."""
+    return _loads(data)
+
+
+set_backend(os.environ.get("DEVTRACK_JSON_BACKEND") or None)
@@ -0,0 +1,141 @@
+import math
+import struct
+from typing import Dict, Iterable, Optional, Tuple
+
+# Default sketch parameters. The latency rollup tables use the same mapping,
+# so sketches read from the database merge with ones built in Python.
+RELATIVE_ACCURACY = 0.01
+MIN_VALUE = 0.001  # Values at or below this share the lowest bucket
+
+_HEADER = struct.Struct(">BdQ")  # version, relative accuracy, bucket count
+_VERSION = 1
+
+
+def _write_varint(value: int, out: bytearray) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+class DDSketch:
+    """
+    Mergeable quantile sketch with a relative error guarantee (DDSketch).
+
+    Values are counted in logarithmic buckets: bucket ``i`` holds values in
+    ``(gamma^(i-1), gamma^i]`` where ``gamma = (1 + a) / (1 - a)``. Any
+    quantile returned is within a relative error ``a`` (1% by default) of
+    the true value at that rank, however many values were added, and two
+    sketches with the same accuracy merge exactly by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+
+    @classmethod
+    def from_buckets(
+        cls,
+        buckets: Iterable[Tuple[int, int]],
+        relative_accuracy: float = RELATIVE_ACCURACY,
+    ) -> "DDSketch":
+        """Build a sketch from (bucket, count) pairs, e.g. rollup rows."""
+        sketch = cls(relative_accuracy)
+        for key, count in buckets:
+            sketch.buckets[key] = sketch.buckets.get(key, 0) + count
+            sketch.count += count
+        return sketch
+
+    def key(self, value: float) -> int:
+        """Bucket index for a value."""
+        return math.ceil(math.log(max(value, MIN_VALUE)) / self._log_gamma)
+
+    def value(self, key: int) -> float:
+        """Representative value of a bucket (within relative_accuracy of it)."""
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1) -> None:
+        key = self.key(value)
+        self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        """Add another sketch's counts into this one."""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += other.count
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate the q-quantile (0 <= q <= 1), or None if the sketch is empty."""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        cumulative = 0
+        for key in sorted(self.buckets):
+            cumulative += self.buckets[key]
+            if cumulative > rank:
+                return self.value(key)
+        return self.value(max(self.buckets))
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize compactly: a fixed header, then for each bucket (in key
+        order) the zigzag varint delta from the previous key and a varint
+        count. Dense latency sketches take 2-3 bytes per bucket.
+        """
+        out = bytearray(
+            _HEADER.pack(_VERSION, self.relative_accuracy, len(self.buckets))
+        )
+        previous = 0
+        for key in sorted(self.buckets):
+            delta = key - previous
+            _write_varint((delta << 1) ^ (delta >> 63), out)
+            _write_varint(self.buckets[key], out)
+            previous = key
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "DDSketch":
+        version, relative_accuracy, size = _HEADER.unpack_from(data)
+        if version != _VERSION:
+            raise ValueError(f"Unsupported sketch version: {version}")
+        sketch = cls(relative_accuracy)
+        offset = _HEADER.size
+        key = 0
+        for _ in range(size):
+            zigzag, offset = _read_varint(data, offset)
+            count, offset = _read_varint(data, offset)
+            key += (zigzag >> 1) ^ -(zigzag & 1)
+            sketch.buckets[key] = count
+            sketch.count += count
+        return sketch
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __repr__(self) -> str:
+        return (
+            f"DDSketch(count={self.count}, buckets={len(self.buckets)}, "
+            f"relative_accuracy={self.relative_accuracy})"
+        )
@@ -0,0 +1,58 @@
+from time import perf_counter_ns
+from typing import Dict, Optional
+
+
+def _ms(ns: Optional[int]) -> Optional[float]:
+    return None if ns is None else round(ns / 1_000_000, 3)
+
+
+class RequestTimer:
+    """
+    Monotonic timestamps of one request's phases, from time.perf_counter_ns.
+
+    - ``duration_ms``: from the middleware seeing the request to the last
+      response byte being handed to the server
+    - ``ttfb_ms``: until the first response byte
+    - ``send_ms``: from the response starting to the last byte (the body
+      send time, mostly streaming)
+    - ``overhead_ms``: time DevTrack itself spent on the request, added up
+      with ``add_overhead()``
+    """
+
+    __slots__ = ("start", "response_start", "first_byte", "end", "overhead")
+
+    def __init__(self):
+        self.start = perf_counter_ns()
+        self.response_start: Optional[int] = None
+        self.first_byte: Optional[int] = None
+        self.end: Optional[int] = None
+        self.overhead = 0
+
+    def mark_response_start(self) -> None:
+        if self.response_start is None:
+            self.response_start = perf_counter_ns()
+
+    def mark_first_byte(self) -> None:
+        if self.first_byte is None:
+            self.first_byte = perf_counter_ns()
+
+    def finish(self) -> None:
+        if self.end is None:
+            self.end = perf_counter_ns()
+
+    def add_overhead(self, since: int) -> None:
+        """Count the time since a perf_counter_ns() reading as overhead."""
+        self.overhead += perf_counter_ns() - since
+
+    def phases(self) -> Dict[str, Optional[float]]:
+        """The phase durations in milliseconds (None when not observed)."""
+        end = self.end if self.end is not None else perf_counter_ns()
+        first_byte = self.first_byte
+        return {
+            "duration_ms": _ms(end - self.start),
+            "ttfb_ms": _ms(None if first_byte is None else first_byte - self.start),
+            "send_ms": _ms(
+                None if self.response_start is None else end - self.response_start
+            ),
+            "overhead_ms": _ms(self.overhead),
+        }
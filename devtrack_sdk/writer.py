@@ -0,0 +1,195 @@
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List
+
+
+class LogWriter:
+    """
+    Background writer that moves log inserts off the request path.
+
+    Requests hand their log dict to ``submit()``, which only appends to a
+    bounded in-memory queue. A dedicated daemon thread drains the queue in
+    batches, masks them with ``redactor`` (a Redactor, if given) and writes
+    them to the database.
+
+    Overflow policies (applied when the queue is full):
+    - ``drop_oldest``: discard the oldest queued record to make room
+    - ``drop_newest``: discard the record being submitted
+    - ``block``: wait until the writer frees up space
+    """
+
+    OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "block")
+
+    def __init__(
+        self,
+        db,
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        overflow_policy: str = "drop_oldest",
+        redactor=None,
+    ):
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(
+                f"overflow_policy must be one of {', '.join(self.OVERFLOW_POLICIES)}"
+            )
+        if max_queue_size < 1:
+            raise ValueError("max_queue_size must be >= 1")
+        if batch_size < 1:
+            raise ValueError("batch_size must be >= 1")
+        if flush_interval <= 0:
+            raise ValueError("flush_interval must be > 0")
+
+        self.db = db
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.redactor = redactor
+
+        self._queue: deque = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._pending = 0  # Records queued or currently being written
+        self._flush_requested = False
+        self._closed = False
+
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+
+        self._thread = threading.Thread(
+            target=self._run, name="devtrack-writer", daemon=True
+        )
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, log_data: Dict[str, Any]) -> bool:
+        """Queue a log record for writing. Returns False if it was dropped."""
+        with self._lock:
+            if self._closed:
+                self._dropped += 1
+                return False
+
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow_policy == "drop_newest":
+                    self._dropped += 1
+                    return False
+                elif self.overflow_policy == "drop_oldest":
+                    self._queue.popleft()
+                    self._pending -= 1
+                    self._dropped += 1
+                else:
+                    while len(self._queue) >= self.max_queue_size and not self._closed:
+                        self._not_full.wait()
+                    if self._closed:
+                        self._dropped += 1
+                        return False
+
+            self._queue.append(log_data)
+            self._pending += 1
+            if len(self._queue) >= self.batch_size:
+                self._not_empty.notify()
+        return True
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every queued record has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._flush_requested = True
+            self._not_empty.notify()
+            while self._pending > 0 and self._thread.is_alive():
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._drained.wait(remaining)
+            return self._pending == 0
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread after draining the queue."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, int]:
+        """Get writer counters (queued, written, dropped, failed)."""
+        with self._lock:
+            return {
+                "queued": len(self._queue),
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Wait for a full batch, the flush interval, a flush() or close()."""
+        deadline = time.monotonic() + self.flush_interval
+        with self._lock:
+            while (
+                len(self._queue) < self.batch_size
+                and not self._flush_requested
+                and not self._closed
+            ):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_empty.wait(remaining)
+
+            count = min(len(self._queue), self.batch_size)
+            batch = [self._queue.popleft() for _ in range(count)]
+            if not self._queue:
+                self._flush_requested = False
+            if batch:
+                self._not_full.notify_all()
+            return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """Redact a batch and write it in one insert, retrying per record."""
+        written = 0
+        failed = 0
+        try:
+            if self.redactor is not None:
+                self.redactor.redact_batch(batch)
+        except Exception as e:
+            # Records that may still hold secrets are never written
+            print(f"[DevTrackWriter] Redaction error, dropping batch: {e}")
+            failed = len(batch)
+        else:
+            try:
+                self.db.insert_logs(batch)
+                written = len(batch)
+            except Exception as e:
+                print(f"[DevTrackWriter] Batch write error, retrying per record: {e}")
+                for log_data in batch:
+                    try:
+                        self.db.insert_log(log_data)
+                        written += 1
+                    except Exception as e:
+                        failed += 1
+                        print(f"[DevTrackWriter] Write error: {e}")
+
+        with self._lock:
+            self._written += written
+            self._failed += failed
+            self._pending -= len(batch)
+            if self._pending <= 0:
+                self._drained.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+                continue
+            with self._lock:
+                if self._closed and not self._queue:
+                    self._drained.notify_all()
+                    return
@@ -2,16 +2,54 @@
 Pytest configuration for DevTrack SDK tests
 """
 
+import uuid
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
 import pytest
 import requests
 
+from devtrack_sdk.database import init_db
+
 # Ignore test_wsgi.py during pytest collection
 # It's a WSGI configuration file, not a test file
 collect_ignore = ["test_wsgi.py"]
 
 
+def make_log(minutes_ago=0, **overrides):
+    """A complete log record from ``minutes_ago`` minutes ago; overrides win."""
+    timestamp = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    log = {
+        "path": "/api/items/1",
+        "path_pattern": "/api/items/{item_id}",
+        "method": "GET",
+        "status_code": 200,
+        "timestamp": timestamp.isoformat(),
+        "client_ip": "127.0.0.1",
+        "duration_ms": 12.5,
+        "user_agent": "pytest",
+        "referer": "",
+        "query_params": {"q": "x"},
+        "path_params": {"item_id": "1"},
+        "request_body": {},
+        "response_size": 42,
+        "user_id": None,
+        "role": None,
+        "trace_id": str(uuid.uuid4()),
+        "client_identifier": "ip:127.0.0.1",
+    }
+    log.update(overrides)
+    return log
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A writable database in the test's temporary directory."""
+    db = init_db(str(tmp_path / "devtrack.db"), read_only=False)
+    yield db
+    db.close()
+
+
 @pytest.fixture(autouse=True)
 def mock_network_requests():
     """
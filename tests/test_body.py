@@ -0,0 +1,95 @@
+"""
+Tests for request body capture
+"""
+
+import json
+
+import pytest
+
+from devtrack_sdk.body import BodyCapture, CapturedBody
+from devtrack_sdk.database import init_db
+
+
+def test_body_is_parsed_only_when_read():
+    body = BodyCapture().capture(b'{"name": "a"}', "application/json")
+    assert body.to_json() == '{"name": "a"}'
+    assert body.truncated is False
+
+    body.value["name"] = "b"
+    # Once read (and possibly changed) the parsed value is what's stored
+    assert json.loads(body.to_json()) == {"name": "b"}
+
+
+def test_truncated_body_is_a_slice_of_the_original():
+    raw = b'{"items": [' + b"1, " * 100 + b"1]}"
+    body = BodyCapture(max_bytes=16).capture(raw, "application/json")
+
+    assert isinstance(body.data, memoryview) and body.data.obj is raw
+    assert body.size == len(raw) and body.truncated
+    assert body.value == '{"items": [1, 1,'
+
+    body.detach()
+    assert body.data == raw[:16] and isinstance(body.data, bytes)
+
+
+def test_chunked_body_buffer():
+    buffer = BodyCapture(max_bytes=6).buffer("text/plain")
+    for chunk in (b"abcd", b"efgh", b"ijkl"):
+        buffer.add(chunk)
+    body = buffer.body()
+    assert (body.text, body.size) == ("abcdef", 12)
+    assert BodyCapture().buffer("application/json").body() is None
+
+
+def test_form_bodies_parse_to_value_lists():
+    body = BodyCapture().capture(
+        b"name=a&tag=x&tag=y", "application/x-www-form-urlencoded"
+    )
+    assert body.value == {"name": ["a"], "tag": ["x", "y"]}
+
+
+def test_content_type_and_path_selection():
+    capture = BodyCapture(
+        content_types=["application/json"], paths=["/api/orders*", "/webhooks/*"]
+    )
+    assert capture.wants("/api/orders/1", "application/json; charset=utf-8") == (
+        "application/json"
+    )
+    assert capture.wants("/webhooks/stripe", "application/json")
+    assert capture.wants("/api/users", "application/json") is None
+    assert capture.wants("/api/orders", "text/plain") is None
+    assert BodyCapture(paths=[]).wants("/", "application/json") is None
+    assert BodyCapture(max_bytes=0).wants("/", "application/json") is None
+
+
+def test_captured_bodies_are_stored(tmp_path):
+    db = init_db(str(tmp_path / "bodies.db"), read_only=False)
+    capture = BodyCapture(max_bytes=8)
+    bodies = [
+        capture.capture(b'{"a": 1}', "application/json"),
+        capture.capture(b'{"a": 1, "b": 2}', "application/json"),
+        capture.capture(b"not json", "application/json"),
+    ]
+    log = {
+        "path": "/",
+        "path_pattern": "/",
+        "method": "POST",
+        "status_code": 200,
+        "timestamp": "2026-01-01T00:00:00",
+    }
+
+    for body in bodies:
+        db.insert_log({**log, "request_body": body})
+    db.insert_logs([{**log, "request_body": body} for body in bodies])
+
+    stored = [entry["request_body"] for entry in db.get_all_logs()]
+    assert sorted(map(json.dumps, stored)) == sorted(
+        map(json.dumps, [{"a": 1}, '{"a": 1,', "not json"] * 2)
+    )
+    db.close()
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        BodyCapture(max_bytes=-1)
+    assert repr(CapturedBody(b"x", 1, "text/plain")).startswith("CapturedBody(")
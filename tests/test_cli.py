@@ -1,9 +1,11 @@
 import json
 import os
 import tempfile
-from datetime import datetime
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import MagicMock, patch
 
+import duckdb
 import requests
 from typer.testing import CliRunner
 
@@ -596,6 +598,114 @@ def test_export_json_format():
             os.unlink(out_path)
 
 
+def test_import_json_export():
+    """Test importing entries from a JSON export file."""
+    db_path, db = create_test_db()
+    db.close()
+
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False, mode="w") as f:
+        in_path = f.name
+        json.dump(
+            {
+                "entries": [
+                    {
+                        "id": 7,
+                        "path": f"/api/items/{i}",
+                        "path_pattern": "/api/items/{item_id}",
+                        "method": "GET",
+                        "status_code": 200,
+                        "duration_ms": 10.0,
+                        "timestamp": "2024-01-01T00:00:00",
+                        "query_params": {},
+                        "created_at": "2024-01-01T00:00:00",
+                    }
+                    for i in range(5)
+                ]
+            },
+            f,
+        )
+
+    try:
+        result = runner.invoke(
+            app, ["import", in_path, "--db-path", db_path, "--batch-size", "2"]
+        )
+        assert result.exit_code == 0, f"Import failed: {result.output}"
+        assert "Imported 5 entries" in result.output
+
+        db = DevTrackDB(db_path, read_only=True)
+        assert db.get_logs_count() == 5
+        db.close()
+    finally:
+        for path in (db_path, in_path):
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def test_export_parquet_with_time_range(tmp_path):
+    """Test Parquet export through DuckDB COPY with a time range."""
+    db_path, db = create_test_db(str(tmp_path / "export.db"))
+    db.insert_logs(
+        [
+            {
+                "path": "/api/test",
+                "path_pattern": "/api/test",
+                "method": "GET",
+                "status_code": 200,
+                "duration_ms": 10.0,
+                "timestamp": f"2024-01-0{day}T12:00:00",
+                "query_params": {"day": day},
+            }
+            for day in (1, 2, 3)
+        ]
+    )
+    db.close()
+    out_path = str(tmp_path / "logs.parquet")
+
+    result = runner.invoke(
+        app,
+        [
+            "export",
+            "--db-path",
+            db_path,
+            "--output-file",
+            out_path,
+            "--format",
+            "parquet",
+            "--start",
+            "2024-01-02",
+            "--end",
+            "2024-01-03",
+        ],
+    )
+    assert result.exit_code == 0, f"Parquet export failed: {result.output}"
+    assert "Exported 1 entries" in result.output
+
+    rows = duckdb.sql(f"SELECT query_params FROM '{out_path}'").fetchall()
+    assert [json.loads(row[0]) for row in rows] == [{"day": 2}]
+
+
+def test_export_json_rejects_compression(tmp_path):
+    """--compression only applies to formats DuckDB compresses."""
+    db_path, db = create_test_db(str(tmp_path / "export.db"))
+    db.close()
+
+    result = runner.invoke(
+        app,
+        [
+            "export",
+            "--db-path",
+            db_path,
+            "--output-file",
+            str(tmp_path / "logs.json"),
+            "--compression",
+            "gzip",
+        ],
+    )
+    assert result.exit_code == 2
+    assert "--compression" in result.output
+    assert not (tmp_path / "logs.json").exists()
+
+
 def test_export_csv_format():
     """Test export to CSV format."""
     with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp_db:
@@ -893,6 +1003,80 @@ def test_query_with_method():
             os.unlink(db_path)
 
 
+def test_query_filters_apply_before_the_limit(tmp_path):
+    """--method and --days are applied in SQL, not to the fetched page."""
+    db_path = str(tmp_path / "query.db")
+    db = init_db(db_path, read_only=False)
+    now = datetime.now().isoformat()
+    for path, method, timestamp in (
+        ("/api/old", "POST", "2020-01-01T00:00:00"),
+        ("/api/new", "POST", now),
+        ("/api/get", "GET", now),
+    ):
+        db.insert_log(
+            {
+                "path": path,
+                "method": method,
+                "status_code": 200,
+                "duration_ms": 100,
+                "timestamp": timestamp,
+            }
+        )
+    db.close()
+
+    result = runner.invoke(
+        app,
+        ["query", "--db-path", db_path, "--method", "POST", "--days", "7"]
+        + ["--limit", "1"],
+    )
+    assert result.exit_code == 0, result.output
+    assert "/api/new" in result.output
+    assert "/api/old" not in result.output
+    assert "/api/get" not in result.output
+
+
+def test_query_http_fallback_forwards_filters(tmp_path):
+    """A locked database falls back to the endpoint, which filters server-side."""
+    db_path = str(tmp_path / "locked.db")
+    init_db(db_path, read_only=False).close()
+    entry = {
+        "path": "/api/new",
+        "method": "POST",
+        "status_code": 201,
+        "duration_ms": 100,
+        "timestamp": datetime.now().isoformat(),
+    }
+
+    with (
+        patch(
+            "devtrack_sdk.cli.DevTrackDB",
+            side_effect=duckdb.IOException("Could not set lock on file"),
+        ),
+        patch(
+            "devtrack_sdk.cli.detect_devtrack_endpoint",
+            return_value="http://localhost:8000/__devtrack__/stats",
+        ),
+        patch("requests.get") as mock_get,
+    ):
+        mock_get.return_value = MagicMock(
+            json=MagicMock(return_value={"entries": [entry], "next_cursor": None})
+        )
+        result = runner.invoke(
+            app,
+            ["query", "--db-path", db_path, "--method", "POST", "--days", "7"]
+            + ["--status-code", "201", "--param", "page=2", "--limit", "5"],
+        )
+
+    assert result.exit_code == 0, result.output
+    assert "/api/new" in result.output
+    params = mock_get.call_args.kwargs["params"]
+    assert params["method"] == "POST"
+    assert params["status_code"] == 201
+    assert params["param"] == ["page=2"]
+    assert params["limit"] == 5
+    assert datetime.fromisoformat(params["since"]) < datetime.now(timezone.utc)
+
+
 def test_query_with_days():
     """Test query with days filter."""
     with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as tmp:
@@ -1141,3 +1325,96 @@ def test_version_command_detailed():
     assert result.exit_code == 0, "Version command failed"
     assert "DevTrack SDK" in result.output
     assert "Version" in result.output or "Framework Support" in result.output
+
+
+def test_archive_command(tmp_path):
+    """Test moving old logs into Parquet partitions."""
+    db_path, db = create_test_db(str(tmp_path / "archive.db"))
+    db.insert_logs(
+        [
+            {
+                "path": "/api/test",
+                "method": "GET",
+                "status_code": 200,
+                "timestamp": f"2024-01-0{day}T12:00:00",
+            }
+            for day in (1, 2)
+        ]
+    )
+    db.close()
+    archive_dir = str(tmp_path / "archive")
+
+    result = runner.invoke(app, ["archive", archive_dir, "--db-path", db_path])
+    assert result.exit_code == 0, f"Archive failed: {result.output}"
+    assert "Archived 2 logs" in result.output
+    assert "2024-01-01" in result.output
+
+    result = runner.invoke(
+        app,
+        ["archive", archive_dir, "--db-path", db_path, "--drop-older-than-days", "1"],
+    )
+    assert result.exit_code == 0, f"Drop failed: {result.output}"
+    assert "Dropped 2 archived logs" in result.output
+
+
+def test_archive_cutoff_is_utc(tmp_path, monkeypatch):
+    """The cutoff doesn't shift with the host's local time zone."""
+    db_path, db = create_test_db(str(tmp_path / "archive.db"))
+    two_hours_ago = datetime.now(timezone.utc) - timedelta(hours=2)
+    db.insert_logs(
+        [
+            {
+                "path": "/api/test",
+                "method": "GET",
+                "status_code": 200,
+                "timestamp": two_hours_ago.isoformat(),
+            }
+        ]
+    )
+    db.close()
+
+    # Local time 12 hours behind UTC
+    monkeypatch.setenv("TZ", "Etc/GMT+12")
+    time.tzset()
+    try:
+        result = runner.invoke(
+            app,
+            [
+                "archive",
+                str(tmp_path / "archive"),
+                "--db-path",
+                db_path,
+                "--partition-by",
+                "hour",
+                "--older-than-days",
+                "0",
+            ],
+        )
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+    assert result.exit_code == 0, f"Archive failed: {result.output}"
+    assert "Archived 1 logs" in result.output
+
+
+def test_retention_command_once(tmp_path):
+    """Test a single retention pass from the CLI."""
+    db_path, db = create_test_db(str(tmp_path / "retention.db"))
+    db.insert_logs(
+        [
+            {
+                "path": "/api/test",
+                "method": "GET",
+                "status_code": 200,
+                "timestamp": f"2024-01-0{day}T12:00:00",
+            }
+            for day in (1, 2)
+        ]
+    )
+    db.close()
+
+    result = runner.invoke(
+        app, ["retention", "--db-path", db_path, "--max-age-days", "30", "--once"]
+    )
+    assert result.exit_code == 0, f"Retention failed: {result.output}"
+    assert "pruned 2 logs" in result.output
@@ -0,0 +1,207 @@
+"""
+Tests for the single-writer collector used by multi-worker deployments
+"""
+
+import multiprocessing
+import os
+import socket
+import stat
+import tempfile
+import threading
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from devtrack_sdk import database
+from devtrack_sdk.body import JSON_TYPE, CapturedBody
+from devtrack_sdk.collector import CollectorClient, LogCollector, recv_message
+from devtrack_sdk.database import get_db
+from devtrack_sdk.middleware.base import DevTrackMiddleware
+from tests.conftest import make_log
+
+
+@pytest.fixture
+def collector(tmp_path):
+    # Unix socket paths are limited to ~100 bytes, so keep them short
+    socket_path = os.path.join(tempfile.gettempdir(), f"dt-{uuid.uuid4().hex}.sock")
+    log_collector = LogCollector(
+        str(tmp_path / "collector.db"), socket_path, flush_interval=0.05
+    ).start()
+    yield log_collector
+    log_collector.shutdown()
+
+
+def test_client_inserts_and_queries_through_collector(collector):
+    client = CollectorClient(collector.socket_path)
+    assert client.insert_logs([make_log(), make_log(status_code=500)]) == 2
+    assert (
+        client.insert_log(make_log(path="/api/users", path_pattern="/api/users")) == 1
+    )
+
+    assert client.get_logs_count() == 3
+    assert client.get_stats_summary()["total_requests"] == 3
+    assert len(client.get_logs_by_status_code(500)) == 1
+    client.close()
+
+
+def test_captured_bodies_are_stored_as_they_arrived(collector):
+    client = CollectorClient(collector.socket_path)
+    client.insert_logs(
+        [
+            make_log(request_body=CapturedBody(b'{"a": 1}', 8, JSON_TYPE)),
+            make_log(request_body='{"a": 1}'),
+        ]
+    )
+    assert client.flush(timeout=5)
+
+    entries = sorted(client.get_all_logs(), key=lambda entry: entry["id"])
+    assert [entry["request_body"] for entry in entries] == [{"a": 1}, '{"a": 1}']
+    client.close()
+
+
+def test_client_rejects_unknown_methods(collector):
+    client = CollectorClient(collector.socket_path)
+    with pytest.raises(AttributeError):
+        client.drop_everything()
+    client.close()
+
+
+def test_client_cannot_call_maintenance_methods(collector):
+    client = CollectorClient(collector.socket_path)
+    with pytest.raises(AttributeError):
+        client.compact()
+    reply = collector.handle_message({"op": "call", "method": "drop_partitions"})
+    assert reply == {"ok": False, "error": "Unknown method: drop_partitions"}
+    client.close()
+
+
+def test_socket_is_owner_only_by_default(collector):
+    assert stat.S_IMODE(os.stat(collector.socket_path).st_mode) == 0o600
+
+
+def _send_logs(socket_path, count):
+    client = CollectorClient(socket_path)
+    for _ in range(count):
+        client.insert_log(make_log())
+    client.close()
+
+
+def test_collector_accepts_logs_from_many_processes(collector):
+    workers = [
+        multiprocessing.Process(target=_send_logs, args=(collector.socket_path, 25))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(10)
+        assert worker.exitcode == 0
+
+    client = CollectorClient(collector.socket_path)
+    assert client.flush(timeout=5)
+    assert client.get_logs_count() == 100
+    client.close()
+
+
+def test_middleware_uses_collector_from_environment(collector, monkeypatch):
+    monkeypatch.setenv("DEVTRACK_COLLECTOR_SOCKET", collector.socket_path)
+    monkeypatch.setattr(database, "_db_instance", None)
+    db = get_db(read_only=False)
+    assert isinstance(db, CollectorClient)
+
+    app = FastAPI()
+    app.add_middleware(DevTrackMiddleware, buffered=False)
+
+    @app.get("/items")
+    async def items():
+        return {"items": []}
+
+    client = TestClient(app)
+    client.get("/items")
+    client.get("/items")
+
+    assert db.get_logs_count() == 2
+    db.close()
+
+
+def test_client_streams_logs_page_by_page(collector):
+    client = CollectorClient(collector.socket_path)
+    client.insert_logs([make_log() for _ in range(5)])
+    assert client.flush(timeout=5)
+
+    ids = [entry["id"] for entry in client.iter_logs(chunk_size=2)]
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == 5
+    assert len(list(client.iter_logs(limit=3, chunk_size=2))) == 3
+    client.close()
+
+
+def test_client_sends_each_string_once_per_connection(collector):
+    client = CollectorClient(collector.socket_path)
+    first = client._intern({"op": "insert", "records": [make_log(), make_log()]})
+    assert first["strings"] == [
+        "/api/items/{item_id}",
+        "GET",
+        "pytest",
+        "",
+        "ip:127.0.0.1",
+    ]
+    assert first["interned"]["path_pattern"] == [0, 0]
+    assert "path_pattern" not in first["records"][0]
+
+    second = client._intern(
+        {
+            "op": "insert",
+            "records": [make_log(path="/api/users", path_pattern="/api/users")],
+        }
+    )
+    assert second["strings"] == ["/api/users"]
+    assert second["interned"] == {
+        "path_pattern": [5],
+        "method": [1],
+        "user_agent": [2],
+        "referer": [3],
+        "client_identifier": [4],
+    }
+
+    client.insert_logs(
+        [make_log(), make_log(path="/api/users", path_pattern="/api/users")]
+    )
+    client.insert_log(make_log(path="/api/users", path_pattern="/api/users"))
+    assert client.flush(timeout=5)
+    assert len(client.get_logs_by_path("/api/users")) == 2
+    client.close()
+
+
+def test_client_does_not_resend_after_losing_the_reply():
+    socket_path = os.path.join(tempfile.gettempdir(), f"dt-{uuid.uuid4().hex}.sock")
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+    received = []
+
+    def accept_and_hang_up():
+        # Read each request, then close without replying
+        server.settimeout(2)
+        try:
+            while True:
+                conn, _ = server.accept()
+                received.append(recv_message(conn))
+                conn.close()
+        except OSError:
+            pass
+
+    thread = threading.Thread(target=accept_and_hang_up, daemon=True)
+    thread.start()
+    client = CollectorClient(socket_path)
+    try:
+        with pytest.raises(ConnectionError):
+            client.insert_log(make_log())
+        assert len(received) == 1
+    finally:
+        client.close()
+        server.close()
+        thread.join()
+        os.unlink(socket_path)
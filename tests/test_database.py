@@ -0,0 +1,453 @@
+"""
+Tests for DevTrackDB ingest and query helpers
+"""
+
+import json
+import shutil
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from devtrack_sdk.body import FORM_TYPE, JSON_TYPE, CapturedBody
+from devtrack_sdk.database import encode_log_stream, init_db
+from tests.conftest import make_log
+
+
+def test_insert_logs_from_records(db):
+    first_id, last_id = db.insert_logs(
+        [make_log(status_code=200), make_log(status_code=404), make_log()]
+    )
+    assert last_id - first_id == 2
+    assert db.get_logs_count() == 3
+
+    logs = db.get_logs_by_status_code(404)
+    assert len(logs) == 1
+    assert logs[0]["query_params"] == {"q": "x"}
+    assert logs[0]["path_params"] == {"item_id": "1"}
+
+
+def test_insert_logs_from_columns(db):
+    id_range = db.insert_logs(
+        {
+            "path": ["/a", "/b"],
+            "method": ["GET", "POST"],
+            "status_code": [200, 500],
+            "timestamp": ["2024-01-01T00:00:00Z", "2024-01-01T00:01:00Z"],
+            "duration_ms": [1.0, 2.0],
+        }
+    )
+    assert id_range[1] - id_range[0] == 1
+
+    logs = db.get_logs_by_status_code(500)
+    assert logs[0]["path"] == "/b"
+    assert logs[0]["query_params"] == {}
+
+
+def test_insert_logs_rejects_ragged_columns(db):
+    with pytest.raises(ValueError):
+        db.insert_logs({"path": ["/a", "/b"], "method": ["GET"]})
+
+
+def test_insert_logs_empty_batch(db):
+    assert db.insert_logs([]) is None
+    assert db.get_logs_count() == 0
+
+
+def test_insert_log_and_batch_share_id_sequence(db):
+    single_id = db.insert_log(make_log())
+    first_id, _ = db.insert_logs([make_log(), make_log()])
+    assert first_id == single_id + 1
+
+
+def test_insert_log_returns_own_id_across_threads(db):
+    results = {}
+
+    def worker(n):
+        for i in range(10):
+            trace_id = f"{n}-{i}"
+            results[trace_id] = db.insert_log(make_log(trace_id=trace_id))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    rows = db.conn.execute("SELECT id, trace_id FROM request_logs").fetchall()
+    assert len(rows) == 40
+    assert {trace_id: log_id for log_id, trace_id in rows} == results
+
+
+def test_performance_metrics_exact_and_approximate(db):
+    now = datetime.now(timezone.utc).isoformat()
+    db.insert_logs(
+        [make_log(timestamp=now, duration_ms=float(ms)) for ms in range(1, 101)]
+    )
+
+    exact = db.get_performance_metrics(hours=1, exact=True)
+    assert exact["overall_stats"] == {
+        "p50": 50.5,
+        "p95": 95.05,
+        "p99": 99.01,
+        "avg": 50.5,
+    }
+    assert len(exact["latency_over_time"]) == 1
+
+    approx = db.get_performance_metrics(hours=1)["overall_stats"]
+    for key in ("p50", "p95", "p99"):
+        assert approx[key] == pytest.approx(exact["overall_stats"][key], rel=0.05)
+
+
+def test_performance_metrics_empty_window(db):
+    metrics = db.get_performance_metrics(hours=1, exact=True)
+    assert metrics["latency_over_time"] == []
+    assert metrics["overall_stats"]["p50"] is None
+
+
+def test_resolve_interval_caps_series_points(db):
+    assert db.resolve_interval(1) == 1
+    assert db.resolve_interval(24) == 5
+    assert db.resolve_interval(24 * 7) == 30
+    assert db.resolve_interval(24 * 365) * db.MAX_SERIES_POINTS >= 24 * 365 * 60
+
+    # Requested widths are honored unless they exceed the point cap
+    assert db.resolve_interval(24, interval_minutes=60) == 60
+    assert db.resolve_interval(24 * 7, interval_minutes=1) == 21
+    with pytest.raises(ValueError):
+        db.resolve_interval(24, interval_minutes=0)
+
+
+def test_time_series_use_requested_interval(db):
+    now = datetime.now(timezone.utc)
+    db.insert_logs(
+        [
+            make_log(
+                timestamp=(now - timedelta(minutes=minutes)).isoformat(),
+                status_code=500 if minutes % 2 else 200,
+            )
+            for minutes in range(30)
+        ]
+    )
+
+    for raw in (True, False):
+        db._rollups_available = not raw
+        traffic = db.get_traffic_over_time(hours=1, interval_minutes=15)
+        assert 2 <= len(traffic) <= 3
+        assert sum(point["request_count"] for point in traffic) == 30
+
+        errors = db.get_error_trends(hours=1, interval_minutes=15)["error_trends"]
+        assert sum(point["error_count"] for point in errors) == 15
+
+        perf = db.get_performance_metrics(hours=1, interval_minutes=15)
+        assert len(perf["latency_over_time"]) == len(traffic)
+
+
+def test_logs_page_walks_all_rows_with_cursor(db):
+    # Equal created_at values exercise the id tie-breaker
+    db.insert_logs([make_log(status_code=500 if i % 3 else 200) for i in range(25)])
+
+    seen, cursor = [], None
+    while True:
+        page = db.get_logs_page(limit=10, cursor=cursor)
+        seen.extend(entry["id"] for entry in page["entries"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 25
+
+    errors = db.get_logs_page(limit=10, status_code=500)
+    assert len(errors["entries"]) == 10
+    rest = db.get_logs_page(limit=10, status_code=500, cursor=errors["next_cursor"])
+    assert len(rest["entries"]) == 6
+    assert rest["next_cursor"] is None
+
+
+def test_logs_page_filters_method_and_time_before_the_limit(db):
+    # The newest logs are GETs, so filtering after the limit would find none
+    db.insert_logs(
+        [
+            make_log(method="POST", timestamp=f"2024-01-0{day}T00:00:00Z")
+            for day in (1, 2)
+        ]
+        + [make_log(timestamp="2024-01-03T00:00:00Z") for _ in range(5)]
+    )
+
+    page = db.get_logs_page(limit=1, method="post")
+    assert [entry["method"] for entry in page["entries"]] == ["POST"]
+    rest = db.get_logs_page(limit=1, method="POST", cursor=page["next_cursor"])
+    assert len(rest["entries"]) == 1 and rest["next_cursor"] is None
+
+    since = db.get_logs_page(limit=10, method="POST", start="2024-01-02T00:00:00+00:00")
+    assert [entry["timestamp"] for entry in since["entries"]] == ["2024-01-02T00:00:00"]
+    with pytest.raises(ValueError, match="Invalid timestamp"):
+        db.get_logs_page(start="yesterday")
+
+
+def test_logs_page_default_size_and_bad_cursor(db, monkeypatch):
+    db.insert_logs([make_log() for _ in range(5)])
+    monkeypatch.setattr(db, "DEFAULT_PAGE_SIZE", 3)
+    assert len(db.get_logs_page()["entries"]) == 3
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        db.get_logs_page(cursor="not-a-cursor")
+
+
+def test_iter_logs_streams_in_chunks(db):
+    db.insert_logs([make_log(status_code=404 if i % 2 else 200) for i in range(7)])
+
+    ids = [entry["id"] for entry in db.iter_logs(chunk_size=2)]
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == 7
+    assert len(list(db.iter_logs(status_code=404, chunk_size=3))) == 3
+    assert len(list(db.iter_logs(limit=4))) == 4
+
+    with pytest.raises(ValueError):
+        db.iter_logs(cursor="not-a-cursor")
+
+
+def test_encode_log_stream_formats(db):
+    db.insert_logs([make_log() for _ in range(3)])
+
+    ndjson = "".join(encode_log_stream(db.iter_logs(), "ndjson", batch=2))
+    lines = ndjson.splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[0])["query_params"] == {"q": "x"}
+
+    array = json.loads("".join(encode_log_stream(db.iter_logs(), "json", batch=2)))
+    assert [entry["id"] for entry in array] == [
+        json.loads(line)["id"] for line in lines
+    ]
+    assert json.loads("".join(encode_log_stream([], "json"))) == []
+
+    with pytest.raises(ValueError):
+        encode_log_stream([], "csv")
+
+
+@pytest.mark.parametrize(
+    "format, compression, filename",
+    [
+        ("parquet", None, "logs.parquet"),
+        ("csv", "gzip", "logs.csv.gz"),
+        ("csv", "zstd", "logs.csv.zst"),
+    ],
+)
+def test_export_logs_with_copy(db, tmp_path, format, compression, filename):
+    db.insert_logs([make_log(status_code=500 if i % 2 else 200) for i in range(6)])
+    out_path = str(tmp_path / filename)
+
+    exported = db.export_logs(
+        out_path, format=format, compression=compression, status_code=500
+    )
+    assert exported == 3
+    with db._connection() as conn:
+        count = conn.execute("SELECT COUNT(*) FROM query_table(?)", [out_path])
+        assert count.fetchone()[0] == 3
+
+    assert (
+        db.export_logs(out_path, format=format, compression=compression, limit=2) == 2
+    )
+    with pytest.raises(ValueError):
+        db.export_logs(out_path, format=format, compression="brotli")
+
+
+def test_export_logs_arrow(db, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    db.insert_logs([make_log() for _ in range(4)])
+    out_path = str(tmp_path / "logs.arrow")
+
+    assert db.export_logs(out_path, format="arrow", compression="zstd") == 4
+    with pa.memory_map(out_path) as source:
+        assert pa.ipc.open_file(source).read_all().num_rows == 4
+
+
+def test_json_columns_are_typed_and_filterable(db):
+    db.insert_logs(
+        [
+            make_log(query_params={"page": "1", "a/b": "x"}),
+            make_log(query_params={"page": "2"}),
+            make_log(request_body="plain text body"),
+        ]
+    )
+
+    with db._connection() as conn:
+        types = dict(
+            conn.execute(
+                "SELECT column_name, data_type FROM duckdb_columns() "
+                "WHERE table_name = 'request_logs'"
+            ).fetchall()
+        )
+    assert types["query_params"] == types["request_body"] == "JSON"
+
+    page = db.get_logs_page(query_params={"page": "1"})
+    assert [entry["query_params"]["page"] for entry in page["entries"]] == ["1"]
+    assert len(db.get_logs_page(query_params={"a/b": "x"})["entries"]) == 1
+    bodies = [entry["request_body"] for entry in db.iter_logs()]
+    assert "plain text body" in bodies
+
+
+def test_single_and_batch_inserts_store_json_columns_alike(db):
+    bodies = [
+        '{"a": 1}',
+        {"a": 1},
+        None,
+        "",
+        CapturedBody(b'{"a": 1}', 8, JSON_TYPE),
+        CapturedBody(memoryview(b'{"a": 1}')[:4], 8, JSON_TYPE),
+        CapturedBody(b"a=1&b=", 6, FORM_TYPE),
+    ]
+    for body in bodies:
+        db.insert_log(make_log(request_body=body, path_pattern="/single"))
+    db.insert_logs(
+        [make_log(request_body=body, path_pattern="/batch") for body in bodies]
+    )
+
+    def stored(path_pattern):
+        entries = sorted(db.get_logs_by_path(path_pattern), key=lambda e: e["id"])
+        return [entry["request_body"] for entry in entries]
+
+    single, batch = stored("/single"), stored("/batch")
+    assert single == batch
+    assert single[:2] == ['{"a": 1}', {"a": 1}]
+    assert single[4:6] == [{"a": 1}, '{"a"']
+
+
+def test_iter_logs_as_json_matches_dicts(db):
+    db.insert_logs([make_log(), make_log(timestamp="2024-01-01T00:00:00.250000")])
+
+    encoded = [json.loads(row) for row in db.iter_logs(as_json=True)]
+    expected = json.loads(json.dumps(list(db.iter_logs()), default=str))
+    for row, entry in zip(encoded, expected):
+        entry["created_at"] = entry["created_at"].replace(" ", "T")
+        assert row == entry
+
+
+def test_varchar_json_columns_are_migrated(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    db = init_db(db_path, read_only=False)
+    db.insert_log(make_log(query_params={"page": "3"}))
+    with db._connection() as conn:
+        for name in ("query_params", "path_params", "request_body"):
+            conn.execute(f"ALTER TABLE request_logs ALTER {name} TYPE VARCHAR")
+        conn.execute("UPDATE request_logs SET path_params = 'not json'")
+    db.close()
+
+    db = init_db(db_path, read_only=False)
+    (entry,) = db.get_all_logs()
+    assert entry["query_params"] == {"page": "3"}
+    assert entry["path_params"] == {}
+    assert len(db.get_logs_page(query_params={"page": "3"})["entries"]) == 1
+    db.close()
+
+
+def test_batch_insert_dictionary_encodes_repeated_strings(db):
+    logs = [
+        make_log(user_agent="Mozilla/5.0", role="admin" if i % 2 else None)
+        for i in range(6)
+    ]
+    payload = json.loads(db._encode_batch(db._columns_from_records(logs)))
+    assert payload["user_agent"] == {"codes": [0] * 6, "dict": ["Mozilla/5.0"]}
+    assert payload["role"]["dict"] == ["admin"]
+
+    db.insert_logs(logs)
+    stored = db.get_all_logs()
+    assert {entry["user_agent"] for entry in stored} == {"Mozilla/5.0"}
+    assert (
+        sorted(entry["role"] or "" for entry in stored) == ["", "", ""] + ["admin"] * 3
+    )
+
+
+def test_archive_logs_into_partitions(tmp_path):
+    db_path = str(tmp_path / "archive.db")
+    archive_dir = str(tmp_path / "archive")
+    db = init_db(db_path, read_only=False, archive_dir=archive_dir)
+    db.insert_logs(
+        [
+            make_log(timestamp=f"2024-01-0{day}T0{hour}:00:00", status_code=status)
+            for day in (1, 2, 3)
+            for hour, status in ((1, 200), (5, 500))
+        ]
+    )
+
+    # The cutoff is rounded down to a whole day
+    assert db.archive_logs(datetime(2024, 1, 3, 3)) == 4
+    with db._connection() as conn:
+        live = conn.execute("SELECT COUNT(*) FROM request_logs").fetchone()[0]
+    assert live == 2
+    assert [p["partition"] for p in db.list_partitions()] == [
+        "2024-01-01",
+        "2024-01-02",
+    ]
+    assert all(p["rows"] == 2 and p["files"] == 1 for p in db.list_partitions())
+
+    # Reads span the table and the archive; metrics keep their rollups
+    assert db.get_logs_count() == 6
+    assert len(db.get_logs_by_status_code(500)) == 3
+    assert db.get_stats_summary()["total_requests"] == 6
+    ranged = db.iter_logs(start=datetime(2024, 1, 2), end=datetime(2024, 1, 2, 12))
+    assert [e["timestamp"] for e in ranged] == [
+        "2024-01-02T05:00:00",
+        "2024-01-02T01:00:00",
+    ]
+    db.close()
+
+    # Readers find the view without being told about the archive
+    reader = init_db(db_path, read_only=True)
+    assert reader.get_logs_count() == 6
+    reader.close()
+
+
+def test_missing_archive_falls_back_to_live_logs(tmp_path):
+    db_path = str(tmp_path / "archive.db")
+    archive_dir = tmp_path / "archive"
+    db = init_db(db_path, read_only=False, archive_dir=str(archive_dir))
+    db.insert_logs(
+        [make_log(timestamp=f"2024-01-0{day}T01:00:00") for day in (1, 2, 3)]
+    )
+    db.archive_logs(datetime(2024, 1, 3))
+    db.close()
+    shutil.rmtree(archive_dir)
+
+    # Readers can't drop the stale view but stop reading through it
+    reader = init_db(db_path, read_only=True)
+    assert reader.get_logs_count() == 1
+    assert len(reader.get_logs_page()["entries"]) == 1
+    reader.close()
+
+    db = init_db(db_path, read_only=False)
+    assert db.get_logs_count() == 1
+    assert not db._archive_view_exists(db.conn)
+    db.close()
+
+
+def test_drop_partitions_keeps_live_logs(tmp_path):
+    archive_dir = tmp_path / "archive"
+    db = init_db(
+        str(tmp_path / "drop.db"),
+        read_only=False,
+        archive_dir=str(archive_dir),
+        partition_by="hour",
+    )
+    db.insert_logs(
+        [make_log(timestamp=f"2024-01-01T0{hour}:30:00") for hour in (1, 2, 3)]
+    )
+    assert db.archive_logs(datetime(2024, 1, 1, 3, 15)) == 2
+    assert [p["partition"] for p in db.list_partitions()] == [
+        "2024-01-01T01",
+        "2024-01-01T02",
+    ]
+
+    assert db.drop_partitions(datetime(2024, 1, 1, 2, 59)) == 1
+    assert db.get_logs_count() == 2
+    assert db.get_stats_summary()["total_requests"] == 3
+
+    assert db.delete_all_logs() == 2
+    assert list(archive_dir.iterdir()) == []
+    assert db._logs_source == "request_logs"
+    db.close()
+
+    with pytest.raises(ValueError):
+        init_db(str(tmp_path / "drop.db"), read_only=False).archive_logs(
+            datetime(2024, 1, 2)
+        )
@@ -123,6 +123,52 @@ class DevTrackDjangoMiddlewareTest(TestCase):
         )
         self.assertIn("/custom/path/", custom_middleware.skip_paths)
 
+    def test_streaming_response_is_counted_as_it_is_sent(self):
+        """Streaming bodies are measured while iterated, then logged"""
+        from django.http import StreamingHttpResponse
+
+        request = self.factory.get("/api/download")
+        self.mock_get_response.return_value = StreamingHttpResponse(
+            b"x" * 1000 for _ in range(3)
+        )
+
+        response = self.middleware(request)
+        db = DevTrackDjangoMiddleware._db_instance
+        self.assertEqual(db.get_logs_count(), 0)
+
+        self.assertEqual(b"".join(response), b"x" * 3000)
+        response.close()
+        logs = db.get_all_logs()
+        self.assertEqual(len(logs), 1)
+        self.assertEqual(logs[0]["response_size"], 3000)
+        self.assertIsNotNone(logs[0]["send_ms"])
+        self.assertGreaterEqual(logs[0]["duration_ms"], logs[0]["ttfb_ms"])
+
+    def test_streaming_response_without_is_async(self):
+        """Django before 4.2 has no StreamingHttpResponse.is_async"""
+        from django.http import StreamingHttpResponse
+
+        class LegacyStreamingHttpResponse(StreamingHttpResponse):
+            @property
+            def streaming_content(self):
+                return map(self.make_bytes, self._iterator)
+
+            @streaming_content.setter
+            def streaming_content(self, value):
+                self._iterator = iter(value)
+                if hasattr(value, "close"):
+                    self._resource_closers.append(value.close)
+
+        streaming = LegacyStreamingHttpResponse(b"x" * 10 for _ in range(2))
+        self.assertFalse(hasattr(streaming, "is_async"))
+        self.mock_get_response.return_value = streaming
+
+        response = self.middleware(self.factory.get("/api/download"))
+        self.assertEqual(b"".join(response), b"x" * 20)
+        response.close()
+        logs = DevTrackDjangoMiddleware._db_instance.get_all_logs()
+        self.assertEqual(logs[0]["response_size"], 20)
+
 
 class DevTrackDjangoViewsTest(TestCase):
     """Test Django views functionality"""
@@ -157,6 +203,46 @@ class DevTrackDjangoViewsTest(TestCase):
         self.assertIn("total", data)
         self.assertIn("entries", data)
 
+    def test_stats_view_rejects_invalid_cursor(self):
+        """Test stats view returns 400 for a malformed cursor"""
+        request = self.factory.get("/__devtrack__/stats", {"cursor": "bogus"})
+        response = stats_view(request)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", json.loads(response.content))
+
+    def test_stats_view_filters_on_method_and_since(self):
+        """Test stats view filters by method and start time in the database"""
+        db = DevTrackDjangoMiddleware._db_instance
+        db.insert_logs(
+            [
+                {"path": "/a", "method": "GET", "timestamp": "2024-01-01T00:00:00Z"},
+                {"path": "/b", "method": "POST", "timestamp": "2024-01-02T00:00:00Z"},
+                {"path": "/c", "method": "POST", "timestamp": "2024-01-03T00:00:00Z"},
+            ]
+        )
+        request = self.factory.get(
+            "/__devtrack__/stats",
+            {"method": "POST", "since": "2024-01-03T00:00:00+00:00"},
+        )
+        data = json.loads(stats_view(request).content)
+        self.assertEqual([entry["path"] for entry in data["entries"]], ["/c"])
+
+        request = self.factory.get("/__devtrack__/stats", {"since": "soon"})
+        self.assertEqual(stats_view(request).status_code, 400)
+
+    def test_stats_view_streams_ndjson(self):
+        """Test stats view streams entries as NDJSON"""
+        request = self.factory.get("/__devtrack__/stats", {"stream": "ndjson"})
+        response = stats_view(request)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        body = b"".join(response.streaming_content).decode()
+        for line in body.splitlines():
+            self.assertIn("path", json.loads(line))
+
     def test_track_view(self):
         """Test track view accepts data"""
         test_data = {
@@ -210,6 +296,37 @@ class DevTrackDjangoViewsTest(TestCase):
                 break
         self.assertTrue(found, "Test data not found in stats entries")
 
+    def test_track_view_batch(self):
+        """Test track view accepts a list of logs"""
+        entries = [
+            {
+                "path": f"/api/batch/{i}",
+                "path_pattern": "/api/batch/<int:id>",
+                "method": "GET",
+                "status_code": 200,
+                "timestamp": "2024-01-01T00:00:00Z",
+                "duration_ms": 5.0,
+            }
+            for i in range(3)
+        ]
+        request = self.factory.post(
+            "/__devtrack__/track",
+            data=json.dumps(entries),
+            content_type="application/json",
+        )
+
+        response = track_view(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(json.loads(response.content)["ok"])
+        self.assertEqual(
+            len(
+                DevTrackDjangoMiddleware._db_instance.get_logs_by_path(
+                    "/api/batch/<int:id>"
+                )
+            ),
+            3,
+        )
+
     def test_track_view_invalid_json(self):
         """Test track view handles invalid JSON"""
         request = self.factory.post(
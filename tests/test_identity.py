@@ -0,0 +1,105 @@
+"""
+Tests for the client identification resolver
+"""
+
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from devtrack_sdk.identity import ClientResolver
+
+
+def asgi_scope(headers, peer="203.0.113.9"):
+    return {
+        "type": "http",
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": (peer, 50000),
+    }
+
+
+def make_jwt(claims):
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).rstrip(b"=")
+    return f"eyJhbGciOiJIUzI1NiJ9.{payload.decode()}.signature"
+
+
+def test_default_rules_match_header_priority():
+    resolver = ClientResolver()
+    scope = asgi_scope(
+        [
+            ("x-api-key", "key-1"),
+            ("x-client-id", "client-1"),
+            ("x-forwarded-for", "198.51.100.7, 10.0.0.2"),
+        ]
+    )
+
+    assert resolver.resolve_asgi(scope) == (
+        "header:x-client-id:client-1",
+        "198.51.100.7",
+    )
+
+
+def test_falls_back_to_user_then_ip():
+    resolver = ClientResolver()
+    assert resolver.resolve_asgi(asgi_scope([]), user_id="42") == (
+        "user:42",
+        "203.0.113.9",
+    )
+    assert resolver.resolve_asgi(asgi_scope([])) == ("ip:203.0.113.9", "203.0.113.9")
+    assert resolver.resolve({}, None) == (None, "unknown")
+
+
+def test_jwt_claim_and_rule_order():
+    token = make_jwt({"sub": "svc-billing"})
+    headers = {"authorization": f"Bearer {token}", "x-client-id": "client-1"}
+
+    resolver = ClientResolver(rules=["jwt", "header"], jwt_claim="sub")
+    assert resolver.resolve(headers, "10.0.0.1")[0] == "jwt:svc-billing"
+    # Without a claim the token prefix identifies the client
+    assert ClientResolver(rules=["jwt"]).resolve(headers, None)[0] == (
+        f"jwt:{token[:32]}"
+    )
+    # Opaque bearer tokens aren't JWTs
+    opaque = {"authorization": "Bearer abcdef"}
+    assert ClientResolver(rules=["jwt"]).resolve(opaque, None)[0] is None
+
+
+def test_trusted_proxies_ignore_spoofed_headers():
+    resolver = ClientResolver(trusted_proxies=["10.0.0.0/8"])
+    chain = {"x-forwarded-for": "1.1.1.1, 198.51.100.7, 10.0.0.5"}
+
+    # From a trusted proxy: the rightmost untrusted hop is the client
+    assert resolver.resolve(chain, "10.0.0.9")[1] == "198.51.100.7"
+    # Straight from the internet the header is ignored
+    assert resolver.resolve(chain, "203.0.113.9")[1] == "203.0.113.9"
+
+
+def test_result_is_cached_per_request():
+    resolver = ClientResolver()
+    scope = asgi_scope([("x-client-id", "client-1")])
+
+    first = resolver.resolve_asgi(scope)
+    scope["headers"] = []
+    assert resolver.resolve_asgi(scope) is first
+
+
+def test_django_meta_lookup():
+    request = SimpleNamespace(
+        META={
+            "HTTP_X_TENANT_ID": "acme",
+            "HTTP_X_REAL_IP": "198.51.100.7",
+            "REMOTE_ADDR": "10.0.0.1",
+        }
+    )
+    assert ClientResolver().resolve_django(request) == (
+        "header:x-tenant-id:acme",
+        "198.51.100.7",
+    )
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        ClientResolver(rules=["header", "cookie"])
+    with pytest.raises(ValueError):
+        ClientResolver(trusted_proxies=["not-a-cidr"])
@@ -27,7 +27,7 @@ def app_with_middleware():
 
     app = FastAPI()
     app.include_router(devtrack_router)
-    app.add_middleware(DevTrackMiddleware, db_instance=db)
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=False)
 
     # Store db in app state so tests can access it
     app.state.db = db
@@ -111,6 +111,13 @@ def test_traffic_metrics_endpoint(app_with_middleware):
     assert response.status_code == 200
     data = response.json()
     assert "traffic" in data
+    assert data["interval_minutes"] == 1
+
+    # Bucket width is honored, and capped on long windows
+    response = client.get("/__devtrack__/metrics/traffic?hours=1&interval_minutes=10")
+    assert response.json()["interval_minutes"] == 10
+    response = client.get("/__devtrack__/metrics/traffic?hours=168&interval_minutes=1")
+    assert response.json()["interval_minutes"] == 21
 
 
 def test_error_metrics_endpoint(app_with_middleware):
@@ -192,6 +199,12 @@ def test_performance_metrics_endpoint(app_with_middleware):
     response = client.get("/__devtrack__/metrics/perf?hours=6")
     assert response.status_code == 200
 
+    # Exact percentiles read every duration in the window
+    response = client.get("/__devtrack__/metrics/perf?exact=true")
+    assert response.status_code == 200
+    exact_overall = response.json()["overall_stats"]
+    assert exact_overall["p99"] >= exact_overall["p50"]
+
 
 def test_consumers_endpoint(app_with_middleware):
     """Test /__devtrack__/consumers endpoint."""
@@ -1,3 +1,5 @@
+import asyncio
+import json
 import os
 
 import pytest
@@ -28,8 +30,6 @@ def app_with_middleware():
     # Create a unique temporary database for testing
     import uuid
 
-    from devtrack_sdk.database import _thread_local
-
     db_path = f"/tmp/test_devtrack_{uuid.uuid4().hex}.db"
 
     # Ensure the file doesn't exist
@@ -41,7 +41,7 @@ def app_with_middleware():
 
     app = FastAPI()
     app.include_router(devtrack_router)
-    app.add_middleware(DevTrackMiddleware, db_instance=db)
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=False)
 
     # Store db in app state so tests can access it
     app.state.db = db
@@ -65,18 +65,9 @@ def app_with_middleware():
 
     yield app
 
-    # Cleanup - close thread-local connections
+    # Cleanup - close pooled connections
     try:
-        # Clear thread-local connection
-        if (
-            hasattr(_thread_local, "connection")
-            and _thread_local.connection is not None
-        ):
-            try:
-                _thread_local.connection.close()
-            except Exception:
-                pass
-            _thread_local.connection = None
+        db.close()
 
         if os.path.exists(db_path):
             os.unlink(db_path)
@@ -183,6 +174,76 @@ def test_internal_stats_endpoint(app_with_middleware):
         assert isinstance(entry["client_ip"], str)
 
 
+def test_internal_stats_endpoint_pagination(app_with_middleware):
+    client = TestClient(app_with_middleware)
+    clear_db_logs()
+
+    for _ in range(3):
+        client.get("/")
+
+    first = client.get("/__devtrack__/stats", params={"limit": 2}).json()
+    assert len(first["entries"]) == 2
+    assert first["next_cursor"]
+
+    second = client.get(
+        "/__devtrack__/stats", params={"limit": 2, "cursor": first["next_cursor"]}
+    ).json()
+    assert len(second["entries"]) == 1
+    assert second["next_cursor"] is None
+
+    response = client.get("/__devtrack__/stats", params={"cursor": "bogus"})
+    assert response.status_code == 400
+
+
+def test_internal_stats_endpoint_filters_on_query_params(app_with_middleware):
+    client = TestClient(app_with_middleware)
+    clear_db_logs()
+
+    client.get("/", params={"page": "1"})
+    client.get("/", params={"page": "2"})
+
+    body = client.get("/__devtrack__/stats", params={"param": "page=2"}).json()
+    assert [entry["query_params"] for entry in body["entries"]] == [{"page": "2"}]
+
+    response = client.get("/__devtrack__/stats", params={"param": "page"})
+    assert response.status_code == 400
+
+
+def test_internal_stats_endpoint_filters_on_method_and_since(app_with_middleware):
+    client = TestClient(app_with_middleware)
+    clear_db_logs()
+
+    client.get("/")
+    client.post("/users")
+
+    body = client.get("/__devtrack__/stats", params={"method": "post"}).json()
+    assert [entry["path"] for entry in body["entries"]] == ["/users"]
+    body = client.get(
+        "/__devtrack__/stats", params={"since": "2999-01-01T00:00:00Z"}
+    ).json()
+    assert body["entries"] == []
+    response = client.get("/__devtrack__/stats", params={"since": "soon"})
+    assert response.status_code == 400
+
+
+def test_internal_stats_endpoint_streams_ndjson(app_with_middleware):
+    client = TestClient(app_with_middleware)
+    clear_db_logs()
+
+    for _ in range(3):
+        client.get("/")
+
+    response = client.get("/__devtrack__/stats", params={"stream": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.text.splitlines()
+    assert len(lines) == 3
+    assert all(json.loads(line)["path"] == "/" for line in lines)
+
+    response = client.get("/__devtrack__/stats", params={"stream": "xml"})
+    assert response.status_code == 400
+
+
 def test_excluded_paths_not_logged(app_with_middleware):
     client = TestClient(app_with_middleware)
     clear_db_logs()
@@ -239,6 +300,18 @@ def test_path_pattern_normalization(app_with_middleware):
     assert log_entry["path_params"] == {}
 
 
+def test_unmatched_paths_are_normalized(app_with_middleware):
+    client = TestClient(app_with_middleware)
+    db = app_with_middleware.state.db
+
+    for order_id in (41, 42):
+        assert client.get(f"/orders/{order_id}/items").status_code == 404
+
+    logs = db.get_all_logs()
+    assert [log["path"] for log in logs] == ["/orders/42/items", "/orders/41/items"]
+    assert {log["path_pattern"] for log in logs} == {"/orders/{id}/items"}
+
+
 def test_middleware_logging(app_with_middleware):
     client = TestClient(app_with_middleware)
     clear_db_logs()
@@ -502,3 +575,188 @@ def test_delete_logs_invalid_ids(app_with_middleware):
 
     data = response.json()
     assert "Invalid log IDs format" in data["detail"]
+
+
+def test_retention_scheduler_starts_with_first_request(tmp_path):
+    db = init_db(str(tmp_path / "retention.db"), read_only=False)
+    app = FastAPI()
+    app.add_middleware(
+        DevTrackMiddleware, db_instance=db, retention={"max_age_days": 30}
+    )
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello"}
+
+    with TestClient(app) as client:
+        client.get("/")
+        middleware = app.middleware_stack
+        while not isinstance(middleware, DevTrackMiddleware):
+            middleware = middleware.app
+        scheduler = middleware.retention
+        assert scheduler is not None and scheduler.db is db
+        scheduler.close()
+    db.close()
+
+
+def test_streaming_response_passes_through_and_is_measured(tmp_path):
+    from fastapi.responses import StreamingResponse
+
+    db = init_db(str(tmp_path / "stream.db"), read_only=False)
+    app = FastAPI()
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=False)
+
+    @app.get("/download")
+    async def download():
+        async def chunks():
+            for _ in range(4):
+                yield b"x" * 1000
+
+        return StreamingResponse(chunks(), media_type="application/octet-stream")
+
+    with TestClient(app) as client:
+        response = client.get("/download")
+    assert response.content == b"x" * 4000
+
+    log = db.get_all_logs()[0]
+    assert log["status_code"] == 200
+    assert log["response_size"] == 4000
+    db.close()
+
+
+def test_request_body_capture(tmp_path):
+    db = init_db(str(tmp_path / "body.db"), read_only=False)
+    app = FastAPI()
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=False)
+    quiet = FastAPI()
+    quiet.add_middleware(
+        DevTrackMiddleware, db_instance=db, buffered=False, capture_body=False
+    )
+
+    for target in (app, quiet):
+
+        @target.post("/items")
+        async def create_item(item: dict):
+            return item
+
+    with TestClient(app) as client:
+        response = client.post("/items", json={"name": "a", "password": "secret"})
+    assert response.json() == {"name": "a", "password": "secret"}
+    assert db.get_all_logs()[0]["request_body"] == {"name": "a", "password": "***"}
+
+    db.delete_all_logs()
+    # The app still reads the body when DevTrack doesn't capture it
+    with TestClient(quiet) as client:
+        response = client.post("/items", json={"name": "b"})
+    assert response.json() == {"name": "b"}
+    assert db.get_all_logs()[0]["request_body"] == {}
+    db.close()
+
+
+def test_request_body_size_cap_and_path_opt_in(tmp_path):
+    db = init_db(str(tmp_path / "body_cap.db"), read_only=False)
+    app = FastAPI()
+    app.add_middleware(
+        DevTrackMiddleware,
+        db_instance=db,
+        buffered=False,
+        body_capture={"max_bytes": 10, "paths": ["/items*"]},
+    )
+
+    @app.post("/items")
+    async def create_item(item: dict):
+        return item
+
+    @app.post("/other")
+    async def other(item: dict):
+        return item
+
+    with TestClient(app) as client:
+        # The app gets the whole body; the log keeps the first 10 bytes
+        response = client.post("/items", json={"name": "a" * 50})
+        assert response.json() == {"name": "a" * 50}
+        assert client.post("/other", json={"name": "b"}).status_code == 200
+
+    bodies = {log["path"]: log["request_body"] for log in db.get_all_logs()}
+    assert bodies == {"/items": '{"name":"a', "/other": {}}
+    db.close()
+
+
+def test_unhandled_exception_is_logged_as_500(tmp_path):
+    db = init_db(str(tmp_path / "crash.db"), read_only=False)
+    app = FastAPI()
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=False)
+
+    @app.get("/crash")
+    async def crash():
+        raise RuntimeError("boom")
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.get("/crash").status_code == 500
+
+    assert db.get_all_logs()[0]["status_code"] == 500
+    db.close()
+
+
+def test_pathsend_response_size_comes_from_content_length(tmp_path):
+    db = init_db(str(tmp_path / "pathsend.db"), read_only=False)
+    sent = []
+
+    async def app(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-length", b"2048")],
+            }
+        )
+        await send({"type": "http.response.pathsend", "path": "/srv/file.bin"})
+
+    async def send(message):
+        sent.append(message["type"])
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    middleware = DevTrackMiddleware(app, db_instance=db, buffered=False)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": "/file.bin",
+        "query_string": b"",
+        "headers": [],
+    }
+    asyncio.run(middleware(scope, receive, send))
+
+    assert sent == ["http.response.start", "http.response.pathsend"]
+    assert db.get_all_logs()[0]["response_size"] == 2048
+    db.close()
+
+
+def test_phase_timings_are_logged(tmp_path):
+    import time
+
+    from fastapi.responses import StreamingResponse
+
+    db = init_db(str(tmp_path / "timing.db"), read_only=False)
+    app = FastAPI()
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=False)
+
+    @app.get("/slow-stream")
+    async def slow_stream():
+        async def chunks():
+            yield b"first"
+            time.sleep(0.05)
+            yield b"second"
+
+        return StreamingResponse(chunks())
+
+    with TestClient(app) as client:
+        client.get("/slow-stream")
+
+    log = db.get_all_logs()[0]
+    assert log["send_ms"] >= 50
+    assert log["ttfb_ms"] < log["duration_ms"]
+    assert log["duration_ms"] >= log["send_ms"]
+    assert log["overhead_ms"] > 0
+    db.close()
@@ -0,0 +1,63 @@
+"""
+Tests for path normalization
+"""
+
+import re
+
+import pytest
+
+from devtrack_sdk.paths import PathNormalizer, route_template
+
+
+def test_heuristic_templates():
+    normalizer = PathNormalizer()
+    assert normalizer.normalize("/users/123/orders") == "/users/{id}/orders"
+    assert (
+        normalizer.normalize("/files/3f2b8c1e-4d5a-4e6f-9a7b-0c1d2e3f4a5b")
+        == "/files/{uuid}"
+    )
+    assert normalizer.normalize("/blobs/da39a3ee5e6b4b0d3255bfef95601890afd80709") == (
+        "/blobs/{hash}"
+    )
+    # Words that happen to be hex stay as they are
+    assert normalizer.normalize("/feedface/cafe") == "/feedface/cafe"
+
+
+def test_route_table_wins_over_heuristics():
+    normalizer = PathNormalizer()
+    normalizer.set_routes([(re.compile(r"^/users/(?P<name>[^/]+)$"), "/users/{name}")])
+    assert normalizer.normalize("/users/42") == "/users/{name}"
+    assert normalizer.normalize("/teams/42") == "/teams/{id}"
+
+
+def test_cardinality_cap():
+    normalizer = PathNormalizer(max_patterns=2)
+    assert normalizer.normalize("/a") == "/a"
+    assert normalizer.normalize("/b/1") == "/b/{id}"
+    assert normalizer.normalize("/wp-admin.php") == "/{other}"
+    # Templates seen before the cap was hit still resolve
+    assert normalizer.normalize("/b/2") == "/b/{id}"
+
+
+def test_results_are_cached():
+    normalizer = PathNormalizer(cache_size=8)
+    normalizer.normalize("/users/1")
+    normalizer.normalize("/users/1")
+    assert normalizer.cache_info().hits == 1
+
+
+def test_django_route_templates():
+    assert route_template("api/users/<int:pk>/") == "api/users/<int:pk>/"
+    assert (
+        route_template(r"^articles/(?P<year>[0-9]{4})/(?P<slug>[-\w]+)/$")
+        == "articles/{year}/{slug}/"
+    )
+    # Routes from include()d regex URLconfs are concatenated
+    assert route_template(r"api/^items/(?P<pk>\d+)/$") == "api/items/{pk}/"
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        PathNormalizer(max_patterns=0)
+    with pytest.raises(ValueError):
+        PathNormalizer(cache_size=-1)
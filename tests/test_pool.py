@@ -0,0 +1,172 @@
+import threading
+
+import pytest
+
+from devtrack_sdk.database import DevTrackDB
+from devtrack_sdk.pool import ConnectionPool, get_pool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "pool.db")
+
+
+def test_connections_are_reused(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=2)
+    with pool.connection() as conn:
+        conn.execute("SELECT 1")
+    with pool.connection() as conn:
+        conn.execute("SELECT 1")
+
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+    pool.close()
+
+
+def test_checkout_waits_for_a_free_connection(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=1)
+    entry = pool.checkout()
+    released = threading.Timer(0.1, pool.checkin, args=(entry,))
+    released.start()
+
+    with pool.connection() as conn:
+        conn.execute("SELECT 1")
+    released.join()
+
+    stats = pool.stats()
+    assert stats["waits"] >= 1
+    assert stats["size"] == 1
+    pool.close()
+
+
+def test_checkout_times_out_when_pool_is_exhausted(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=1)
+    entry = pool.checkout()
+    with pytest.raises(TimeoutError):
+        pool.checkout(timeout=0.05)
+    pool.checkin(entry)
+    pool.close()
+
+
+def test_exclusive_waits_for_checkins_and_holds_checkouts(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=2)
+    entry = pool.checkout()
+    with pytest.raises(TimeoutError):
+        with pool.exclusive(timeout=0.05):
+            pass
+
+    threading.Timer(0.1, pool.checkin, args=(entry,)).start()
+    with pool.exclusive(timeout=5):
+        assert pool.stats()["size"] == 0
+        with pytest.raises(TimeoutError):
+            pool.checkout(timeout=0.05)
+    with pool.connection() as conn:
+        conn.execute("SELECT 1")
+    pool.close()
+
+
+def test_exclusive_timeout_names_the_holders(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=2)
+    entry = pool.checkout(holder="exporter")
+    assert pool.holders() == ["exporter"]
+    with pytest.raises(TimeoutError, match="held by: exporter"):
+        with pool.exclusive(timeout=0.05):
+            pass
+    pool.checkin(entry)
+    assert pool.holders() == []
+    pool.close()
+
+
+def test_idle_connections_are_evicted(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=2, idle_timeout=0)
+    with pool.connection():
+        pass
+    with pool.connection():
+        pass
+
+    stats = pool.stats()
+    assert stats["created"] == 2
+    assert stats["closed"] == 1
+    pool.close()
+
+
+def test_broken_connection_is_replaced_on_health_check(db_path):
+    pool = ConnectionPool(db_path, read_only=False, max_size=1, health_check_interval=0)
+    entry = pool.checkout()
+    entry.conn.close()
+    pool.checkin(entry)
+
+    with pool.connection() as conn:
+        assert conn.execute("SELECT 1").fetchone() == (1,)
+    assert pool.stats()["health_check_failures"] == 1
+    pool.close()
+
+
+def test_pools_are_keyed_by_path_and_mode(tmp_path):
+    first = str(tmp_path / "first.db")
+    second = str(tmp_path / "second.db")
+
+    assert get_pool(first, read_only=False) is get_pool(first, read_only=False)
+    assert get_pool(first, read_only=False) is not get_pool(first, read_only=True)
+    assert get_pool(first, read_only=False) is not get_pool(second, read_only=False)
+
+
+def test_db_instances_do_not_share_connections_across_paths(tmp_path):
+    first = DevTrackDB(str(tmp_path / "first.db"), read_only=False)
+    second = DevTrackDB(str(tmp_path / "second.db"), read_only=False)
+    try:
+        first.insert_log(
+            {
+                "path": "/first",
+                "method": "GET",
+                "status_code": 200,
+                "timestamp": "2024-01-01T00:00:00",
+            }
+        )
+
+        assert first.get_logs_count() == 1
+        assert second.get_logs_count() == 0
+        assert first.get_pool_stats()["in_use"] == 0
+    finally:
+        first.close()
+        second.close()
+
+
+def test_compact_releases_the_callers_lease_and_names_other_holders(db_path):
+    db = DevTrackDB(db_path, read_only=False)
+    db.conn.execute("SELECT 1")
+    assert db.compact(timeout=1)
+
+    leased = threading.Event()
+    done = threading.Event()
+
+    def hold_lease():
+        db.conn.execute("SELECT 1")
+        leased.set()
+        done.wait(5)
+        db.close()
+
+    holder = threading.Thread(target=hold_lease, name="report-thread")
+    holder.start()
+    leased.wait(5)
+    try:
+        assert not db.compact(timeout=0.1)
+        assert db.compact_blocked_by == ["report-thread (DevTrackDB.conn)"]
+    finally:
+        done.set()
+        holder.join()
+    assert db.compact(timeout=1)
+    assert db.compact_blocked_by == []
+    db.close()
+
+
+def test_close_leaves_other_instances_on_the_file_usable(db_path):
+    first = DevTrackDB(db_path, read_only=False)
+    second = DevTrackDB(db_path, read_only=False)
+    second.get_logs_count()
+
+    first.close()
+    assert second.get_logs_count() == 0
+    second.close()
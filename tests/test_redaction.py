@@ -0,0 +1,89 @@
+"""
+Tests for the redaction engine
+"""
+
+import pytest
+
+from devtrack_sdk.body import BodyCapture
+from devtrack_sdk.redaction import HEADERS, Redactor
+
+
+def json_body(raw, max_bytes=64 * 1024):
+    return BodyCapture(max_bytes=max_bytes).capture(raw, "application/json")
+
+
+def test_key_patterns_mask_nested_values():
+    log = Redactor().redact(
+        {
+            "query_params": {"access_token": "t", "page": "2"},
+            "request_body": json_body(
+                b'{"user": {"Password": "p", "name": "a"}, "items": [{"secret": 1}]}'
+            ),
+        }
+    )
+    assert log["query_params"] == {"access_token": "***", "page": "2"}
+    assert log["request_body"] == {
+        "user": {"Password": "***", "name": "a"},
+        "items": [{"secret": "***"}],
+    }
+
+
+def test_json_paths():
+    redactor = Redactor(keys=(), paths=["request_body.orders[*].card.cvv"])
+    log = redactor.redact(
+        {"request_body": json_body(b'{"orders": [{"card": {"cvv": 123}}, {}]}')}
+    )
+    assert log["request_body"] == {"orders": [{"card": {"cvv": "***"}}, {}]}
+
+    with pytest.raises(ValueError):
+        Redactor(paths=["headers.cookie"])
+
+
+def test_value_patterns():
+    log = Redactor().redact(
+        {
+            "path": "/cards/4111111111111111",
+            "referer": "https://example.com/cb?code=1&api_key=abc",
+            "request_body": json_body(
+                b'{"note": "card 4111-1111-1111-1111", "order": 4111111111111112,'
+                b' "auth": "Bearer abc.def", "ts": 1700000000000}'
+            ),
+        }
+    )
+    assert log["path"] == "/cards/***"
+    assert log["referer"] == "https://example.com/cb?code=1&api_key=***"
+    # The second number fails the Luhn check, so it isn't a card
+    assert log["request_body"] == {
+        "note": "card ***",
+        "order": 4111111111111112,
+        "auth": "***",
+        "ts": 1700000000000,
+    }
+
+
+def test_header_identifiers_are_kept_by_default():
+    identifier = {"client_identifier": "header:x-api-key:key-1"}
+    assert Redactor().redact(dict(identifier)) == identifier
+
+
+def test_header_identifiers_are_hashed():
+    redactor = Redactor(headers=HEADERS)
+    first = redactor.redact({"client_identifier": "header:x-api-key:key-1"})
+    again = redactor.redact({"client_identifier": "header:x-api-key:key-1"})
+    assert first["client_identifier"].startswith("header:x-api-key:")
+    assert "key-1" not in first["client_identifier"]
+    assert first == again
+    assert redactor.redact({"client_identifier": "header:x-client-id:c1"}) == {
+        "client_identifier": "header:x-client-id:c1"
+    }
+
+
+def test_bodies_are_parsed_only_when_a_rule_could_match():
+    body = json_body(b'{"name": "a"}')
+    assert Redactor().redact({"request_body": body})["request_body"] is body
+
+    # A truncated body can't be parsed, so its text is masked
+    log = Redactor().redact(
+        {"request_body": json_body(b'{"password": "hunter2", "a": 1}', max_bytes=24)}
+    )
+    assert log["request_body"] == '{"password": "***", '
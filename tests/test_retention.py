@@ -0,0 +1,125 @@
+"""
+Tests for the retention scheduler and the storage maintenance it runs
+"""
+
+import os
+import threading
+
+import pytest
+
+from devtrack_sdk.retention import RetentionScheduler
+from tests.conftest import make_log
+
+
+def make_logs(count, age_days=0, minutes=1):
+    return [
+        make_log(
+            minutes_ago=age_days * 24 * 60 + i % minutes,
+            request_body={"payload": "x" * 200},
+        )
+        for i in range(count)
+    ]
+
+
+def test_max_age_prunes_raw_logs_but_keeps_rollups(db):
+    db.insert_logs(make_logs(5, age_days=10) + make_logs(3))
+
+    scheduler = RetentionScheduler(db, max_age_days=7, start=False)
+    result = scheduler.run_once()
+
+    assert result["pruned"] == 5
+    assert db.get_logs_count() == 3
+    assert db.get_stats_summary()["total_requests"] == 8
+    assert scheduler.stats()["runs"] == 1
+
+
+def test_max_rows_keeps_whole_minutes(db):
+    db.insert_logs(make_logs(30, minutes=3))
+
+    RetentionScheduler(db, max_rows=15, start=False).run_once()
+    # Ten logs per minute: keeping 15 keeps the two newest minutes
+    assert db.get_logs_count() == 20
+
+
+def test_rollup_max_age(db):
+    db.insert_logs(make_logs(4, age_days=40) + make_logs(2))
+
+    result = RetentionScheduler(db, rollup_max_age_days=30, start=False).run_once()
+    assert result["rollups_pruned"] == 1
+    assert db.get_stats_summary()["total_requests"] == 2
+    assert db.get_logs_count() == 6
+
+
+def test_max_file_size_prunes_and_compaction_shrinks_file(db):
+    for age in range(20, 0, -1):
+        db.insert_logs(make_logs(2000, age_days=age, minutes=60))
+    db.checkpoint()
+    size = os.path.getsize(db.db_path)
+    # Half of what the data uses, since the file also holds free blocks
+    used_mb = db.get_storage_info()["used_bytes"] / 1024 / 1024
+
+    scheduler = RetentionScheduler(db, max_file_size_mb=used_mb / 2, start=False)
+    result = scheduler.run_once()
+
+    # Deleted rows only give their space back once the file is rewritten
+    assert result["pruned"] > 0
+    assert result["compacted"] is True
+    assert os.path.getsize(db.db_path) < size
+    # The swapped-in file keeps working for reads and writes
+    remaining = db.get_logs_count()
+    db.insert_logs(make_logs(1))
+    assert db.get_logs_count() == remaining + 1
+
+
+def test_compaction_keeps_writes_made_during_the_copy(db):
+    db.insert_logs(make_logs(20000, minutes=60))
+    db.delete_logs_by_ids(list(range(1, 1001)))
+    done = threading.Event()
+    written = []
+
+    def write_until_done():
+        # Deletes during the copy are caught up too
+        db.delete_logs_by_ids([1001, 1002])
+        while not done.is_set():
+            db.insert_logs(make_logs(50))
+            written.append(50)
+
+    writer = threading.Thread(target=write_until_done)
+    writer.start()
+    try:
+        assert db.compact() is True
+    finally:
+        done.set()
+        writer.join()
+
+    expected = 19000 + sum(written) - 2
+    assert db.get_logs_count() == expected
+    assert db.get_stats_summary()["total_requests"] == expected
+    # The swapped-in sequence continues past every copied id
+    first_id, _ = db.insert_logs(make_logs(1))
+    assert (
+        first_id > db.conn.execute("SELECT max(id) - 1 FROM request_logs").fetchone()[0]
+    )
+
+
+def test_background_thread_runs_and_stops(db):
+    db.insert_logs(make_logs(2, age_days=3))
+    scheduler = RetentionScheduler(db, max_age_days=1, interval=60)
+    try:
+        for _ in range(100):
+            if scheduler.stats()["runs"]:
+                break
+            scheduler._stop.wait(0.05)
+        assert scheduler.stats()["last_result"]["pruned"] == 2
+    finally:
+        scheduler.close()
+    assert not scheduler._thread.is_alive()
+
+
+def test_invalid_policies_are_rejected(db):
+    with pytest.raises(ValueError):
+        RetentionScheduler(db, max_age_days=-1, start=False)
+    with pytest.raises(ValueError):
+        RetentionScheduler(db, max_file_size_mb=0, start=False)
+    with pytest.raises(ValueError):
+        RetentionScheduler(db, interval=0, start=False)
@@ -0,0 +1,158 @@
+"""
+Tests for the per-minute rollup tables behind the metrics endpoints
+"""
+
+import pytest
+
+from devtrack_sdk.database import DevTrackDB
+from tests.conftest import make_log
+
+
+def sample_logs():
+    logs = []
+    for i in range(60):
+        logs.append(
+            make_log(
+                minutes_ago=i % 30,
+                duration_ms=float(i + 1),
+                status_code=500 if i % 7 == 0 else 200,
+                client_identifier="client-a" if i % 2 else "client-b",
+                path_pattern="/api/items/{id}" if i % 3 else "/api/users",
+            )
+        )
+    logs.append(make_log(client_identifier=None, status_code=404))
+    return logs
+
+
+def raw_and_rollup(db, method, **kwargs):
+    """Run a metrics method with and without rollups."""
+    rollup_result = getattr(db, method)(**kwargs)
+    db._rollups_available = False
+    try:
+        raw_result = getattr(db, method)(**kwargs)
+    finally:
+        db._rollups_available = True
+    return raw_result, rollup_result
+
+
+def test_rollups_are_updated_on_ingest(db):
+    db.insert_logs(sample_logs()[:30])
+    for log in sample_logs()[30:]:
+        db.insert_log(log)
+    # Single inserts are held back and written once the rollups are read
+    assert db.get_stats_summary()["total_requests"] == 61
+
+    total = db.conn.execute("SELECT SUM(request_count) FROM request_rollups")
+    assert total.fetchone()[0] == 61
+    buckets = db.conn.execute(
+        "SELECT SUM(bucket_count) FROM request_latency_rollups"
+    ).fetchone()[0]
+    assert buckets == 61
+
+
+def test_ingest_deltas_match_rebuilt_rollups(db):
+    logs = sample_logs()
+    db.insert_logs(logs[:20])
+    for log in logs[20:40]:
+        db.insert_log(log)
+    # Repeats add to rollup rows that already exist
+    db.insert_logs(logs[40:] + [dict(log, sample_weight=3) for log in logs[:5]])
+
+    def snapshot():
+        return (
+            db.conn.execute("SELECT * FROM request_rollups ORDER BY ALL").fetchall(),
+            db.conn.execute(
+                "SELECT * FROM request_latency_rollups ORDER BY ALL"
+            ).fetchall(),
+        )
+
+    ingested = snapshot()
+    with db._write_transaction() as conn:
+        db._refresh_rollups(conn)
+    rebuilt_rollups, rebuilt_buckets = snapshot()
+    assert ingested[1] == rebuilt_buckets
+    assert len(ingested[0]) == len(rebuilt_rollups)
+    for ingested_row, rebuilt_row in zip(ingested[0], rebuilt_rollups):
+        # duration_sum may differ in the last bits from summation order
+        assert ingested_row[7] == pytest.approx(rebuilt_row[7])
+        assert ingested_row[:7] + ingested_row[8:] == rebuilt_row[:7] + rebuilt_row[8:]
+
+
+def test_single_inserts_update_rollups_in_their_transaction(db):
+    def rollup_total():
+        return db.conn.execute(
+            "SELECT coalesce(SUM(request_count), 0) FROM request_rollups"
+        ).fetchone()[0]
+
+    # Nothing is held in memory, so a process exiting without close()
+    # leaves rollups that match its raw rows
+    for count, log in enumerate(sample_logs()[:7], start=1):
+        db.insert_log(log)
+        assert rollup_total() == count
+
+
+@pytest.mark.parametrize(
+    "method",
+    ["get_stats_summary", "get_traffic_over_time", "get_error_trends"],
+)
+def test_rollup_metrics_match_raw_scan(db, method):
+    db.insert_logs(sample_logs())
+    kwargs = {} if method == "get_stats_summary" else {"hours": 1}
+
+    raw_result, rollup_result = raw_and_rollup(db, method, **kwargs)
+    assert rollup_result == raw_result
+
+
+def test_rollup_consumer_segments_match_raw_scan(db):
+    db.insert_logs(sample_logs())
+
+    raw_result, rollup_result = raw_and_rollup(db, "get_consumer_segments", hours=1)
+    assert rollup_result["total_unique_clients"] == raw_result["total_unique_clients"]
+    assert rollup_result["source_breakdown"] == raw_result["source_breakdown"]
+    # Segments with equal request counts may come back in either order
+    assert sorted(
+        rollup_result["segments"], key=lambda segment: segment["client_identifier"]
+    ) == sorted(
+        raw_result["segments"], key=lambda segment: segment["client_identifier"]
+    )
+
+
+def test_rollup_percentiles_are_within_sketch_error(db):
+    db.insert_logs(sample_logs())
+
+    rollup_result = db.get_performance_metrics(hours=1)
+    raw_result = db.get_performance_metrics(hours=1, exact=True)
+    raw_overall = raw_result["overall_stats"]
+    rollup_overall = rollup_result["overall_stats"]
+    for key in ("p50", "p95", "p99"):
+        assert rollup_overall[key] == pytest.approx(raw_overall[key], rel=0.02)
+    assert rollup_overall["avg"] == pytest.approx(raw_overall["avg"])
+    assert len(rollup_result["latency_over_time"]) == len(
+        raw_result["latency_over_time"]
+    )
+
+
+def test_deletes_keep_rollups_in_sync(db):
+    db.insert_logs(sample_logs())
+
+    deleted = db.delete_logs_by_status_code(500)
+    assert deleted == 9
+    summary = db.get_stats_summary()
+    assert summary["total_requests"] == 52
+    assert summary["error_count"] == 1
+
+    db.delete_all_logs()
+    assert db.get_stats_summary()["total_requests"] == 0
+
+
+def test_rollups_are_backfilled_for_existing_databases(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    db = DevTrackDB(db_path, read_only=False)
+    db.insert_logs(sample_logs())
+    db.conn.execute("DROP TABLE request_rollups")
+    db.conn.execute("DROP TABLE request_latency_rollups")
+    db.close()
+
+    db = DevTrackDB(db_path, read_only=False)
+    assert db.get_stats_summary()["total_requests"] == 61
+    db.close()
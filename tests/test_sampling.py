@@ -0,0 +1,126 @@
+"""
+Tests for adaptive sampling, sample weights and the exact request counters
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from devtrack_sdk.middleware.base import DevTrackMiddleware
+from devtrack_sdk.sampling import RequestCounter, Sampler
+from tests.conftest import make_log
+
+
+def test_rates_round_down_to_whole_weights():
+    sampler = Sampler(rate=0.3, seed=1)
+    kept = [log for log in (make_log() for _ in range(3000)) if sampler.sample(log)]
+
+    # 0.3 rounds down to 1/4, so each kept log stands for 4 requests
+    assert {log["sample_weight"] for log in kept} == {4}
+    assert 600 < len(kept) < 900
+    assert sampler.stats()["seen"] == 3000
+
+
+def test_errors_slow_requests_and_path_rates():
+    sampler = Sampler(rate=0.0, path_rates={"/api/orders": 1.0}, slow_ms=500)
+
+    assert not sampler.sample(make_log())
+    error = make_log(status_code=503)
+    slow = make_log(duration_ms=900)
+    order = make_log(path_pattern="/api/orders")
+    assert sampler.sample(error) and error["sample_weight"] == 1
+    assert sampler.sample(slow) and slow["sample_weight"] == 1
+    assert sampler.sample(order) and order["sample_weight"] == 1
+    assert sampler.stats()["forced"] == 2
+
+
+def test_target_rows_per_sec_scales_rates_down(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("devtrack_sdk.sampling.time.monotonic", lambda: clock[0])
+    sampler = Sampler(target_rows_per_sec=10, seed=3)
+
+    # 1000 requests/sec against a budget of 10 rows/sec
+    for _ in range(1000):
+        sampler.sample(make_log())
+    clock[0] = 1.0
+    sampler.sample(make_log())
+    assert sampler.stats()["scale"] == pytest.approx(0.01, rel=0.01)
+
+    kept = []
+    for _ in range(1000):
+        log = make_log()
+        if sampler.sample(log):
+            kept.append(log)
+    assert 0 < len(kept) < 30
+    assert all(log["sample_weight"] >= 100 for log in kept)
+
+
+def test_invalid_sampling_options():
+    with pytest.raises(ValueError):
+        Sampler(rate=1.5)
+    with pytest.raises(ValueError):
+        Sampler(path_rates={"/a": -0.1})
+    with pytest.raises(ValueError):
+        Sampler(target_rows_per_sec=0)
+
+
+def test_weighted_metrics_estimate_all_requests(db):
+    sampled = make_log(duration_ms=10.0)
+    sampled["sample_weight"] = 10
+    db.insert_logs([sampled, make_log(status_code=500, duration_ms=120.0)])
+
+    summary = db.get_stats_summary()
+    assert summary["total_requests"] == 11
+    assert summary["error_count"] == 1
+    assert summary["avg_duration_ms"] == pytest.approx(20.0)
+    assert db.get_logs_count() == 2
+
+    # The raw-log path weighs logs the same way as the rollups
+    db._rollups_available = False
+    assert db.get_stats_summary()["total_requests"] == 11
+    assert sum(row["request_count"] for row in db.get_traffic_over_time(1)) == 11
+
+
+def test_request_counter_flushes_exact_counts(db):
+    counter = RequestCounter(db, flush_interval=60)
+    for _ in range(7):
+        counter.add(make_log())
+    counter.add(make_log(status_code=404))
+
+    assert counter.stats()["pending"] == 8
+    assert counter.flush() == 8
+    counter.add(make_log())
+    counter.close()
+
+    counts = {
+        (row["path_pattern"], row["status_class"]): row["request_count"]
+        for row in db.get_request_counts(hours=1)
+    }
+    assert counts == {
+        ("/api/items/{item_id}", 2): 8,
+        ("/api/items/{item_id}", 4): 1,
+    }
+
+
+def test_middleware_counts_every_request_but_samples_logs(db):
+    app = FastAPI()
+    app.add_middleware(
+        DevTrackMiddleware, db_instance=db, buffered=False, sampling={"rate": 0.0}
+    )
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello"}
+
+    with TestClient(app) as client:
+        for _ in range(5):
+            client.get("/")
+        client.get("/missing")
+        middleware = app.middleware_stack
+        while not isinstance(middleware, DevTrackMiddleware):
+            middleware = middleware.app
+        middleware.counter.close()
+
+    # Only the 404 is logged, but every request is counted
+    assert db.get_logs_count() == 1
+    assert sum(row["request_count"] for row in db.get_request_counts(hours=1)) == 6
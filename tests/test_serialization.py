@@ -0,0 +1,50 @@
+"""
+Tests for the pluggable JSON serializer
+"""
+
+from datetime import datetime
+
+import pytest
+
+from devtrack_sdk import serialization
+
+
+@pytest.fixture(params=["json", "orjson", "msgspec"])
+def backend(request):
+    previous = serialization.backend()
+    try:
+        yield serialization.set_backend(request.param)
+    except ValueError:
+        pytest.skip(f"{request.param} is not installed")
+    finally:
+        serialization.set_backend(previous)
+
+
+def test_round_trip(backend):
+    value = {"a": [1, 2.5, None, True], "b": {"c": "ü"}}
+    assert serialization.loads(serialization.dumps(value)) == value
+    assert serialization.loads(serialization.dumps_bytes(value)) == value
+
+
+def test_default_and_big_integers(backend):
+    payload = serialization.dumps(
+        {"at": datetime(2026, 1, 2, 3, 4, 5), "n": 2**70, "s": {1}},
+        default=serialization.json_default,
+    )
+    assert serialization.loads(payload) == {
+        "at": "2026-01-02T03:04:05",
+        "n": 2**70,
+        "s": "{1}",
+    }
+
+
+def test_invalid_json_raises_value_error(backend):
+    for text in ("{bad", "", "   "):
+        with pytest.raises(ValueError):
+            serialization.loads(text)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        serialization.set_backend("simplejson")
+    assert serialization.backend() in serialization.BACKENDS
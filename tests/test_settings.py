@@ -97,3 +97,6 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 # Test-specific settings
 TEST_RUNNER = "django.test.runner.DiscoverRunner"
+
+# Write logs before the response returns so tests can read them right away
+DEVTRACK_BUFFERED_WRITES = False
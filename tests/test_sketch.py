@@ -0,0 +1,100 @@
+"""
+Tests for the DDSketch latency sketch and the DevTrackDB sketch API
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from devtrack_sdk.sketch import DDSketch
+from tests.conftest import make_log
+
+
+def exact_quantile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+@pytest.fixture
+def durations():
+    rng = random.Random(42)
+    return [rng.lognormvariate(3, 1) for _ in range(5000)]
+
+
+def test_quantiles_are_within_relative_accuracy(durations):
+    sketch = DDSketch()
+    for value in durations:
+        sketch.add(value)
+
+    assert sketch.count == len(durations)
+    for q in (0.0, 0.5, 0.9, 0.95, 0.99, 1.0):
+        expected = exact_quantile(durations, q)
+        assert sketch.quantile(q) == pytest.approx(expected, rel=0.01)
+
+
+def test_merge_matches_single_sketch(durations):
+    whole = DDSketch()
+    first, second = DDSketch(), DDSketch()
+    for i, value in enumerate(durations):
+        whole.add(value)
+        (first if i % 2 else second).add(value)
+
+    merged = first.merge(second)
+    assert merged.buckets == whole.buckets
+    assert merged.count == whole.count
+
+
+def test_serialization_round_trip(durations):
+    sketch = DDSketch()
+    for value in durations:
+        sketch.add(value)
+
+    data = sketch.to_bytes()
+    restored = DDSketch.from_bytes(data)
+    assert restored.buckets == sketch.buckets
+    assert restored.count == sketch.count
+    assert len(data) < 4 * len(sketch.buckets) + 32
+
+
+def test_empty_sketch_and_invalid_input():
+    sketch = DDSketch()
+    assert sketch.quantile(0.5) is None
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
+    with pytest.raises(ValueError):
+        sketch.merge(DDSketch(relative_accuracy=0.05))
+
+
+def test_db_sketch_api(db, durations):
+    db.insert_logs(
+        [
+            make_log(
+                minutes_ago=i % 10,
+                path_pattern="/api/items" if i % 2 else "/api/users",
+                duration_ms=value,
+            )
+            for i, value in enumerate(durations[:1000])
+        ]
+    )
+    now = datetime.now(timezone.utc)
+
+    overall = db.get_latency_percentiles()
+    assert overall["count"] == 1000
+    assert overall["relative_error"] == 0.01
+    for key, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        expected = exact_quantile(durations[:1000], q)
+        assert overall[key] == pytest.approx(expected, rel=0.011)
+
+    items = [value for i, value in enumerate(durations[:1000]) if i % 2]
+    route = db.get_latency_sketch("/api/items")
+    assert route.count == len(items)
+    assert route.quantile(0.5) == pytest.approx(exact_quantile(items, 0.5), rel=0.01)
+
+    sketches = db.get_latency_sketches()
+    assert set(sketches) == {"/api/items", "/api/users"}
+    assert sum(sketch.count for sketch in sketches.values()) == 1000
+
+    future = db.get_latency_percentiles(start=now + timedelta(hours=1))
+    assert future["count"] == 0
+    assert future["p50"] is None
@@ -0,0 +1,141 @@
+"""
+Tests for the buffered background log writer
+"""
+
+import os
+import threading
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from devtrack_sdk.database import init_db
+from devtrack_sdk.middleware.base import DevTrackMiddleware
+from devtrack_sdk.redaction import Redactor
+from devtrack_sdk.writer import LogWriter
+
+
+class RecordingDB:
+    """Minimal stand-in for DevTrackDB that records inserted logs."""
+
+    def __init__(self, gate: threading.Event = None):
+        self.logs = []
+        self.gate = gate
+
+    def insert_log(self, log_data):
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.logs.append(log_data)
+        return len(self.logs)
+
+    def insert_logs(self, batch):
+        first_id = len(self.logs) + 1
+        for log_data in batch:
+            self.insert_log(log_data)
+        return first_id, len(self.logs)
+
+
+def test_writer_flushes_queued_records():
+    db = RecordingDB()
+    writer = LogWriter(db, batch_size=10, flush_interval=10)
+    for i in range(25):
+        assert writer.submit({"n": i})
+
+    assert writer.flush(timeout=5)
+    assert [log["n"] for log in db.logs] == list(range(25))
+    assert writer.stats()["written"] == 25
+    writer.close()
+
+
+def test_writer_redacts_batches():
+    db = RecordingDB()
+    writer = LogWriter(db, flush_interval=10, redactor=Redactor())
+    assert writer.submit({"n": 1, "request_body": {"password": "p"}})
+
+    assert writer.flush(timeout=5)
+    assert db.logs == [{"n": 1, "request_body": {"password": "***"}}]
+    writer.close()
+
+
+def test_writer_drop_newest_policy():
+    gate = threading.Event()
+    db = RecordingDB(gate)
+    writer = LogWriter(
+        db, max_queue_size=2, batch_size=1, overflow_policy="drop_newest"
+    )
+    writer.submit({"n": 0})
+    writer.flush(timeout=0.2)  # Writer is now stuck on the gate with record 0
+
+    assert writer.submit({"n": 1})
+    assert writer.submit({"n": 2})
+    assert not writer.submit({"n": 3})
+
+    gate.set()
+    writer.flush(timeout=5)
+    assert [log["n"] for log in db.logs] == [0, 1, 2]
+    assert writer.stats()["dropped"] == 1
+    writer.close()
+
+
+def test_writer_drop_oldest_policy():
+    gate = threading.Event()
+    db = RecordingDB(gate)
+    writer = LogWriter(
+        db, max_queue_size=2, batch_size=1, overflow_policy="drop_oldest"
+    )
+    writer.submit({"n": 0})
+    writer.flush(timeout=0.2)
+
+    for i in range(1, 4):
+        assert writer.submit({"n": i})
+
+    gate.set()
+    writer.flush(timeout=5)
+    assert [log["n"] for log in db.logs] == [0, 2, 3]
+    assert writer.stats()["dropped"] == 1
+    writer.close()
+
+
+def test_writer_rejects_invalid_policy():
+    with pytest.raises(ValueError):
+        LogWriter(RecordingDB(), overflow_policy="spill")
+
+
+def test_writer_close_drains_queue():
+    db = RecordingDB()
+    writer = LogWriter(db, batch_size=100, flush_interval=10)
+    for i in range(5):
+        writer.submit({"n": i})
+    writer.close()
+
+    assert len(db.logs) == 5
+    assert not writer.submit({"n": 5})
+
+
+def test_buffered_middleware_writes_in_background():
+    db_path = f"/tmp/test_devtrack_{uuid.uuid4().hex}.db"
+    db = init_db(db_path, read_only=False)
+
+    app = FastAPI()
+    app.add_middleware(DevTrackMiddleware, db_instance=db, buffered=True)
+
+    @app.get("/")
+    async def root():
+        return {"message": "Hello"}
+
+    # Build the middleware stack so the instance can be inspected
+    client = TestClient(app)
+    for _ in range(3):
+        assert client.get("/").status_code == 200
+
+    middleware = app.middleware_stack
+    while not isinstance(middleware, DevTrackMiddleware):
+        middleware = middleware.app
+    assert middleware.writer.flush(timeout=5)
+    assert db.get_logs_count() == 3
+
+    middleware.writer.close()
+    db.close()
+    if os.path.exists(db_path):
+        os.unlink(db_path)